@@ -0,0 +1,344 @@
+"""Repeatable load test for the API.
+
+Boots the FastAPI app from server.py in-process (requests go through an ASGI
+transport, so no network is involved), seeds synthetic data with
+seed_data.seed_database, drives a weighted mix of endpoint workloads and
+writes per-scenario p50/p95/p99 latency, throughput and Mongo command counts
+to a JSON report. A previous report can be given as a baseline to fail on
+regressions, which is how CI is expected to use it.
+
+Usage:
+    # against a local mongod (a throwaway database is created and dropped)
+    python benchmark.py --mongo-url mongodb://localhost:27017 --output bench.json
+
+    # without a mongod, using mongomock-motor (latency numbers are not
+    # representative and Mongo command counts are not reported; seeds 2000
+    # students unless --students is given)
+    python benchmark.py --mock --output bench.json
+
+    # compare against a stored baseline
+    python benchmark.py --compare baseline.json --max-regression 0.25
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import re
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+BENCH_PASSWORD = 'BenchPass123!'
+SERVER_TIMING_COMMANDS = re.compile(r'desc="(\d+) commands"')
+
+
+def student_request(ctx, rng):
+    workspace = rng.choice(ctx['workspaces'])
+    return workspace, rng.choice(workspace['member_ids'])
+
+
+def scenario_list_workspaces_student(ctx, rng):
+    _, student_id = student_request(ctx, rng)
+    return 'GET', '/api/workspaces', {}, student_id
+
+
+def scenario_workspace_tasks_student(ctx, rng):
+    workspace, student_id = student_request(ctx, rng)
+    return 'GET', f"/api/workspaces/{workspace['id']}/tasks", {}, student_id
+
+
+def scenario_my_submissions(ctx, rng):
+    _, student_id = student_request(ctx, rng)
+    return 'GET', '/api/my-submissions', {}, student_id
+
+
+def scenario_leaderboard(ctx, rng):
+    _, student_id = student_request(ctx, rng)
+    return 'GET', '/api/leaderboard', {}, student_id
+
+
+def scenario_department_updates(ctx, rng):
+    _, student_id = student_request(ctx, rng)
+    return 'GET', '/api/department-updates', {}, student_id
+
+
+def scenario_submit_task(ctx, rng):
+    workspace, student_id = student_request(ctx, rng)
+    task_id = rng.choice(workspace['task_ids'])
+    return 'POST', f'/api/tasks/{task_id}/submit', {'data': {'link': 'https://example.edu/resubmission'}}, student_id
+
+
+def scenario_task_report_summary(ctx, rng):
+    workspace = rng.choice(ctx['workspaces'])
+    task_id = rng.choice(workspace['task_ids'])
+    return 'GET', f'/api/tasks/{task_id}/submissions', {'params': {'summary': 'true'}}, workspace['admin_id']
+
+
+def scenario_task_report(ctx, rng):
+    workspace = rng.choice(ctx['workspaces'])
+    task_id = rng.choice(workspace['task_ids'])
+    return 'GET', f'/api/tasks/{task_id}/submissions', {'params': {'limit': 100}}, workspace['admin_id']
+
+
+def scenario_workspace_progress(ctx, rng):
+    workspace = rng.choice(ctx['workspaces'])
+    return 'GET', f"/api/workspaces/{workspace['id']}/progress", {}, workspace['admin_id']
+
+
+def scenario_list_workspaces_admin(ctx, rng):
+    workspace = rng.choice(ctx['workspaces'])
+    return 'GET', '/api/workspaces', {}, workspace['admin_id']
+
+
+def scenario_login(ctx, rng):
+    _, student_id = student_request(ctx, rng)
+    body = {'email': ctx['users'][student_id]['email'], 'password': BENCH_PASSWORD}
+    return 'POST', '/api/auth/login', {'json': body}, None
+
+
+# name -> (builder, default weight)
+SCENARIOS = {
+    'list_workspaces_student': (scenario_list_workspaces_student, 15),
+    'workspace_tasks_student': (scenario_workspace_tasks_student, 20),
+    'my_submissions': (scenario_my_submissions, 10),
+    'leaderboard': (scenario_leaderboard, 10),
+    'department_updates': (scenario_department_updates, 10),
+    'submit_task': (scenario_submit_task, 10),
+    'task_report_summary': (scenario_task_report_summary, 8),
+    'task_report': (scenario_task_report, 5),
+    'workspace_progress': (scenario_workspace_progress, 5),
+    'list_workspaces_admin': (scenario_list_workspaces_admin, 5),
+    'login': (scenario_login, 2),
+}
+
+
+def percentile(sorted_values, pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = (len(sorted_values) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (rank - low)
+
+
+async def run_workload(client, server, ctx, scenario_names, weights, duration, concurrency, seed):
+    samples = {name: {'latencies': [], 'mongo_commands': [], 'statuses': {}} for name in scenario_names}
+    tokens = {}
+    deadline = time.perf_counter() + duration
+
+    def token_for(user_id):
+        if user_id not in tokens:
+            user = ctx['users'][user_id]
+            tokens[user_id] = server.create_token(user_id, user['email'], user['role'], user['department'])
+        return tokens[user_id]
+
+    async def worker(worker_id):
+        rng = random.Random(seed + worker_id)
+        while time.perf_counter() < deadline:
+            name = rng.choices(scenario_names, weights)[0]
+            method, url, kwargs, user_id = SCENARIOS[name][0](ctx, rng)
+            headers = {'Authorization': f'Bearer {token_for(user_id)}'} if user_id else {}
+            start = time.perf_counter()
+            response = await client.request(method, url, headers=headers, **kwargs)
+            elapsed = time.perf_counter() - start
+
+            sample = samples[name]
+            sample['latencies'].append(elapsed)
+            sample['statuses'][str(response.status_code)] = sample['statuses'].get(str(response.status_code), 0) + 1
+            match = SERVER_TIMING_COMMANDS.search(response.headers.get('server-timing', ''))
+            if match:
+                sample['mongo_commands'].append(int(match.group(1)))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    return samples, time.perf_counter() - started
+
+
+def summarize(samples, elapsed) -> dict:
+    scenarios = {}
+    for name, sample in samples.items():
+        latencies = sorted(sample['latencies'])
+        if not latencies:
+            continue
+        errors = sum(count for status, count in sample['statuses'].items() if int(status) >= 400)
+        scenarios[name] = {
+            'requests': len(latencies),
+            'errors': errors,
+            'statuses': sample['statuses'],
+            'throughput_rps': round(len(latencies) / elapsed, 2),
+            'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+            'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+            'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+            'mean_ms': round(statistics.mean(latencies) * 1000, 2),
+            'mongo_commands_mean': round(statistics.mean(sample['mongo_commands']), 2) if sample['mongo_commands'] else None,
+            'mongo_commands_max': max(sample['mongo_commands']) if sample['mongo_commands'] else None
+        }
+    total_requests = sum(s['requests'] for s in scenarios.values())
+    return {
+        'scenarios': scenarios,
+        'total': {
+            'requests': total_requests,
+            'errors': sum(s['errors'] for s in scenarios.values()),
+            'elapsed_s': round(elapsed, 2),
+            'throughput_rps': round(total_requests / elapsed, 2) if elapsed else 0.0
+        }
+    }
+
+
+def compare_with_baseline(report: dict, baseline: dict, max_regression: float) -> list:
+    """Return a list of human readable regressions against a baseline report"""
+    regressions = []
+    for name, current in report['scenarios'].items():
+        previous = baseline.get('scenarios', {}).get(name)
+        if not previous:
+            continue
+        if previous['p95_ms'] and current['p95_ms'] > previous['p95_ms'] * (1 + max_regression):
+            regressions.append(f"{name}: p95 {previous['p95_ms']}ms -> {current['p95_ms']}ms")
+        if previous.get('mongo_commands_mean') is not None and current.get('mongo_commands_mean') is not None:
+            if current['mongo_commands_mean'] > previous['mongo_commands_mean'] + 0.5:
+                regressions.append(
+                    f"{name}: mongo commands/request {previous['mongo_commands_mean']} -> {current['mongo_commands_mean']}"
+                )
+        if current['errors'] > previous['errors']:
+            regressions.append(f"{name}: errors {previous['errors']} -> {current['errors']}")
+    return regressions
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def print_report(report: dict):
+    print(f"{'scenario':<26}{'reqs':>7}{'err':>6}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'mongo':>7}")
+    for name, s in sorted(report['scenarios'].items()):
+        mongo = '-' if s['mongo_commands_mean'] is None else f"{s['mongo_commands_mean']:.1f}"
+        print(f"{name:<26}{s['requests']:>7}{s['errors']:>6}{s['throughput_rps']:>9.1f}"
+              f"{s['p50_ms']:>9.1f}{s['p95_ms']:>9.1f}{s['p99_ms']:>9.1f}{mongo:>7}")
+    total = report['total']
+    print(f"total: {total['requests']} requests, {total['errors']} errors, {total['throughput_rps']} req/s")
+
+
+async def main(args) -> int:
+    # Configure the app before importing it: a throwaway database and no auth throttling
+    db_name = args.db_name or f"bench_{int(time.time())}"
+    os.environ['MONGO_URL'] = args.mongo_url
+    os.environ['DB_NAME'] = db_name
+    os.environ['AUTH_RATE_LIMIT_IP_BURST'] = '1000000000'
+    os.environ['AUTH_RATE_LIMIT_EMAIL_BURST'] = '1000000000'
+    import httpx
+    import server
+    from seed_data import seed_database
+
+    if args.mock:
+        from mongomock_motor import AsyncMongoMockClient
+        server.connect_to_mongo(AsyncMongoMockClient())
+    else:
+        server.connect_to_mongo()
+
+    scenario_names = args.scenarios.split(',') if args.scenarios else list(SCENARIOS)
+    unknown = [name for name in scenario_names if name not in SCENARIOS]
+    if unknown:
+        print(f"Unknown scenarios: {', '.join(unknown)}", file=sys.stderr)
+        return 2
+    weights = [SCENARIOS[name][1] for name in scenario_names]
+
+    try:
+        await server.ensure_indexes()
+        seed_start = time.perf_counter()
+        ctx = await seed_database(
+            server.db,
+            server.hash_password(BENCH_PASSWORD),
+            departments=args.departments,
+            students=args.students,
+            workspaces=args.workspaces,
+            members_per_workspace=args.members_per_workspace,
+            tasks_per_workspace=args.tasks_per_workspace,
+            seed=args.seed
+        )
+        seed_seconds = time.perf_counter() - seed_start
+        print(f"Seeded {ctx['counts']} in {seed_seconds:.1f}s")
+
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://bench', timeout=None) as client:
+            if args.warmup > 0:
+                await run_workload(client, server, ctx, scenario_names, weights, args.warmup, args.concurrency, args.seed)
+            samples, elapsed = await run_workload(
+                client, server, ctx, scenario_names, weights, args.duration, args.concurrency, args.seed
+            )
+    finally:
+        if not args.mock and not args.keep_data:
+            await server.client.drop_database(db_name)
+
+    report = summarize(samples, elapsed)
+    if args.mock:
+        # mongomock does not emit command monitoring events
+        for scenario in report['scenarios'].values():
+            scenario['mongo_commands_mean'] = scenario['mongo_commands_max'] = None
+    report['meta'] = {
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'git_revision': git_revision(),
+        'python': platform.python_version(),
+        'mongo': 'mongomock' if args.mock else args.mongo_url,
+        'seed_counts': ctx['counts'],
+        'seed_seconds': round(seed_seconds, 2),
+        'config': {
+            'duration': args.duration,
+            'concurrency': args.concurrency,
+            'scenarios': dict(zip(scenario_names, weights)),
+            'seed': args.seed
+        }
+    }
+    print_report(report)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare_with_baseline(report, baseline, args.max_regression)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+        print("No regressions against baseline")
+    return 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mongo-url', default=os.environ.get('BENCH_MONGO_URL', 'mongodb://localhost:27017'))
+    parser.add_argument('--db-name', help='database to seed (default: a new bench_<timestamp> database)')
+    parser.add_argument('--mock', action='store_true', help='use mongomock-motor instead of a real mongod')
+    parser.add_argument('--keep-data', action='store_true', help='do not drop the seeded database afterwards')
+    parser.add_argument('--departments', type=int, default=5)
+    parser.add_argument('--students', type=int, help='default 50000, or 2000 with --mock')
+    parser.add_argument('--workspaces', type=int, default=50)
+    parser.add_argument('--members-per-workspace', type=int, default=200)
+    parser.add_argument('--tasks-per-workspace', type=int, default=10)
+    parser.add_argument('--duration', type=float, default=30, help='seconds to run the measured workload')
+    parser.add_argument('--warmup', type=float, default=5, help='seconds of unmeasured warmup')
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument('--scenarios', help=f"comma separated subset of: {', '.join(SCENARIOS)}")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='write the JSON report here')
+    parser.add_argument('--compare', help='baseline JSON report to compare against')
+    parser.add_argument('--max-regression', type=float, default=0.25, help='allowed relative p95 increase')
+    args = parser.parse_args(argv)
+    if args.students is None:
+        # mongomock keeps the data set in this process; keep seeding to seconds
+        args.students = 2000 if args.mock else 50000
+    return args
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(parse_args())))
@@ -0,0 +1,217 @@
+"""Login latency for legitimate users during a credential-stuffing attack.
+
+Boots the app from server.py in-process (ASGI transport, like benchmark.py)
+against a throwaway database seeded by seed_data. Legitimate users log in
+with their own password from their own address every --legit-interval
+seconds, while attackers try wrong passwords against other accounts (and
+unknown emails) from a pool of --attack-ips addresses as fast as
+--attack-concurrency allows. Client addresses are simulated with
+X-Forwarded-For, so TRUSTED_PROXY_HOPS is set to 1.
+
+Four phases run back to back, each for --duration seconds:
+  baseline      legitimate traffic only
+  attack        legitimate traffic plus the attack, auth rate limits on
+  targeted      the attack aimed at --targeted-accounts of the legitimate
+                users, who must not be locked out of their own accounts
+  unlimited     the first attack with the rate limiters replaced by ones that
+                never reject (skip with --skip-unlimited)
+
+For each phase it reports legitimate p50/p95/p99 latency and outcomes, and
+how many attack requests the limiter rejected (429) versus how many got
+through to the password check (401).
+
+Usage:
+    python benchmark_auth.py --mongo-url mongodb://localhost:27017
+    python benchmark_auth.py --mock --attack-ips 1000 --output auth.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+
+from benchmark import percentile
+
+BENCH_PASSWORD = 'BenchPass123!'
+
+
+def legit_address(index: int) -> str:
+    return f'10.1.{index // 250}.{index % 250 + 1}'
+
+
+def attack_address(index: int) -> str:
+    return f'172.16.{index // 250}.{index % 250 + 1}'
+
+
+async def run_phase(client, legit_emails, attack_emails, args, attack: bool) -> dict:
+    legit = {'latencies': [], 'statuses': {}}
+    attack_stats = {'latencies': [], 'statuses': {}}
+    deadline = time.perf_counter() + args.duration
+
+    def record(stats, status, elapsed):
+        stats['latencies'].append(elapsed)
+        stats['statuses'][str(status)] = stats['statuses'].get(str(status), 0) + 1
+
+    async def legit_user(index, email):
+        rng = random.Random(args.seed + index)
+        # Spread the first logins over one interval so users do not arrive in lockstep
+        await asyncio.sleep(rng.uniform(0, args.legit_interval))
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            response = await client.post(
+                '/api/auth/login',
+                json={'email': email, 'password': BENCH_PASSWORD},
+                headers={'X-Forwarded-For': legit_address(index)}
+            )
+            record(legit, response.status_code, time.perf_counter() - start)
+            await asyncio.sleep(args.legit_interval)
+
+    async def attacker(worker_id):
+        rng = random.Random(args.seed * 1000 + worker_id)
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            response = await client.post(
+                '/api/auth/login',
+                json={'email': rng.choice(attack_emails), 'password': f'leaked-{rng.randrange(10 ** 6)}'},
+                headers={'X-Forwarded-For': attack_address(rng.randrange(args.attack_ips))}
+            )
+            record(attack_stats, response.status_code, time.perf_counter() - start)
+
+    workers = [legit_user(index, email) for index, email in enumerate(legit_emails)]
+    if attack:
+        workers += [attacker(i) for i in range(args.attack_concurrency)]
+    started = time.perf_counter()
+    await asyncio.gather(*workers)
+    elapsed = time.perf_counter() - started
+
+    legit_latencies = sorted(legit['latencies'])
+    result = {
+        'legit': {
+            'requests': len(legit_latencies),
+            'ok': legit['statuses'].get('200', 0),
+            'rate_limited': legit['statuses'].get('429', 0),
+            'statuses': legit['statuses'],
+            'p50_ms': round(percentile(legit_latencies, 50) * 1000, 2),
+            'p95_ms': round(percentile(legit_latencies, 95) * 1000, 2),
+            'p99_ms': round(percentile(legit_latencies, 99) * 1000, 2)
+        }
+    }
+    if attack:
+        attack_latencies = sorted(attack_stats['latencies'])
+        rejected = attack_stats['statuses'].get('429', 0)
+        result['attack'] = {
+            'requests': len(attack_latencies),
+            'throughput_rps': round(len(attack_latencies) / elapsed, 2),
+            'rejected': rejected,
+            'rejected_ratio': round(rejected / len(attack_latencies), 4) if attack_latencies else 0.0,
+            'passed_limiter': attack_stats['statuses'].get('401', 0),
+            'statuses': attack_stats['statuses'],
+            'p99_ms': round(percentile(attack_latencies, 99) * 1000, 2)
+        }
+    return result
+
+
+async def main(args) -> int:
+    # Configure the app before importing it: a throwaway database and one trusted proxy hop
+    db_name = args.db_name or f"bench_auth_{int(time.time())}"
+    os.environ['MONGO_URL'] = args.mongo_url
+    os.environ['DB_NAME'] = db_name
+    os.environ['TRUSTED_PROXY_HOPS'] = '1'
+    if args.limiter_backend:
+        os.environ['AUTH_RATE_LIMIT_BACKEND'] = args.limiter_backend
+    import httpx
+    import server
+    from rate_limit import InMemoryRateLimiter
+    from seed_data import seed_database
+
+    if args.mock:
+        from mongomock_motor import AsyncMongoMockClient
+        server.connect_to_mongo(AsyncMongoMockClient())
+    else:
+        server.connect_to_mongo()
+
+    phases = ['baseline', 'attack', 'targeted']
+    if not args.skip_unlimited:
+        phases.append('unlimited')
+    results = {}
+    try:
+        await server.ensure_indexes()
+        ctx = await seed_database(
+            server.db, server.hash_password(BENCH_PASSWORD),
+            students=args.accounts, workspaces=1, members_per_workspace=1, tasks_per_workspace=1,
+            updates_per_department=0, seed=args.seed
+        )
+        emails = [user['email'] for user in ctx['users'].values() if user['role'] == 'student']
+        legit_emails = emails[:args.legit_users]
+        # Stuffing lists mix real accounts with addresses that were never registered
+        attack_emails = emails[args.legit_users:] + [
+            f'leaked{i}@elsewhere.example.com' for i in range(len(emails))
+        ]
+
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://bench', timeout=None) as client:
+            for name in phases:
+                # Fresh buckets per phase so one phase's attack does not leak into the next
+                server.create_rate_limiters()
+                if name == 'unlimited':
+                    server.ip_rate_limiter = InMemoryRateLimiter(float('inf'), 0)
+                    server.email_rate_limiter = InMemoryRateLimiter(float('inf'), 0)
+                targets = legit_emails[:args.targeted_accounts] if name == 'targeted' else attack_emails
+                results[name] = await run_phase(client, legit_emails, targets, args, attack=name != 'baseline')
+    finally:
+        if not args.mock and not args.keep_data:
+            await server.client.drop_database(db_name)
+
+    print(f"legit users: {len(legit_emails)}, attack ips: {args.attack_ips}, "
+          f"attack concurrency: {args.attack_concurrency}, limiter: {server.AUTH_RATE_LIMIT_BACKEND}")
+    print(f"{'phase':<11}{'legit':>7}{'ok':>6}{'429':>6}{'p50':>9}{'p95':>9}{'p99':>9}"
+          f"{'attack':>8}{'rejected':>10}{'passed':>8}")
+    for name, result in results.items():
+        legit = result['legit']
+        attack = result.get('attack', {})
+        rejected = f"{attack['rejected_ratio']:.0%}" if attack else '-'
+        print(f"{name:<11}{legit['requests']:>7}{legit['ok']:>6}{legit['rate_limited']:>6}"
+              f"{legit['p50_ms']:>9.1f}{legit['p95_ms']:>9.1f}{legit['p99_ms']:>9.1f}"
+              f"{attack.get('requests', '-'):>8}{rejected:>10}{attack.get('passed_limiter', '-'):>8}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                'config': {
+                    'legit_users': len(legit_emails),
+                    'legit_interval': args.legit_interval,
+                    'attack_ips': args.attack_ips,
+                    'attack_concurrency': args.attack_concurrency,
+                    'duration': args.duration,
+                    'limiter': server.AUTH_RATE_LIMIT_BACKEND,
+                    'mongo': 'mongomock' if args.mock else args.mongo_url
+                },
+                'phases': results
+            }, f, indent=2)
+    return 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mongo-url', default=os.environ.get('BENCH_MONGO_URL', 'mongodb://localhost:27017'))
+    parser.add_argument('--db-name', help='database to seed (default: a new bench_auth_<timestamp> database)')
+    parser.add_argument('--mock', action='store_true', help='use mongomock-motor instead of a real mongod')
+    parser.add_argument('--keep-data', action='store_true', help='do not drop the seeded database afterwards')
+    parser.add_argument('--limiter-backend', choices=['memory', 'mongo'], help='overrides AUTH_RATE_LIMIT_BACKEND')
+    parser.add_argument('--accounts', type=int, default=500, help='student accounts to seed')
+    parser.add_argument('--legit-users', type=int, default=20)
+    parser.add_argument('--legit-interval', type=float, default=15.0, help='seconds between one user\'s logins')
+    parser.add_argument('--attack-ips', type=int, default=500)
+    parser.add_argument('--targeted-accounts', type=int, default=2, help='legitimate accounts the targeted phase attacks')
+    parser.add_argument('--attack-concurrency', type=int, default=50)
+    parser.add_argument('--duration', type=float, default=20, help='seconds per phase')
+    parser.add_argument('--skip-unlimited', action='store_true', help='do not run the phase without rate limits')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='write the results as JSON here')
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(parse_args())))
@@ -0,0 +1,252 @@
+"""Before/after measurements for the bulk endpoints.
+
+Boots the app from server.py in-process (ASGI transport, like benchmark.py)
+against a throwaway database seeded by seed_data, and compares each bulk
+endpoint with the one-at-a-time path it replaces:
+
+  roster      POST /workspaces/{id}/members/import of --roster-rows emails
+              vs POST /workspaces/join per student (--baseline-rows of them)
+  provision   POST /auth/provision of --provision-rows users
+              vs POST /auth/signup per user (--baseline-rows of them)
+  archive     GET /tasks/{id}/submissions/archive over --archive-files files
+              of --file-size bytes vs downloading each file from /uploads
+
+Throughput is reported in rows (or MB) per second. For the archive, peak
+Python heap while streaming is measured with tracemalloc; the archive body
+is consumed straight from the StreamingResponse because the ASGI test
+transport would buffer the whole response.
+
+Usage:
+    python benchmark_bulk.py --mongo-url mongodb://localhost:27017 --output bulk.json
+    python benchmark_bulk.py --mock --cases roster archive --archive-files 200 --file-size 1000000
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+BENCH_PASSWORD = 'BenchPass123!'
+MB = 1024 * 1024
+
+
+def rate(count: float, seconds: float) -> float:
+    return round(count / seconds, 2) if seconds else 0.0
+
+
+async def create_workspace(client, headers, name: str) -> dict:
+    response = await client.post('/api/workspaces', json={'name': name, 'description': 'benchmark'}, headers=headers)
+    response.raise_for_status()
+    return response.json()
+
+
+async def bench_roster(client, server, ctx, admin_headers, args) -> dict:
+    students = [(user_id, user) for user_id, user in ctx['users'].items() if user['role'] == 'student']
+    workspace = await create_workspace(client, admin_headers, 'Roster import')
+    body = 'email\n' + '\n'.join(user['email'] for _, user in students[:args.roster_rows]) + '\n'
+    start = time.perf_counter()
+    response = await client.post(
+        f"/api/workspaces/{workspace['id']}/members/import",
+        content=body.encode(), headers={**admin_headers, 'Content-Type': 'text/csv'}
+    )
+    bulk_seconds = time.perf_counter() - start
+    response.raise_for_status()
+
+    workspace = await create_workspace(client, admin_headers, 'One-by-one joins')
+    joins = students[:args.baseline_rows]
+    start = time.perf_counter()
+    for user_id, user in joins:
+        token = server.create_token(user_id, user['email'], user['role'], user['department'])
+        joined = await client.post(
+            '/api/workspaces/join', json={'invite_code': workspace['invite_code']},
+            headers={'Authorization': f'Bearer {token}'}
+        )
+        joined.raise_for_status()
+    baseline_seconds = time.perf_counter() - start
+
+    bulk_rate = rate(response.json()['imported_count'], bulk_seconds)
+    baseline_rate = rate(len(joins), baseline_seconds)
+    return {
+        'bulk': {'rows': args.roster_rows, 'imported': response.json()['imported_count'],
+                 'seconds': round(bulk_seconds, 3), 'rows_per_s': bulk_rate},
+        'baseline': {'rows': len(joins), 'seconds': round(baseline_seconds, 3), 'rows_per_s': baseline_rate},
+        'speedup': round(bulk_rate / baseline_rate, 1) if baseline_rate else None
+    }
+
+
+async def bench_provision(client, server, ctx, admin_headers, args) -> dict:
+    rows = [f'Provisioned {i},provisioned{i}@bench.example.edu,{BENCH_PASSWORD}' for i in range(args.provision_rows)]
+    body = 'name,email,password\n' + '\n'.join(rows) + '\n'
+    start = time.perf_counter()
+    response = await client.post(
+        '/api/auth/provision', content=body.encode(), headers={**admin_headers, 'Content-Type': 'text/csv'}
+    )
+    bulk_seconds = time.perf_counter() - start
+    response.raise_for_status()
+    created = response.json()['created_count']
+
+    start = time.perf_counter()
+    for i in range(args.baseline_rows):
+        signed_up = await client.post('/api/auth/signup', json={
+            'email': f'signup{i}@bench.example.edu', 'password': BENCH_PASSWORD,
+            'name': f'Signup {i}', 'role': 'student'
+        })
+        signed_up.raise_for_status()
+    baseline_seconds = time.perf_counter() - start
+
+    bulk_rate = rate(created, bulk_seconds)
+    baseline_rate = rate(args.baseline_rows, baseline_seconds)
+    return {
+        'bulk': {'rows': args.provision_rows, 'created': created,
+                 'seconds': round(bulk_seconds, 3), 'rows_per_s': bulk_rate},
+        'baseline': {'rows': args.baseline_rows, 'seconds': round(baseline_seconds, 3), 'rows_per_s': baseline_rate},
+        'speedup': round(bulk_rate / baseline_rate, 1) if baseline_rate else None,
+        'hash_workers': server.PASSWORD_HASH_WORKERS
+    }
+
+
+def write_upload(path: Path, size: int, block: bytes):
+    with open(path, 'wb') as f:
+        remaining = size
+        while remaining > 0:
+            f.write(block[:remaining])
+            remaining -= len(block)
+
+
+async def bench_archive(client, server, ctx, admin_headers, args) -> dict:
+    workspace = await create_workspace(client, admin_headers, 'Archive')
+    response = await client.post(f"/api/workspaces/{workspace['id']}/tasks", json={
+        'workspace_id': workspace['id'], 'title': 'Archive benchmark', 'description': 'benchmark',
+        'deadline': '2030-01-01T00:00:00+00:00', 'submission_type': 'file'
+    }, headers=admin_headers)
+    response.raise_for_status()
+    task = response.json()
+
+    block = os.urandom(MB)
+    now = datetime.now(timezone.utc).isoformat()
+    students = [(user_id, user) for user_id, user in ctx['users'].items() if user['role'] == 'student']
+    submissions = []
+    for index, (user_id, user) in enumerate(students[:args.archive_files]):
+        filename = f'{uuid.uuid4()}.bin'
+        write_upload(server.UPLOADS_DIR / filename, args.file_size, block)
+        submissions.append({
+            'id': str(uuid.uuid4()), 'task_id': task['id'], 'workspace_id': workspace['id'],
+            'student_id': user_id, 'student_name': f'Student {index}', 'submission_type': 'file',
+            'file_path': f'/uploads/{filename}', 'link': None, 'status': 'pending', 'submitted_at': now,
+            'reviewed_at': None, 'reviewed_by': None, 'review_comment': None
+        })
+    await server.db.submissions.insert_many(submissions)
+    total_mb = len(submissions) * args.file_size / MB
+
+    admin = await server.db.users.find_one({'id': ctx['admin_ids'][0]}, {'_id': 0})
+    tracemalloc.start()
+    start = time.perf_counter()
+    archive = await server.download_submissions_archive(task['id'], admin)
+    archive_bytes = 0
+    async for chunk in archive.body_iterator:
+        archive_bytes += len(chunk)
+    archive_seconds = time.perf_counter() - start
+    _, archive_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for submission in submissions:
+        downloaded = await client.get(submission['file_path'])
+        downloaded.raise_for_status()
+    baseline_seconds = time.perf_counter() - start
+
+    return {
+        'files': len(submissions),
+        'total_mb': round(total_mb, 1),
+        'bulk': {'seconds': round(archive_seconds, 3), 'mb_per_s': rate(total_mb, archive_seconds),
+                 'archive_mb': round(archive_bytes / MB, 1), 'peak_heap_mb': round(archive_peak / MB, 2)},
+        'baseline': {'requests': len(submissions), 'seconds': round(baseline_seconds, 3),
+                     'mb_per_s': rate(total_mb, baseline_seconds)}
+    }
+
+
+CASES = {
+    'roster': bench_roster,
+    'provision': bench_provision,
+    'archive': bench_archive,
+}
+
+
+async def main(args) -> int:
+    # Configure the app before importing it: a throwaway database and uploads dir, no auth throttling
+    db_name = args.db_name or f"bench_bulk_{int(time.time())}"
+    uploads_dir = args.uploads_dir or tempfile.mkdtemp(prefix='bench_uploads_')
+    os.environ['MONGO_URL'] = args.mongo_url
+    os.environ['DB_NAME'] = db_name
+    os.environ['UPLOADS_DIR'] = uploads_dir
+    os.environ['AUTH_RATE_LIMIT_IP_BURST'] = '1000000000'
+    os.environ['AUTH_RATE_LIMIT_EMAIL_BURST'] = '1000000000'
+    import httpx
+    import server
+    from seed_data import seed_database
+
+    if args.mock:
+        from mongomock_motor import AsyncMongoMockClient
+        server.connect_to_mongo(AsyncMongoMockClient())
+    else:
+        server.connect_to_mongo()
+    server.UPLOADS_DIR.mkdir(parents=True, exist_ok=True)
+
+    results = {}
+    try:
+        await server.ensure_indexes()
+        ctx = await seed_database(
+            server.db, server.hash_password(BENCH_PASSWORD),
+            students=max(args.roster_rows, args.baseline_rows, args.archive_files),
+            workspaces=1, members_per_workspace=1, tasks_per_workspace=1, updates_per_department=0
+        )
+        admin = ctx['users'][ctx['admin_ids'][0]]
+        admin_headers = {'Authorization': f"Bearer {server.create_token(ctx['admin_ids'][0], admin['email'], 'admin', admin['department'])}"}
+
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://bench', timeout=None) as client:
+            for name in args.cases:
+                results[name] = await CASES[name](client, server, ctx, admin_headers, args)
+                print(f"{name}: {json.dumps(results[name])}")
+    finally:
+        if not args.mock and not args.keep_data:
+            await server.client.drop_database(db_name)
+        if not args.uploads_dir:
+            shutil.rmtree(uploads_dir, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                'mongo': 'mongomock' if args.mock else args.mongo_url,
+                'cpus': os.cpu_count(),
+                'results': results
+            }, f, indent=2)
+    return 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mongo-url', default=os.environ.get('BENCH_MONGO_URL', 'mongodb://localhost:27017'))
+    parser.add_argument('--db-name', help='database to seed (default: a new bench_bulk_<timestamp> database)')
+    parser.add_argument('--mock', action='store_true', help='use mongomock-motor instead of a real mongod')
+    parser.add_argument('--keep-data', action='store_true', help='do not drop the seeded database afterwards')
+    parser.add_argument('--uploads-dir', help='where to write archive fixtures (default: a temporary directory)')
+    parser.add_argument('--cases', nargs='+', choices=list(CASES), default=list(CASES))
+    parser.add_argument('--roster-rows', type=int, default=10000)
+    parser.add_argument('--provision-rows', type=int, default=20000)
+    parser.add_argument('--baseline-rows', type=int, default=200, help='rows sent one at a time for comparison')
+    parser.add_argument('--archive-files', type=int, default=1000)
+    parser.add_argument('--file-size', type=int, default=4 * MB, help='bytes per archived file')
+    parser.add_argument('--output', help='write the results as JSON here')
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(parse_args())))
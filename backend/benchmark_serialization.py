@@ -0,0 +1,123 @@
+"""Micro-benchmark of list response serialization.
+
+Compares, for Submission and DepartmentUpdateWithInterest rows, the default
+FastAPI path (response_model validation, then json.dumps), the previous
+department updates path that also built a model per row by hand, and the
+FAST_JSON_RESPONSES path (list_response: orjson with validation skipped).
+No database is needed; rows are generated in memory.
+
+Usage:
+    python benchmark_serialization.py --rows 1000 10000 --repeat 5
+"""
+import argparse
+import asyncio
+import os
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import List
+
+os.environ['FAST_JSON_RESPONSES'] = 'true'
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from server import DepartmentUpdateWithInterest, Submission, list_response
+
+
+def submission_rows(count: int) -> List[dict]:
+    now = datetime.now(timezone.utc).isoformat()
+    return [{
+        'id': str(uuid.uuid4()),
+        'task_id': str(uuid.uuid4()),
+        'workspace_id': str(uuid.uuid4()),
+        'student_id': str(uuid.uuid4()),
+        'student_name': f'Student {i}',
+        'submission_type': 'link',
+        'file_path': None,
+        'link': f'https://example.edu/work/{i}',
+        'status': 'approved',
+        'submitted_at': now,
+        'reviewed_at': now,
+        'reviewed_by': str(uuid.uuid4()),
+        'review_comment': None
+    } for i in range(count)]
+
+
+def department_update_rows(count: int) -> List[dict]:
+    now = datetime.now(timezone.utc).isoformat()
+    interested = [str(uuid.uuid4()) for _ in range(25)]
+    return [{
+        'id': str(uuid.uuid4()),
+        'title': f'Workshop {i}',
+        'description': 'Synthetic department update',
+        'category': 'Workshop',
+        'department': 'Computer Science',
+        'attachments': [],
+        'visible_to_sections': ['A'],
+        'event_date': now,
+        'created_by': str(uuid.uuid4()),
+        'created_by_name': 'Department Admin',
+        'created_at': now,
+        'interested_users': interested,
+        'attending_users': interested[:10],
+        'is_interested': False,
+        'is_attending': False,
+        'interested_count': len(interested),
+        'attending_count': 10
+    } for i in range(count)]
+
+
+async def validated_response(field, model, rows) -> bytes:
+    content = await serialize_response(field=field, response_content=rows)
+    return JSONResponse(content).body
+
+
+async def constructed_response(field, model, rows) -> bytes:
+    return await validated_response(field, model, [model(**row) for row in rows])
+
+
+async def fast_response(field, model, rows) -> bytes:
+    return list_response(rows, model).body
+
+
+async def best_of(repeat: int, fn, *args) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await fn(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+async def main(row_counts: List[int], repeat: int):
+    cases = [
+        ('List[Submission]', Submission, submission_rows, [
+            ('response_model + json', validated_response),
+            ('orjson fast path', fast_response)
+        ]),
+        ('List[DepartmentUpdateWithInterest]', DepartmentUpdateWithInterest, department_update_rows, [
+            ('models per row + response_model', constructed_response),
+            ('response_model + json', validated_response),
+            ('orjson fast path', fast_response)
+        ])
+    ]
+    print(f"{'response':<38}{'path':<34}{'rows':>7}{'ms':>10}{'speedup':>9}")
+    for label, model, make_rows, paths in cases:
+        field = create_response_field(name='response', type_=List[model])
+        for count in row_counts:
+            rows = make_rows(count)
+            baseline = None
+            for path_name, fn in paths:
+                seconds = await best_of(repeat, fn, field, model, rows)
+                baseline = baseline or seconds
+                print(f"{label:<38}{path_name:<34}{count:>7}{seconds * 1000:>10.1f}{baseline / seconds:>8.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.repeat))
@@ -0,0 +1,162 @@
+"""Throughput scaling of the API across worker processes.
+
+For each worker count, starts the app under gunicorn (gunicorn.conf.py,
+uvicorn workers) against a throwaway database seeded by seed_data, drives a
+CPU-heavy endpoint (login by default, which spends most of its time in
+bcrypt) for a fixed duration and reports requests/s, latency percentiles
+and the speedup over a single worker.
+
+Usage:
+    python benchmark_workers.py --mongo-url mongodb://localhost:27017 --workers 1 2 4 8
+    python benchmark_workers.py --endpoint leaderboard --duration 20 --output scaling.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import signal
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from benchmark import percentile
+from password_policy import hash_password
+from seed_data import seed_database
+
+BACKEND_DIR = Path(__file__).parent
+BENCH_PASSWORD = 'BenchPass123!'
+
+
+def default_worker_counts() -> list:
+    counts = [1]
+    while counts[-1] * 2 <= (os.cpu_count() or 1):
+        counts.append(counts[-1] * 2)
+    return counts
+
+
+def start_server(workers: int, port: int, mongo_url: str, db_name: str) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        'MONGO_URL': mongo_url,
+        'DB_NAME': db_name,
+        'WEB_CONCURRENCY': str(workers),
+        'BIND': f'127.0.0.1:{port}',
+        'AUTH_RATE_LIMIT_IP_BURST': '1000000000',
+        'AUTH_RATE_LIMIT_EMAIL_BURST': '1000000000'
+    }
+    return subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'server:app'],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+
+async def wait_until_ready(client: httpx.AsyncClient, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get('/api/health/ready')).status_code == 200:
+                # Requests may land on any worker; give the others a moment to finish starting up
+                await asyncio.sleep(2)
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.5)
+    raise RuntimeError('Server did not become ready')
+
+
+async def drive(client: httpx.AsyncClient, endpoint: str, emails: list, token: str, duration: float, concurrency: int):
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def worker(worker_id):
+        nonlocal errors
+        rng = random.Random(worker_id)
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            if endpoint == 'login':
+                response = await client.post(
+                    '/api/auth/login', json={'email': rng.choice(emails), 'password': BENCH_PASSWORD}
+                )
+            else:
+                response = await client.get(f'/api/{endpoint}', headers={'Authorization': f'Bearer {token}'})
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    return sorted(latencies), errors, time.perf_counter() - started
+
+
+async def main(args) -> int:
+    db_name = f"bench_workers_{int(time.time())}"
+    mongo = AsyncIOMotorClient(args.mongo_url)
+    results = []
+    try:
+        ctx = await seed_database(
+            mongo[db_name], hash_password(BENCH_PASSWORD),
+            students=args.users, workspaces=2, members_per_workspace=min(args.users, 50), tasks_per_workspace=3
+        )
+        emails = [user['email'] for user in ctx['users'].values() if user['role'] == 'student']
+
+        for workers in args.workers:
+            server = start_server(workers, args.port, args.mongo_url, db_name)
+            try:
+                async with httpx.AsyncClient(base_url=f'http://127.0.0.1:{args.port}', timeout=60) as client:
+                    await wait_until_ready(client)
+                    login = await client.post('/api/auth/login', json={'email': emails[0], 'password': BENCH_PASSWORD})
+                    token = login.json()['token']
+                    await drive(client, args.endpoint, emails, token, args.warmup, args.concurrency)
+                    latencies, errors, elapsed = await drive(
+                        client, args.endpoint, emails, token, args.duration, args.concurrency
+                    )
+            finally:
+                server.send_signal(signal.SIGTERM)
+                server.wait(timeout=30)
+
+            results.append({
+                'workers': workers,
+                'requests': len(latencies),
+                'errors': errors,
+                'throughput_rps': round(len(latencies) / elapsed, 2),
+                'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+                'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+                'p99_ms': round(percentile(latencies, 99) * 1000, 2)
+            })
+    finally:
+        await mongo.drop_database(db_name)
+        mongo.close()
+
+    base = results[0]['throughput_rps'] or 1
+    print(f"endpoint: {args.endpoint}, concurrency: {args.concurrency}, cpus: {os.cpu_count()}")
+    print(f"{'workers':>8}{'rps':>10}{'speedup':>9}{'efficiency':>12}{'p50':>9}{'p95':>9}{'errors':>8}")
+    for result in results:
+        result['speedup'] = round(result['throughput_rps'] / base, 2)
+        efficiency = result['speedup'] / (result['workers'] / results[0]['workers'])
+        print(f"{result['workers']:>8}{result['throughput_rps']:>10.1f}{result['speedup']:>8.2f}x"
+              f"{efficiency:>11.0%}{result['p50_ms']:>9.1f}{result['p95_ms']:>9.1f}{result['errors']:>8}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'endpoint': args.endpoint, 'concurrency': args.concurrency, 'results': results}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mongo-url', default=os.environ.get('BENCH_MONGO_URL', 'mongodb://localhost:27017'))
+    parser.add_argument('--workers', type=int, nargs='+', default=default_worker_counts())
+    parser.add_argument('--endpoint', default='login', choices=['login', 'leaderboard', 'my-submissions', 'workspaces'])
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--duration', type=float, default=15)
+    parser.add_argument('--warmup', type=float, default=3)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--output', help='write the results as JSON here')
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,37 @@
+"""Find and remove documents that keep the unique indexes from being built.
+
+Databases written before the unique indexes existed can hold repeated joins,
+completions and submissions. Startup only logs indexes it could not build;
+this reports the duplicates and, with --apply, deletes all but one document
+per key (see UNIQUE_KEY_DEDUPE_RULES in server.py for which one is kept)
+and then builds the indexes. Duplicate user emails are only reported.
+
+Usage:
+    python dedupe_unique_keys.py            # dry run, report duplicates only
+    python dedupe_unique_keys.py --apply    # delete them and build the indexes
+"""
+import argparse
+import asyncio
+import json
+
+import server
+
+
+async def main(apply: bool, sample_size: int):
+    server.connect_to_mongo()
+    try:
+        report = await server.dedupe_unique_keys(dry_run=not apply, sample_size=sample_size)
+        if apply:
+            await server.ensure_indexes()
+            report['missing_unique_indexes'] = list(server.missing_unique_indexes)
+        print(json.dumps(report, indent=2, default=str))
+    finally:
+        server.client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--apply', action='store_true', help='delete duplicates instead of only reporting them')
+    parser.add_argument('--samples', type=int, default=20, help='number of duplicated keys to include per collection')
+    args = parser.parse_args()
+    asyncio.run(main(args.apply, args.samples))
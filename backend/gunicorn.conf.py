@@ -0,0 +1,20 @@
+"""Gunicorn settings for running the API with several uvicorn worker processes.
+
+    gunicorn -c gunicorn.conf.py server:app
+
+preload_app stays off: every worker imports server.py after the fork and so
+opens its own Motor client and connection pool (MONGO_* pool settings apply
+per worker). WEB_CONCURRENCY sets the worker count and is passed on to the
+workers, which use it to size per-host resources.
+"""
+import multiprocessing
+import os
+
+bind = os.environ.get('BIND', '0.0.0.0:8001')
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+worker_class = 'uvicorn.workers.UvicornWorker'
+preload_app = False
+raw_env = [f'WEB_CONCURRENCY={workers}']
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '60'))
+graceful_timeout = 30
+keepalive = 5
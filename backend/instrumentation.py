@@ -0,0 +1,377 @@
+"""Request timing and Mongo command instrumentation.
+
+MongoCommandListener is registered on the Motor client and attributes every
+command to the request being served through a context variable (Motor runs
+PyMongo calls in executor threads with the caller's context copied), so each
+request knows how many Mongo commands it issued and how long they took.
+
+Metrics are kept in process and rendered in the Prometheus text format.
+
+SlowQueryRecorder, when given a threshold, queues commands slower than it
+together with the originating route so the app can explain a sample of them
+and persist them off the driver's threads.
+
+EventLoopLagMonitor measures how late the event loop runs a timer and can
+log the stack of whatever is blocking the loop.
+"""
+import asyncio
+import contextvars
+import logging
+import random
+import sys
+import threading
+import time
+import traceback
+from bisect import bisect_left
+from collections import defaultdict, deque
+from datetime import datetime, timezone
+
+from pymongo import monitoring
+
+LATENCY_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+COMMAND_COUNT_BUCKETS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000]
+LAG_BUCKETS = [0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5]
+
+
+class RequestStats:
+    """Mongo activity attributed to a single request
+
+    Commands finish on Motor's executor threads, and a request can run several
+    of them concurrently, so the counters are only updated under the lock.
+    """
+    __slots__ = ('method', 'scope', 'mongo_commands', 'mongo_seconds', '_lock')
+
+    def __init__(self, method: str = None, scope: dict = None):
+        self.method = method
+        self.scope = scope
+        self.mongo_commands = 0
+        self.mongo_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def record_command(self, seconds: float):
+        with self._lock:
+            self.mongo_commands += 1
+            self.mongo_seconds += seconds
+
+    @property
+    def route(self) -> str:
+        """Route template of the request (the router fills it into the shared ASGI scope)"""
+        route = self.scope.get('route') if self.scope else None
+        return route.path if route else 'unmatched'
+
+
+current_request_stats = contextvars.ContextVar('current_request_stats', default=None)
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, label_names: tuple, buckets: list):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels: tuple, value: float):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = {'buckets': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            idx = bisect_left(self.buckets, value)
+            if idx < len(self.buckets):
+                series['buckets'][idx] += 1
+            series['sum'] += value
+            series['count'] += 1
+
+    def render(self) -> list:
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            for labels, series in sorted(self._series.items()):
+                label_text = format_labels(self.label_names, labels)
+                bucket_prefix = f'{label_text},' if label_text else ''
+                cumulative = 0
+                for bound, count in zip(self.buckets, series['buckets']):
+                    cumulative += count
+                    lines.append(f'{self.name}_bucket{{{bucket_prefix}le="{bound}"}} {cumulative}')
+                lines.append(f'{self.name}_bucket{{{bucket_prefix}le="+Inf"}} {series["count"]}')
+                lines.append(f'{self.name}_sum{{{label_text}}} {series["sum"]}')
+                lines.append(f'{self.name}_count{{{label_text}}} {series["count"]}')
+        return lines
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, label_names: tuple):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self._values = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def inc(self, labels: tuple, amount: float = 1):
+        with self._lock:
+            self._values[labels] += amount
+
+    def render(self) -> list:
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} counter']
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f'{self.name}{{{format_labels(self.label_names, labels)}}} {value}')
+        return lines
+
+
+class Gauge:
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self.value = 0.0
+
+    def set(self, value: float):
+        self.value = value
+
+    def render(self) -> list:
+        return [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} gauge', f'{self.name} {self.value}']
+
+
+def format_labels(names: tuple, values: tuple) -> str:
+    def escape(value):
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return ','.join(f'{name}="{escape(value)}"' for name, value in zip(names, values))
+
+
+request_latency = Histogram(
+    'http_request_duration_seconds', 'HTTP request latency by route',
+    ('method', 'route', 'status'), LATENCY_BUCKETS
+)
+request_mongo_commands = Histogram(
+    'http_request_mongo_commands', 'Mongo commands issued per HTTP request by route',
+    ('method', 'route'), COMMAND_COUNT_BUCKETS
+)
+mongo_commands_total = Counter('mongo_commands_total', 'Mongo commands by command name and outcome', ('command', 'outcome'))
+mongo_command_seconds_total = Counter('mongo_command_seconds_total', 'Time spent in Mongo commands by command name', ('command',))
+mongo_slow_commands_total = Counter(
+    'mongo_slow_commands_total', 'Mongo commands over the slow query threshold by command and collection',
+    ('command', 'collection')
+)
+conditional_requests = Counter(
+    'http_conditional_requests_total',
+    'GETs on ETag-enabled routes by outcome (hit = 304, miss = stale If-None-Match, unconditional = none sent)',
+    ('route', 'result')
+)
+
+event_loop_lag = Histogram(
+    'event_loop_lag_seconds', 'How late the event loop ran a scheduled timer', (), LAG_BUCKETS
+)
+event_loop_lag_last = Gauge('event_loop_lag_last_seconds', 'Most recent event loop lag measurement')
+cold_start_seconds = Gauge('app_cold_start_seconds', 'Seconds from the start of module import until the app was ready')
+missing_unique_indexes_gauge = Gauge(
+    'app_missing_unique_indexes', 'Unique indexes that could not be built at startup (see dedupe_unique_keys.py)'
+)
+
+METRICS = [
+    request_latency, request_mongo_commands, mongo_commands_total, mongo_command_seconds_total,
+    mongo_slow_commands_total, conditional_requests, event_loop_lag, event_loop_lag_last, cold_start_seconds,
+    missing_unique_indexes_gauge
+]
+
+
+def render_prometheus() -> str:
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+# Commands explain accepts, and the driver-added fields it rejects
+EXPLAINABLE_COMMANDS = {'find', 'aggregate', 'count', 'distinct', 'findAndModify', 'update', 'delete'}
+DRIVER_FIELDS = {'lsid', 'txnNumber', 'readConcern', 'writeConcern', 'autocommit', 'startTransaction'}
+# Fields whose values can carry user data; only their structure is logged
+VALUE_FIELDS = {'filter', 'query', 'q', 'u', 'update', 'pipeline', 'updates', 'deletes'}
+
+
+def redact_values(value):
+    """Keep field names and operators, replace literal values with '?'"""
+    if isinstance(value, dict):
+        return {key: redact_values(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        if all(not isinstance(item, (dict, list, tuple)) for item in value):
+            return '?'
+        return [redact_values(item) for item in value]
+    return '?'
+
+
+def command_shape(command: dict) -> dict:
+    """Loggable form of a command: no documents, driver fields or literal filter values"""
+    shape = {}
+    for key, value in command.items():
+        if key.startswith('$') or key in DRIVER_FIELDS or key == 'documents':
+            continue
+        shape[key] = redact_values(value) if key in VALUE_FIELDS else value
+    return shape
+
+
+def explainable_command(command: dict) -> dict:
+    """Copy of command that can be wrapped in an explain"""
+    return {
+        key: value for key, value in command.items()
+        if not key.startswith('$') and key not in DRIVER_FIELDS
+    }
+
+
+def winning_plan_stages(explain) -> list:
+    """Every stage name under the winning plan(s) of an explain result"""
+    stages = []
+
+    def walk(node, in_winning_plan):
+        if isinstance(node, dict):
+            if in_winning_plan and 'stage' in node:
+                stages.append(node['stage'])
+            for key, value in node.items():
+                if key != 'rejectedPlans':
+                    walk(value, in_winning_plan or key == 'winningPlan')
+        elif isinstance(node, list):
+            for item in node:
+                walk(item, in_winning_plan)
+
+    walk(explain, False)
+    return stages
+
+
+class SlowQueryRecorder:
+    """Queue Mongo commands slower than threshold_ms for the app to explain and store
+
+    Listener callbacks run on PyMongo's threads and must not do I/O, so they
+    only queue entries here; drain() is called from the event loop. A
+    threshold of 0 disables recording.
+    """
+
+    def __init__(self, threshold_ms: float = 0, explain_sample_rate: float = 0.0,
+                 ignored_collections: set = frozenset(), max_pending: int = 1000):
+        self.threshold_seconds = threshold_ms / 1000
+        self.explain_sample_rate = explain_sample_rate
+        self.ignored_collections = set(ignored_collections)
+        self._started = {}
+        self._pending = deque(maxlen=max_pending)
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold_seconds > 0
+
+    def started(self, event):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._started[(event.connection_id, event.request_id)] = (dict(event.command), event.database_name)
+
+    def finished(self, event, outcome: str):
+        if not self.enabled:
+            return
+        with self._lock:
+            started = self._started.pop((event.connection_id, event.request_id), None)
+        if started is None or event.duration_micros / 1e6 < self.threshold_seconds:
+            return
+        command, database = started
+        collection = command.get(event.command_name)
+        if not isinstance(collection, str):
+            collection = command.get('collection')
+        if collection in self.ignored_collections or event.command_name == 'explain':
+            return
+
+        mongo_slow_commands_total.inc((event.command_name, collection or ''))
+        stats = current_request_stats.get()
+        explain = (
+            event.command_name in EXPLAINABLE_COMMANDS and outcome == 'success'
+            and random.random() < self.explain_sample_rate
+        )
+        self._pending.append({
+            'recorded_at': datetime.now(timezone.utc).isoformat(),
+            'database': database,
+            'collection': collection,
+            'command_name': event.command_name,
+            'duration_ms': round(event.duration_micros / 1000, 2),
+            'outcome': outcome,
+            'method': stats.method if stats else None,
+            'route': stats.route if stats else 'background',
+            'command': command_shape(command),
+            # Unredacted copy, used only to run explain and never stored
+            'explain_command': explainable_command(command) if explain else None
+        })
+
+    def drain(self) -> list:
+        entries = []
+        while self._pending:
+            entries.append(self._pending.popleft())
+        return entries
+
+
+class MongoCommandListener(monitoring.CommandListener):
+    def __init__(self, slow_query_recorder: SlowQueryRecorder = None):
+        self.slow_query_recorder = slow_query_recorder
+
+    def started(self, event):
+        if self.slow_query_recorder is not None:
+            self.slow_query_recorder.started(event)
+
+    def _finished(self, event, outcome: str):
+        seconds = event.duration_micros / 1e6
+        mongo_commands_total.inc((event.command_name, outcome))
+        mongo_command_seconds_total.inc((event.command_name,), seconds)
+        stats = current_request_stats.get()
+        if stats is not None:
+            stats.record_command(seconds)
+        if self.slow_query_recorder is not None:
+            self.slow_query_recorder.finished(event, outcome)
+
+    def succeeded(self, event):
+        self._finished(event, 'success')
+
+    def failed(self, event):
+        self._finished(event, 'failure')
+
+
+class EventLoopLagMonitor:
+    """Measure event loop delay and optionally report what blocks the loop
+
+    run() sleeps for interval in a loop and records how late each wakeup is.
+    With a block_threshold, a watchdog thread also watches the heartbeat
+    run() leaves before each sleep; when the loop is overdue by more than the
+    threshold it logs the loop thread's current stack, i.e. the callback that
+    is blocking it, captured while it still is.
+    """
+
+    def __init__(self, interval: float = 0.5, block_threshold: float = None):
+        self.interval = interval
+        self.block_threshold = block_threshold
+        self._heartbeat = time.monotonic()
+        self._loop_thread_id = None
+        self._stop = threading.Event()
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        if self.block_threshold:
+            threading.Thread(target=self._watch, name='event-loop-watchdog', daemon=True).start()
+        try:
+            while True:
+                self._heartbeat = time.monotonic()
+                start = loop.time()
+                await asyncio.sleep(self.interval)
+                lag = max(0.0, loop.time() - start - self.interval)
+                event_loop_lag.observe((), lag)
+                event_loop_lag_last.set(lag)
+        finally:
+            self._stop.set()
+
+    def _watch(self):
+        reported_heartbeat = None
+        while not self._stop.wait(self.block_threshold / 2):
+            heartbeat = self._heartbeat
+            overdue = time.monotonic() - heartbeat - self.interval
+            if overdue < self.block_threshold or heartbeat == reported_heartbeat:
+                continue
+            # Report each stall once
+            reported_heartbeat = heartbeat
+            frame = sys._current_frames().get(self._loop_thread_id)
+            stack = ''.join(traceback.format_stack(frame)) if frame is not None else ''
+            del frame
+            logging.warning(f"Event loop blocked for over {overdue * 1000:.0f}ms, loop thread stack:\n{stack}")
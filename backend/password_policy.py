@@ -0,0 +1,83 @@
+"""Password hashing policy.
+
+The bcrypt work factor comes from the BCRYPT_ROUNDS environment variable so
+it can be tuned per deployment. Hashes made with a different cost keep
+verifying, and needs_rehash tells callers when to upgrade them.
+
+Run this module directly to measure per-hash latency at each cost on the
+current machine:
+
+    python password_policy.py --min-rounds 10 --max-rounds 14
+"""
+import argparse
+import os
+import statistics
+import time
+
+import bcrypt
+
+DEFAULT_BCRYPT_ROUNDS = 12
+MIN_BCRYPT_ROUNDS = 4
+MAX_BCRYPT_ROUNDS = 31
+
+
+def bcrypt_rounds() -> int:
+    """Work factor new hashes are created with"""
+    rounds = int(os.environ.get('BCRYPT_ROUNDS', DEFAULT_BCRYPT_ROUNDS))
+    return min(max(rounds, MIN_BCRYPT_ROUNDS), MAX_BCRYPT_ROUNDS)
+
+
+def hash_password(password: str, rounds: int = None) -> str:
+    salt = bcrypt.gensalt(rounds=rounds or bcrypt_rounds())
+    return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
+
+
+def verify_password(password: str, hashed: str) -> bool:
+    return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+
+
+def hash_rounds(hashed: str) -> int:
+    """Work factor a stored hash was created with ('$2b$12$...' -> 12)"""
+    return int(hashed.split('$')[2])
+
+
+def needs_rehash(hashed: str) -> bool:
+    """Whether a stored hash's cost differs from the current policy"""
+    try:
+        return hash_rounds(hashed) != bcrypt_rounds()
+    except (IndexError, ValueError):
+        return True
+
+
+def measure_hash_latency(rounds: int, samples: int) -> dict:
+    """Time hash_password at a given cost, returning latency stats in milliseconds"""
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        hash_password('correct horse battery staple', rounds=rounds)
+        timings.append((time.perf_counter() - start) * 1000)
+    return {
+        'rounds': rounds,
+        'median_ms': statistics.median(timings),
+        'min_ms': min(timings),
+        'max_ms': max(timings)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure bcrypt hash latency per work factor on this machine')
+    parser.add_argument('--min-rounds', type=int, default=10)
+    parser.add_argument('--max-rounds', type=int, default=14)
+    parser.add_argument('--samples', type=int, default=5)
+    args = parser.parse_args()
+
+    policy_rounds = bcrypt_rounds()
+    print(f"{'rounds':>6} {'median ms':>10} {'min ms':>8} {'max ms':>8}")
+    for rounds in range(args.min_rounds, args.max_rounds + 1):
+        result = measure_hash_latency(rounds, args.samples)
+        marker = '  <- current policy' if rounds == policy_rounds else ''
+        print(f"{rounds:>6} {result['median_ms']:>10.1f} {result['min_ms']:>8.1f} {result['max_ms']:>8.1f}{marker}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Stack-sampling profiler for the running API process.
+
+A StackSampler thread snapshots one thread's Python stack (the event loop's)
+every interval using sys._current_frames() and counts identical stacks.
+Sampling wall time this way suits asyncio: time the loop spends waiting
+shows up under the selector frame, and CPU-heavy callbacks such as bcrypt
+or rank recalculation show up under the coroutine that ran them. It needs no
+extra dependency and can be attached to a live process.
+
+Results are rendered in the collapsed-stack format ("frame;frame;frame N"
+per line) read by flamegraph.pl, inferno and speedscope.
+"""
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+
+def frame_label(frame) -> str:
+    code = frame.f_code
+    # ';' separates frames in the collapsed format (the count follows the last space)
+    name = getattr(code, 'co_qualname', code.co_name).replace(';', ':')
+    return f"{name} ({Path(code.co_filename).name}:{code.co_firstlineno})"
+
+
+def collapse_stack(frame) -> str:
+    labels = []
+    while frame is not None:
+        labels.append(frame_label(frame))
+        frame = frame.f_back
+    return ';'.join(reversed(labels))
+
+
+class StackSampler:
+    """Sample the stack of thread_id every interval seconds until stopped"""
+
+    def __init__(self, thread_id: int, interval: float = 0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = Counter()
+        self.sample_count = 0
+        self.started_at = None
+        self.duration = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+
+    def start(self) -> 'StackSampler':
+        self.started_at = time.perf_counter()
+        self._thread.start()
+        return self
+
+    def stop(self) -> 'StackSampler':
+        self._stop.set()
+        self._thread.join()
+        self.duration = time.perf_counter() - self.started_at
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.samples[collapse_stack(frame)] += 1
+                self.sample_count += 1
+            del frame
+
+    def collapsed(self) -> str:
+        """Samples in collapsed-stack format, heaviest stacks first"""
+        return ''.join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
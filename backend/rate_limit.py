@@ -0,0 +1,77 @@
+"""Token-bucket rate limiting.
+
+Two interchangeable backends share the same interface:
+
+* InMemoryRateLimiter keeps buckets in the process; cheap, but each worker
+  or replica enforces its own limit.
+* MongoRateLimiter keeps buckets in a collection and updates them with a
+  single atomic find_one_and_update, so every replica shares one limit.
+
+consume(key) takes one token from the bucket for key and returns None when
+the request is allowed, or the number of seconds until a token is available.
+"""
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from pymongo import ReturnDocument
+
+
+class InMemoryRateLimiter:
+    def __init__(self, capacity: float, refill_per_second: float, max_keys: int = 100000):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+
+    async def consume(self, key: str) -> Optional[float]:
+        now = time.monotonic()
+        tokens, updated_at = self._buckets.pop(key, (self.capacity, now))
+        tokens = min(self.capacity, tokens + (now - updated_at) * self.refill_per_second)
+
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        self._buckets[key] = (tokens, now)
+
+        # Least recently used buckets are dropped first; a dropped bucket is simply full again
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+
+        return None if allowed else (1 - tokens) / self.refill_per_second
+
+
+class MongoRateLimiter:
+    def __init__(self, collection, capacity: float, refill_per_second: float):
+        self.collection = collection
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+
+    async def ensure_indexes(self):
+        # Idle buckets expire once they would have refilled completely
+        await self.collection.create_index('expires_at', expireAfterSeconds=0)
+
+    async def consume(self, key: str) -> Optional[float]:
+        now = time.time()
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=self.capacity / self.refill_per_second)
+        refilled = {'$min': [
+            self.capacity,
+            {'$add': [
+                {'$ifNull': ['$tokens', self.capacity]},
+                {'$multiply': [{'$subtract': [now, {'$ifNull': ['$updated_at', now]}]}, self.refill_per_second]}
+            ]}
+        ]}
+        bucket = await self.collection.find_one_and_update(
+            {'_id': key},
+            [
+                {'$set': {'tokens': refilled, 'updated_at': now, 'expires_at': expires_at}},
+                {'$set': {
+                    'allowed': {'$gte': ['$tokens', 1]},
+                    'tokens': {'$cond': [{'$gte': ['$tokens', 1]}, {'$subtract': ['$tokens', 1]}, '$tokens']}
+                }}
+            ],
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        return None if bucket['allowed'] else (1 - bucket['tokens']) / self.refill_per_second
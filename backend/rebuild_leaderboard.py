@@ -0,0 +1,30 @@
+"""Recompute every leaderboard entry from submissions, task deadlines and event attendance.
+
+Usage:
+    python rebuild_leaderboard.py            # dry run, report differences only
+    python rebuild_leaderboard.py --apply    # write the rebuilt counters
+"""
+import argparse
+import asyncio
+import json
+
+import server
+
+
+async def main(apply: bool, sample_size: int):
+    server.connect_to_mongo()
+    try:
+        # $merge into the leaderboards needs their unique (user_id, semester) indexes, even on a fresh database
+        await server.ensure_indexes()
+        report = await server.rebuild_leaderboard(dry_run=not apply, sample_size=sample_size)
+        print(json.dumps(report, indent=2))
+    finally:
+        server.client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--apply', action='store_true', help='write rebuilt counters instead of only reporting diffs')
+    parser.add_argument('--samples', type=int, default=20, help='number of differing entries to include in the report')
+    args = parser.parse_args()
+    asyncio.run(main(args.apply, args.samples))
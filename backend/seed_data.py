@@ -0,0 +1,404 @@
+"""Synthetic data for benchmarks, tests and scale testing.
+
+seed_database fills a database with users, workspaces with members,
+workspace tasks with deadlines, submissions, department updates with
+interest lists, event attendance and leaderboard entries, and returns the
+ids a workload driver needs to address the seeded data. Distributions are
+skewed the way real usage is: department sizes differ, some students are
+consistently diligent and others are not, most work is handed in shortly
+before the deadline and older submissions are mostly reviewed.
+
+Documents are inserted with unordered insert_many batches, several in
+flight at a time, and large collections are generated as they are written
+so a million documents load in minutes without holding them all in memory.
+
+Usage:
+    python seed_data.py --db-name scale_test --students 100000 --workspaces 200 \\
+        --members-per-workspace 300 --tasks-per-workspace 15 --drop
+"""
+import argparse
+import asyncio
+import os
+import random
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+from pathlib import Path
+
+from server import POINTS_CONFIG, semester_of
+
+DEPARTMENT_NAMES = [
+    'Computer Science', 'MCA', 'Electronics', 'Mechanical', 'Civil',
+    'Electrical', 'Information Technology', 'Chemical', 'Biotechnology', 'Mathematics'
+]
+SECTIONS = ['A', 'B', 'C', 'D']
+UPDATE_CATEGORIES = ['Workshop', 'Sports', 'Club', 'Announcement', 'General']
+UPDATE_CATEGORY_WEIGHTS = [3, 2, 2, 4, 3]
+EVENT_CATEGORIES = {'Workshop', 'Sports', 'Club'}
+
+# Beta(4, 1.5) gives most students a high chance to submit and a long tail of stragglers
+DILIGENCE_ALPHA = 4.0
+DILIGENCE_BETA = 1.5
+DILIGENCE_MEAN = DILIGENCE_ALPHA / (DILIGENCE_ALPHA + DILIGENCE_BETA)
+
+
+def iter_batches(docs, batch_size: int):
+    docs = iter(docs)
+    while True:
+        batch = list(islice(docs, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+async def insert_in_batches(collection, docs, batch_size: int, concurrency: int = 4) -> int:
+    """insert_many docs (any iterable) in unordered batches, keeping up to concurrency batches in flight"""
+    semaphore = asyncio.Semaphore(concurrency)
+    inserts = []
+    inserted = 0
+
+    async def insert(batch):
+        try:
+            await collection.insert_many(batch, ordered=False)
+        finally:
+            semaphore.release()
+
+    for batch in iter_batches(docs, batch_size):
+        # Acquire before generating the next batch so lazy generators stay ahead by at most concurrency batches
+        await semaphore.acquire()
+        inserts.append(asyncio.create_task(insert(batch)))
+        inserted += len(batch)
+    await asyncio.gather(*inserts)
+    return inserted
+
+
+async def seed_database(
+    db,
+    password_hash: str,
+    departments: int = 5,
+    students: int = 50000,
+    workspaces: int = 50,
+    members_per_workspace: int = 200,
+    tasks_per_workspace: int = 10,
+    submission_rate: float = 0.7,
+    updates_per_department: int = 20,
+    batch_size: int = 5000,
+    insert_concurrency: int = 4,
+    seed: int = 42
+) -> dict:
+    """Populate db with synthetic data; every user shares password_hash"""
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    now_iso = now.isoformat()
+    department_names = DEPARTMENT_NAMES[:departments]
+    # Larger departments first, roughly halving down the list
+    department_weights = [1 / (1 + i * 0.5) for i in range(len(department_names))]
+
+    def new_id():
+        return str(uuid.UUID(int=rng.getrandbits(128)))
+
+    def make_user(role, index, department, section=None):
+        return {
+            'id': new_id(),
+            'email': f'{role}{index}@bench.example.edu',
+            'name': f'{role.replace("_", " ").title()} {index}',
+            'role': role,
+            'department': department,
+            'section': section,
+            'password': password_hash,
+            'created_at': (now - timedelta(days=rng.randint(0, 365))).isoformat()
+        }
+
+    student_docs = [
+        make_user('student', i, rng.choices(department_names, department_weights)[0], rng.choice(SECTIONS))
+        for i in range(students)
+    ]
+    admin_docs = [make_user('admin', i, rng.choice(department_names)) for i in range(max(1, workspaces // 10))]
+    department_admin_docs = [make_user('department_admin', i, name) for i, name in enumerate(department_names)]
+    students_by_department = defaultdict(list)
+    for student in student_docs:
+        students_by_department[student['department']].append(student)
+    diligence = {
+        student['id']: rng.betavariate(DILIGENCE_ALPHA, DILIGENCE_BETA) for student in student_docs
+    }
+
+    workspace_docs = []
+    member_docs = []
+    task_docs = []
+    workspace_refs = []
+    for w in range(workspaces):
+        admin = admin_docs[w % len(admin_docs)]
+        workspace_id = new_id()
+        workspace_docs.append({
+            'id': workspace_id,
+            'name': f'Workspace {w}',
+            'description': f'Synthetic workspace {w}',
+            'subject': f'Subject {w % 12}',
+            'invite_code': f'B{w:07d}',
+            'invite_expires_at': None,
+            'invite_max_uses': None,
+            'invite_uses': 0,
+            'created_by': admin['id'],
+            'created_at': (now - timedelta(days=120)).isoformat()
+        })
+
+        # Class sizes vary around the mean; most members come from the admin's department
+        size = min(len(student_docs), max(1, round(rng.gauss(members_per_workspace, members_per_workspace / 4))))
+        home = students_by_department.get(admin['department'], [])
+        members = rng.sample(home, min(len(home), round(size * 0.8)))
+        chosen = {student['id'] for student in members}
+        while len(members) < size:
+            student = rng.choice(student_docs)
+            if student['id'] not in chosen:
+                chosen.add(student['id'])
+                members.append(student)
+        for student in members:
+            member_docs.append({
+                'workspace_id': workspace_id,
+                'student_id': student['id'],
+                'student_name': student['name'],
+                'joined_at': (now - timedelta(days=rng.randint(60, 120))).isoformat()
+            })
+
+        task_ids = []
+        for t in range(tasks_per_workspace):
+            task_id = new_id()
+            task_ids.append(task_id)
+            # Spread deadlines from well in the past to a few weeks ahead
+            deadline = now + timedelta(days=rng.randint(-90, 30), hours=rng.randint(0, 23))
+            task_docs.append({
+                'id': task_id,
+                'workspace_id': workspace_id,
+                'title': f'Task {t} of workspace {w}',
+                'description': 'Synthetic task',
+                'deadline': deadline.isoformat(),
+                'submission_type': 'any',
+                'created_by': admin['id'],
+                'created_at': (deadline - timedelta(days=14)).isoformat(),
+                # Missed tasks are already counted in the seeded leaderboard
+                'missed_swept_at': now_iso if deadline <= now else None
+            })
+
+        workspace_refs.append({
+            'id': workspace_id,
+            'admin_id': admin['id'],
+            'task_ids': task_ids,
+            'member_ids': [student['id'] for student in members]
+        })
+
+    async def insert(collection, docs):
+        return await insert_in_batches(collection, docs, batch_size, insert_concurrency)
+
+    counts = {}
+    (counts['users'], counts['workspaces'], counts['workspace_members'], counts['workspace_tasks']) = await asyncio.gather(
+        insert(db.users, student_docs + admin_docs + department_admin_docs),
+        insert(db.workspaces, workspace_docs),
+        insert(db.workspace_members, member_docs),
+        insert(db.workspace_tasks, task_docs)
+    )
+
+    # (user_id, semester) -> counters, mirroring leaderboard_source_pipeline
+    tallies = defaultdict(lambda: {'tasks_on_time': 0, 'tasks_late': 0, 'tasks_missed': 0, 'events_attended': 0})
+    members_by_workspace = {ref['id']: ref['member_ids'] for ref in workspace_refs}
+    names = {doc['id']: doc['name'] for doc in student_docs}
+    admins_by_workspace = {ref['id']: ref['admin_id'] for ref in workspace_refs}
+
+    def generate_submissions():
+        for task in task_docs:
+            deadline = datetime.fromisoformat(task['deadline'])
+            expired = deadline <= now
+            for student_id in members_by_workspace[task['workspace_id']]:
+                submitted_at = None
+                if rng.random() < min(1.0, diligence[student_id] * submission_rate / DILIGENCE_MEAN):
+                    if rng.random() < 0.05 + 0.35 * (1 - diligence[student_id]):
+                        submitted_at = deadline + timedelta(hours=min(rng.expovariate(1 / 36), 240))
+                    else:
+                        submitted_at = deadline - timedelta(hours=min(rng.expovariate(1 / 48), 14 * 24))
+                    if submitted_at > now:
+                        submitted_at = None
+
+                if submitted_at is None:
+                    if expired:
+                        tallies[(student_id, semester_of(task['deadline']))]['tasks_missed'] += 1
+                    continue
+
+                on_time = submitted_at <= deadline
+                tally = tallies[(student_id, semester_of(submitted_at.isoformat()))]
+                tally['tasks_on_time' if on_time else 'tasks_late'] += 1
+
+                # Older work has mostly been reviewed; late work is rejected more often
+                age = now - submitted_at
+                status = 'pending'
+                reviewed_at = None
+                if rng.random() < (0.9 if age > timedelta(days=7) else 0.3):
+                    status = 'approved' if rng.random() < (0.88 if on_time else 0.7) else 'rejected'
+                    reviewed_at = min(now, submitted_at + timedelta(hours=rng.expovariate(1 / 48)))
+                yield {
+                    'id': new_id(),
+                    'task_id': task['id'],
+                    'workspace_id': task['workspace_id'],
+                    'student_id': student_id,
+                    'student_name': names[student_id],
+                    'submission_type': 'link',
+                    'file_path': None,
+                    'link': f'https://example.edu/work/{task["id"]}/{student_id}',
+                    'status': status,
+                    'submitted_at': submitted_at.isoformat(),
+                    'reviewed_at': reviewed_at.isoformat() if reviewed_at else None,
+                    'reviewed_by': admins_by_workspace[task['workspace_id']] if reviewed_at else None,
+                    'review_comment': 'Please revise and resubmit' if status == 'rejected' else None
+                }
+
+    counts['submissions'] = await insert(db.submissions, generate_submissions())
+
+    update_docs = []
+    attendance_docs = []
+    for department_admin in department_admin_docs:
+        department = department_admin['department']
+        audience = [student['id'] for student in students_by_department.get(department, [])]
+        for u in range(updates_per_department):
+            category = rng.choices(UPDATE_CATEGORIES, UPDATE_CATEGORY_WEIGHTS)[0]
+            created_at = now - timedelta(days=rng.randint(0, 150), hours=rng.randint(0, 23))
+            event_date = None
+            if category in EVENT_CATEGORIES:
+                event_date = (created_at + timedelta(days=rng.randint(3, 30))).isoformat()
+            # A few updates draw most of the department, most draw a handful
+            interested = rng.sample(audience, min(len(audience), int(len(audience) * min(1.0, 0.02 * rng.paretovariate(1.5)))))
+            attending = [user_id for user_id in interested if event_date and rng.random() < 0.5]
+            update_id = new_id()
+            update_docs.append({
+                'id': update_id,
+                'title': f'{category} {u} for {department}',
+                'description': 'Synthetic department update',
+                'category': category,
+                'department': department,
+                'attachments': [],
+                'visible_to_sections': sorted(rng.sample(SECTIONS, rng.randint(1, 2))) if rng.random() < 0.2 else [],
+                'event_date': event_date,
+                'created_by': department_admin['id'],
+                'created_by_name': department_admin['name'],
+                'created_at': created_at.isoformat(),
+                'interested_users': interested,
+                'attending_users': attending
+            })
+            if event_date and event_date <= now_iso:
+                for user_id in attending:
+                    if rng.random() < 0.8:
+                        attendance_docs.append({
+                            'update_id': update_id,
+                            'student_id': user_id,
+                            'semester': semester_of(event_date),
+                            'marked_by': department_admin['id'],
+                            'marked_at': event_date
+                        })
+                        tallies[(user_id, semester_of(event_date))]['events_attended'] += 1
+
+    counts['department_updates'], counts['event_attendance'] = await asyncio.gather(
+        insert(db.department_updates, update_docs),
+        insert(db.event_attendance, attendance_docs)
+    )
+
+    students_by_id = {student['id']: student for student in student_docs}
+    leaderboard_docs = []
+    for (user_id, semester), tally in tallies.items():
+        student = students_by_id[user_id]
+        completed = tally['tasks_on_time'] + tally['tasks_late']
+        attempted = completed + tally['tasks_missed']
+        leaderboard_docs.append({
+            'id': new_id(),
+            'user_id': user_id,
+            'user_name': student['name'],
+            'department': student['department'],
+            'section': student['section'],
+            'semester': semester,
+            'total_points': sum(tally[field] * POINTS_CONFIG[activity] for field, activity in (
+                ('tasks_on_time', 'task_on_time'),
+                ('tasks_late', 'task_late'),
+                ('tasks_missed', 'task_missed'),
+                ('events_attended', 'event_participation')
+            )),
+            'tasks_completed': completed,
+            **tally,
+            'task_completion_rate': round(completed / attempted * 100, 2) if attempted else 0.0,
+            'rank': 0,
+            'rank_change': 0,
+            'last_updated': now_iso,
+            'point_history': []
+        })
+    leaderboard_docs.sort(key=lambda entry: (entry['semester'], entry['department'], -entry['total_points']))
+    rank_group = None
+    for entry in leaderboard_docs:
+        if (entry['semester'], entry['department']) != rank_group:
+            rank_group = (entry['semester'], entry['department'])
+            rank = 0
+        rank += 1
+        entry['rank'] = rank
+    counts['leaderboard'] = await insert(db.leaderboard, leaderboard_docs)
+
+    return {
+        'counts': counts,
+        'users': {
+            doc['id']: {key: doc[key] for key in ('email', 'role', 'department')}
+            for doc in admin_docs + department_admin_docs + student_docs
+        },
+        'admin_ids': [doc['id'] for doc in admin_docs],
+        'department_admin_ids': [doc['id'] for doc in department_admin_docs],
+        'workspaces': workspace_refs
+    }
+
+
+async def main(args):
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    from password_policy import hash_password
+
+    load_dotenv(Path(__file__).parent / '.env')
+    client = AsyncIOMotorClient(args.mongo_url or os.environ['MONGO_URL'])
+    db = client[args.db_name or os.environ['DB_NAME']]
+    try:
+        if args.drop:
+            await client.drop_database(db.name)
+        start = time.perf_counter()
+        result = await seed_database(
+            db,
+            hash_password(args.password),
+            departments=args.departments,
+            students=args.students,
+            workspaces=args.workspaces,
+            members_per_workspace=args.members_per_workspace,
+            tasks_per_workspace=args.tasks_per_workspace,
+            submission_rate=args.submission_rate,
+            updates_per_department=args.updates_per_department,
+            batch_size=args.batch_size,
+            insert_concurrency=args.concurrency,
+            seed=args.seed
+        )
+        elapsed = time.perf_counter() - start
+        total = sum(result['counts'].values())
+        for collection, count in result['counts'].items():
+            print(f"{collection:<20}{count:>10}")
+        print(f"Inserted {total} documents into {db.name} in {elapsed:.1f}s ({total / elapsed:.0f} docs/s)")
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mongo-url', help='defaults to MONGO_URL')
+    parser.add_argument('--db-name', help='defaults to DB_NAME')
+    parser.add_argument('--drop', action='store_true', help='drop the database before seeding')
+    parser.add_argument('--password', default='SeedPass123!', help='password shared by every seeded user')
+    parser.add_argument('--departments', type=int, default=5)
+    parser.add_argument('--students', type=int, default=50000)
+    parser.add_argument('--workspaces', type=int, default=50)
+    parser.add_argument('--members-per-workspace', type=int, default=200)
+    parser.add_argument('--tasks-per-workspace', type=int, default=10)
+    parser.add_argument('--submission-rate', type=float, default=0.7)
+    parser.add_argument('--updates-per-department', type=int, default=20)
+    parser.add_argument('--batch-size', type=int, default=5000)
+    parser.add_argument('--concurrency', type=int, default=4, help='insert_many batches in flight per collection')
+    parser.add_argument('--seed', type=int, default=42)
+    asyncio.run(main(parser.parse_args()))
@@ -1,37 +1,129 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, File, UploadFile, Form, status
+import time
+# Taken before the other imports so cold-start time includes them
+IMPORT_STARTED_AT = time.perf_counter()
+
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, File, UploadFile, Form, Query, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from fastapi.responses import ORJSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from dotenv import load_dotenv
+from password_policy import hash_password, needs_rehash, verify_password
+from rate_limit import InMemoryRateLimiter, MongoRateLimiter
+from profiling import StackSampler
+from instrumentation import (
+    EventLoopLagMonitor, MongoCommandListener, RequestStats, SlowQueryRecorder, cold_start_seconds,
+    conditional_requests, current_request_stats, missing_unique_indexes_gauge, render_prometheus, request_latency,
+    request_mongo_commands, winning_plan_stages
+)
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import InsertOne, UpdateOne, ReplaceOne, ReturnDocument
+from pymongo.errors import BulkWriteError, CollectionInvalid, DuplicateKeyError, OperationFailure, PyMongoError
+from bson import Binary
 import os
 import logging
 from pathlib import Path
-from pydantic import BaseModel, Field, ConfigDict, EmailStr
+from pydantic import BaseModel, Field, ConfigDict, EmailStr, ValidationError
 from typing import List, Optional
 import uuid
 from datetime import datetime, timezone, timedelta
 import jwt
-import bcrypt
-import aiosmtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 import shutil
 import secrets
 import string
+import io
+import re
+import zipfile
+import asyncio
+import json
+import multiprocessing
+import zlib
+import csv
+import hashlib
+import socket
+import threading
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+
+# Connection pool settings; each worker process has its own client, so these apply per worker
+MONGO_POOL_ENV = {
+    'maxPoolSize': 'MONGO_MAX_POOL_SIZE',
+    'minPoolSize': 'MONGO_MIN_POOL_SIZE',
+    'maxIdleTimeMS': 'MONGO_MAX_IDLE_TIME_MS',
+    'connectTimeoutMS': 'MONGO_CONNECT_TIMEOUT_MS',
+    'socketTimeoutMS': 'MONGO_SOCKET_TIMEOUT_MS',
+    'serverSelectionTimeoutMS': 'MONGO_SERVER_SELECTION_TIMEOUT_MS',
+    'waitQueueTimeoutMS': 'MONGO_WAIT_QUEUE_TIMEOUT_MS'
+}
+# Worker processes per host (the gunicorn/uvicorn convention), used to split per-host resources
+WEB_CONCURRENCY = int(os.environ.get('WEB_CONCURRENCY', '1'))
+
+# Connections opened (with concurrent pings) before the worker reports ready
+MONGO_WARMUP_CONNECTIONS = int(os.environ.get('MONGO_WARMUP_CONNECTIONS', os.environ.get('MONGO_MIN_POOL_SIZE') or '1'))
+READINESS_PING_TIMEOUT_SECONDS = 2
+
+def mongo_client_options() -> dict:
+    """Pool options set through MONGO_* env vars; unset ones keep the driver defaults"""
+    return {option: int(os.environ[env]) for option, env in MONGO_POOL_ENV.items() if os.environ.get(env)}
+
+# Slow query log: commands over the threshold go to the capped slow_queries collection
+SLOW_QUERY_THRESHOLD_MS = float(os.environ.get('SLOW_QUERY_THRESHOLD_MS', '100'))  # 0 disables
+SLOW_QUERY_EXPLAIN_SAMPLE_RATE = float(os.environ.get('SLOW_QUERY_EXPLAIN_SAMPLE_RATE', '0.1'))
+SLOW_QUERY_LOG_SIZE_MB = int(os.environ.get('SLOW_QUERY_LOG_SIZE_MB', '16'))
+SLOW_QUERY_FLUSH_SECONDS = 5
+slow_query_recorder = SlowQueryRecorder(
+    SLOW_QUERY_THRESHOLD_MS, SLOW_QUERY_EXPLAIN_SAMPLE_RATE, ignored_collections={'slow_queries'}
+)
+
+# Created per process when the app starts (see connect_to_mongo), not at import time
+client: Optional[AsyncIOMotorClient] = None
+db = None
+
+def connect_to_mongo(mongo_client: AsyncIOMotorClient = None):
+    """Create this process's Motor client, or adopt mongo_client, and everything bound to it"""
+    global client, db
+    client = mongo_client or AsyncIOMotorClient(
+        mongo_url, event_listeners=[MongoCommandListener(slow_query_recorder)], **mongo_client_options()
+    )
+    db = client[os.environ['DB_NAME']]
+    create_rate_limiters()
+
+async def warm_mongo_pool():
+    """Check Mongo is reachable and open MONGO_WARMUP_CONNECTIONS pooled connections"""
+    await asyncio.gather(*(client.admin.command('ping') for _ in range(max(1, MONGO_WARMUP_CONNECTIONS))))
 
 # JWT Configuration
 JWT_SECRET = os.environ.get('JWT_SECRET', 'your-secret-key-change-in-production')
 JWT_ALGORITHM = 'HS256'
-JWT_EXPIRATION_HOURS = 24
+ACCESS_TOKEN_EXPIRATION_MINUTES = int(os.environ.get('ACCESS_TOKEN_EXPIRATION_MINUTES', '15'))
+REFRESH_TOKEN_EXPIRATION_DAYS = int(os.environ.get('REFRESH_TOKEN_EXPIRATION_DAYS', '30'))
+# A rotated refresh token presented again within this window (another tab, a retried request) is not treated as theft
+REFRESH_REUSE_GRACE_SECONDS = int(os.environ.get('REFRESH_REUSE_GRACE_SECONDS', '10'))
+REVOCATION_SYNC_SECONDS = int(os.environ.get('REVOCATION_SYNC_SECONDS', '30'))
+
+# Auth rate limiting (token buckets per client IP, and per email from each client IP)
+# 'memory' or 'mongo'; in-memory buckets are per process, so several workers share buckets in Mongo by default
+AUTH_RATE_LIMIT_BACKEND = os.environ.get('AUTH_RATE_LIMIT_BACKEND', 'mongo' if WEB_CONCURRENCY > 1 else 'memory')
+AUTH_RATE_LIMIT_IP_BURST = float(os.environ.get('AUTH_RATE_LIMIT_IP_BURST', '20'))
+AUTH_RATE_LIMIT_IP_PER_MINUTE = float(os.environ.get('AUTH_RATE_LIMIT_IP_PER_MINUTE', '20'))
+AUTH_RATE_LIMIT_EMAIL_BURST = float(os.environ.get('AUTH_RATE_LIMIT_EMAIL_BURST', '5'))
+AUTH_RATE_LIMIT_EMAIL_PER_MINUTE = float(os.environ.get('AUTH_RATE_LIMIT_EMAIL_PER_MINUTE', '5'))
+# Reverse proxies in front of the app that append the client address to X-Forwarded-For.
+# 0 uses the socket peer; behind one ingress proxy every client would otherwise share its
+# address and so a single IP bucket. TRUST_FORWARDED_FOR=true is the older spelling of 1.
+TRUSTED_PROXY_HOPS = int(os.environ.get(
+    'TRUSTED_PROXY_HOPS', '1' if os.environ.get('TRUST_FORWARDED_FOR', 'false').lower() == 'true' else '0'
+))
 
 # Email Configuration
 SMTP_HOST = os.environ.get('SMTP_HOST', 'smtp.gmail.com')
@@ -40,19 +132,86 @@ SMTP_USER = os.environ.get('SMTP_USER', '')
 SMTP_PASSWORD = os.environ.get('SMTP_PASSWORD', '')
 
 # Create uploads directory
-UPLOADS_DIR = ROOT_DIR / 'uploads'
-UPLOADS_DIR.mkdir(exist_ok=True)
+# Point at a shared volume when running several hosts
+UPLOADS_DIR = Path(os.environ.get('UPLOADS_DIR', ROOT_DIR / 'uploads'))
+
+# Chunk size used when streaming submission archives
+ARCHIVE_CHUNK_SIZE = 1024 * 1024
+
+# Orphaned upload garbage collection
+UPLOAD_GC_INTERVAL_HOURS = float(os.environ.get('UPLOAD_GC_INTERVAL_HOURS', '0'))  # 0 disables the background job
+UPLOAD_GC_GRACE_HOURS = float(os.environ.get('UPLOAD_GC_GRACE_HOURS', '24'))
+UPLOAD_GC_BATCH_SIZE = 500
+
+# Bulk roster import
+ROSTER_IMPORT_BATCH_SIZE = 1000
+
+# Bulk user provisioning
+PROVISION_BATCH_SIZE = 500
+# Split the cores between web workers so each one's pool does not oversubscribe the host
+PASSWORD_HASH_WORKERS = int(os.environ.get(
+    'PASSWORD_HASH_WORKERS', str(max(1, (os.cpu_count() or 1) // WEB_CONCURRENCY))
+))
+USER_ROLES = ['admin', 'student', 'department_admin']
+
+# Invite codes
+INVITE_CODE_MAX_ATTEMPTS = 5
+INVITE_CODE_POOL_SIZE = int(os.environ.get('INVITE_CODE_POOL_SIZE', '0'))  # 0 disables the pre-generated pool
+
+# Background jobs that must run once per deployment (sweeper, rollover, upload GC) are
+# started in every worker but only run in the holder of a Mongo lease; a lease lasts
+# this many loop intervals, so a holder that stops renewing is replaced after that
+JOB_LEASE_INTERVALS = 2
+JOB_LEASE_HOLDER = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+
+# Missed-task penalty sweeper
+MISSED_TASK_SWEEP_INTERVAL_MINUTES = float(os.environ.get('MISSED_TASK_SWEEP_INTERVAL_MINUTES', '5'))  # 0 disables
+MISSED_TASK_SWEEP_BATCH_SIZE = 100
+
+# Semester rollover into the leaderboard archive
+SEMESTER_ROLLOVER_INTERVAL_HOURS = float(os.environ.get('SEMESTER_ROLLOVER_INTERVAL_HOURS', '24'))  # 0 disables
+SEMESTER_ROLLOVER_BATCH_SIZE = 1000
+
+# Conditional GET: read endpoints answer If-None-Match from collection change counters
+CONDITIONAL_GET_CACHE_CONTROL = 'private, no-cache'
+
+# Serialize large list responses with orjson and skip response_model validation
+FAST_JSON_RESPONSES = os.environ.get('FAST_JSON_RESPONSES', 'false').lower() == 'true'
+
+# Bearer token Prometheus must send to scrape /metrics; the endpoint answers 404 while it is unset
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+# Sampling profiler (admin only, opt-in)
+PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', 'false').lower() == 'true'
+PROFILE_SAMPLE_INTERVAL_MS = float(os.environ.get('PROFILE_SAMPLE_INTERVAL_MS', '5'))
+PROFILE_MAX_SECONDS = 60
+PROFILE_HEADER = 'X-Profile'
+REQUEST_PROFILES_KEPT = 20
+
+# Event loop lag monitoring; in debug mode stalls over the threshold log the blocking stack
+EVENT_LOOP_LAG_INTERVAL_SECONDS = float(os.environ.get('EVENT_LOOP_LAG_INTERVAL_SECONDS', '0.5'))  # 0 disables
+EVENT_LOOP_DEBUG = os.environ.get('EVENT_LOOP_DEBUG', 'false').lower() == 'true'
+EVENT_LOOP_BLOCK_THRESHOLD_MS = float(os.environ.get('EVENT_LOOP_BLOCK_THRESHOLD_MS', '100'))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await start_app()
+    try:
+        yield
+    finally:
+        await stop_app()
 
 # Create the main app
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
-# Mount static files for uploads
-app.mount("/uploads", StaticFiles(directory=str(UPLOADS_DIR)), name="uploads")
+# Mount static files for uploads (the directory is created on startup)
+app.mount("/uploads", StaticFiles(directory=str(UPLOADS_DIR), check_dir=False), name="uploads")
 
 # Create API router
 api_router = APIRouter(prefix="/api")
 
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
 
 # Models
 class UserBase(BaseModel):
@@ -77,6 +236,14 @@ class User(UserBase):
 class UserResponse(BaseModel):
     user: User
     token: str
+    refresh_token: Optional[str] = None
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
+class TokenResponse(BaseModel):
+    token: str
+    refresh_token: str
 
 class Material(BaseModel):
     model_config = ConfigDict(extra="ignore")
@@ -126,13 +293,20 @@ class WorkspaceBase(BaseModel):
     description: str
     subject: Optional[str] = None
 
-class WorkspaceCreate(WorkspaceBase):
+class InviteCodeSettings(BaseModel):
+    invite_expires_at: Optional[str] = None  # ISO format; None never expires
+    invite_max_uses: Optional[int] = Field(None, ge=1)  # None allows unlimited joins
+
+class WorkspaceCreate(WorkspaceBase, InviteCodeSettings):
     pass
 
 class Workspace(WorkspaceBase):
     model_config = ConfigDict(extra="ignore")
     id: str
     invite_code: str
+    invite_expires_at: Optional[str] = None
+    invite_max_uses: Optional[int] = None
+    invite_uses: int = 0
     created_by: str
     created_at: str
     member_count: Optional[int] = 0
@@ -197,14 +371,19 @@ class SubmissionReview(BaseModel):
     status: str  # 'approved' or 'rejected'
     comment: Optional[str] = None
 
+class SubmissionBatchReviewItem(SubmissionReview):
+    submission_id: str
+
 class TaskSubmissionReport(BaseModel):
     task: TaskWorkspace
-    submissions: List[Submission]
+    submissions: List[Submission] = []
     total_students: int
     submitted_count: int
     approved_count: int
     rejected_count: int
     pending_count: int
+    skip: int = 0
+    limit: int = 0
 
 # Department Updates Models
 class DepartmentUpdateCreate(BaseModel):
@@ -274,6 +453,30 @@ class LeaderboardStats(BaseModel):
     task_completion_rate: float
     recent_activities: List[PointActivity]
 
+def model_projection(model) -> dict:
+    """Mongo projection that returns exactly the fields of a response model"""
+    return {'_id': 0, **{name: 1 for name in model.model_fields}}
+
+@lru_cache(maxsize=None)
+def model_defaults(model) -> dict:
+    return {
+        name: field.get_default(call_default_factory=True)
+        for name, field in model.model_fields.items()
+        if not field.is_required()
+    }
+
+def list_response(rows: List[dict], model):
+    """Return rows for a List[model] endpoint, through orjson when FAST_JSON_RESPONSES is on
+    
+    The fast path skips response_model validation entirely, so rows must come
+    from a model_projection(model) read (or be built to match model); only
+    missing defaults are filled in.
+    """
+    if not FAST_JSON_RESPONSES:
+        return rows
+    defaults = model_defaults(model)
+    return ORJSONResponse([{**defaults, **row} for row in rows] if defaults else rows)
+
 # Points Configuration (hardcoded as per requirements)
 POINTS_CONFIG = {
     'task_on_time': 10,
@@ -284,30 +487,156 @@ POINTS_CONFIG = {
 }
 
 # Helper Functions
-def hash_password(password: str) -> str:
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
-
-def verify_password(password: str, hashed: str) -> bool:
-    return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+# Revoked access token ids (jti -> expiry timestamp), kept in sync with db.revoked_tokens
+revoked_access_tokens = {}
 
 def create_token(user_id: str, email: str, role: str, department: str = None) -> str:
-    expiration = datetime.now(timezone.utc) + timedelta(hours=JWT_EXPIRATION_HOURS)
+    expiration = datetime.now(timezone.utc) + timedelta(minutes=ACCESS_TOKEN_EXPIRATION_MINUTES)
     payload = {
         'user_id': user_id,
         'email': email,
         'role': role,
         'department': department,
+        'jti': uuid.uuid4().hex,
         'exp': expiration
     }
     return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
 
 def decode_token(token: str) -> dict:
     try:
-        return jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token has expired")
     except jwt.InvalidTokenError:
         raise HTTPException(status_code=401, detail="Invalid token")
+    if payload.get('jti') in revoked_access_tokens:
+        raise HTTPException(status_code=401, detail="Token has been revoked")
+    return payload
+
+def create_rate_limiter(name: str, burst: float, per_minute: float):
+    if AUTH_RATE_LIMIT_BACKEND == 'mongo':
+        return MongoRateLimiter(db[f'rate_limit_{name}'], burst, per_minute / 60)
+    return InMemoryRateLimiter(burst, per_minute / 60)
+
+# Set by create_rate_limiters once connected, since the Mongo backend needs db
+ip_rate_limiter = None
+email_rate_limiter = None
+
+def create_rate_limiters():
+    global ip_rate_limiter, email_rate_limiter
+    ip_rate_limiter = create_rate_limiter('ip', AUTH_RATE_LIMIT_IP_BURST, AUTH_RATE_LIMIT_IP_PER_MINUTE)
+    email_rate_limiter = create_rate_limiter('email', AUTH_RATE_LIMIT_EMAIL_BURST, AUTH_RATE_LIMIT_EMAIL_PER_MINUTE)
+
+def client_ip(request: Request) -> str:
+    """Client address as seen by the outermost of TRUSTED_PROXY_HOPS proxies.
+    
+    Each proxy appends the address it received the request from, so only the
+    last TRUSTED_PROXY_HOPS entries of X-Forwarded-For are trustworthy; entries
+    further left are whatever the client chose to send.
+    """
+    forwarded = [address.strip() for address in request.headers.get('x-forwarded-for', '').split(',') if address.strip()]
+    if TRUSTED_PROXY_HOPS > 0 and forwarded:
+        return forwarded[-min(TRUSTED_PROXY_HOPS, len(forwarded))]
+    return request.client.host if request.client else 'unknown'
+
+async def enforce_auth_rate_limit(request: Request, email: str = None):
+    """Reject auth attempts over the per-IP or per-email budget before any bcrypt work.
+    
+    The email budget is kept per (email, client IP): a bucket shared by every
+    address would let anyone lock an account's owner out by spraying bad
+    passwords at it from elsewhere.
+    """
+    ip = client_ip(request)
+    retry_after = await ip_rate_limiter.consume(ip)
+    if retry_after is None and email:
+        retry_after = await email_rate_limiter.consume(f'{email.lower()}|{ip}')
+    if retry_after is not None:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many attempts, please try again later",
+            headers={'Retry-After': str(max(1, int(retry_after + 0.999)))}
+        )
+
+def hash_refresh_token(refresh_token: str) -> str:
+    return hashlib.sha256(refresh_token.encode('utf-8')).hexdigest()
+
+async def create_refresh_token(user_id: str, family_id: str = None) -> str:
+    """Issue an opaque refresh token; only its hash is stored"""
+    refresh_token = secrets.token_urlsafe(32)
+    now = datetime.now(timezone.utc)
+    await db.refresh_tokens.insert_one({
+        'token_hash': hash_refresh_token(refresh_token),
+        'user_id': user_id,
+        'family_id': family_id or str(uuid.uuid4()),
+        'revoked': False,
+        'created_at': now.isoformat(),
+        'expires_at': now + timedelta(days=REFRESH_TOKEN_EXPIRATION_DAYS)
+    })
+    return refresh_token
+
+async def revoke_access_token(payload: dict):
+    """Revoke an access token until it would have expired anyway"""
+    expires_at = datetime.fromtimestamp(payload['exp'], tz=timezone.utc)
+    revoked_access_tokens[payload['jti']] = payload['exp']
+    await db.revoked_tokens.update_one(
+        {'jti': payload['jti']},
+        {'$setOnInsert': {'jti': payload['jti'], 'expires_at': expires_at}},
+        upsert=True
+    )
+
+async def sync_revoked_access_tokens():
+    """Reload the in-memory revocation set from Mongo, dropping expired entries"""
+    now = datetime.now(timezone.utc)
+    revoked = await db.revoked_tokens.find(
+        {'expires_at': {'$gt': now}},
+        {'_id': 0, 'jti': 1, 'expires_at': 1}
+    ).to_list(None)
+    synced = {}
+    for token in revoked:
+        expires_at = token['expires_at']
+        if expires_at.tzinfo is None:
+            expires_at = expires_at.replace(tzinfo=timezone.utc)
+        synced[token['jti']] = expires_at.timestamp()
+    # Keep local revocations that may not be visible in Mongo yet
+    for jti, exp in list(revoked_access_tokens.items()):
+        if exp > now.timestamp():
+            synced.setdefault(jti, exp)
+    revoked_access_tokens.clear()
+    revoked_access_tokens.update(synced)
+
+async def run_revocation_sync_periodically():
+    """Background loop that runs sync_revoked_access_tokens every REVOCATION_SYNC_SECONDS"""
+    while True:
+        await asyncio.sleep(REVOCATION_SYNC_SECONDS)
+        try:
+            await sync_revoked_access_tokens()
+        except Exception as e:
+            logging.error(f"Token revocation sync failed: {str(e)}")
+
+async def acquire_job_lease(name: str, interval_seconds: float) -> bool:
+    """Take or renew this process's lease on a background job; only the holder runs it"""
+    now = datetime.now(timezone.utc)
+    try:
+        await db.job_leases.update_one(
+            {'_id': name, '$or': [{'holder': JOB_LEASE_HOLDER}, {'expires_at': {'$lte': now}}]},
+            {'$set': {
+                'holder': JOB_LEASE_HOLDER,
+                'renewed_at': now,
+                'expires_at': now + timedelta(seconds=interval_seconds * JOB_LEASE_INTERVALS)
+            }},
+            upsert=True
+        )
+    except DuplicateKeyError:
+        # Another process holds an unexpired lease, so the upsert's insert collided on _id
+        return False
+    return True
+
+async def release_job_leases():
+    """Let another worker take over this process's jobs right away"""
+    await db.job_leases.update_many(
+        {'holder': JOB_LEASE_HOLDER},
+        {'$set': {'expires_at': datetime.now(timezone.utc)}}
+    )
 
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
     token = credentials.credentials
@@ -327,12 +656,67 @@ async def get_department_admin_user(user: dict = Depends(get_current_user)):
         raise HTTPException(status_code=403, detail="Department admin access required")
     return user
 
+async def bump_collection_versions(*collections: str):
+    """Record a write to collections, changing the ETags of endpoints that read them (call after the write)"""
+    await db.collection_versions.bulk_write(
+        [UpdateOne({'_id': name}, {'$inc': {'version': 1}}, upsert=True) for name in collections],
+        ordered=False
+    )
+
+async def collection_etag(request: Request, user: dict, collections: tuple) -> str:
+    """Weak ETag over the request, the caller and the change counters of the collections it reads"""
+    versions = {
+        doc['_id']: doc['version']
+        for doc in await db.collection_versions.find({'_id': {'$in': list(collections)}}).to_list(None)
+    }
+    fingerprint = json.dumps([
+        request.url.path,
+        sorted(request.query_params.multi_items()),
+        [user['id'], user['role'], user.get('department'), user.get('section')],
+        # Endpoints default to the current semester when none is given
+        get_current_semester(),
+        [versions.get(name, 0) for name in collections]
+    ])
+    return f'W/"{hashlib.sha1(fingerprint.encode()).hexdigest()}"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against etag"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    candidates = {tag.strip().removeprefix('W/') for tag in if_none_match.split(',')}
+    return etag.removeprefix('W/') in candidates
+
+def conditional_get_user(*collections: str):
+    """Dependency for read endpoints: authenticates like get_current_user, then answers
+    If-None-Match with 304 before the handler runs when none of collections changed
+    """
+    async def dependency(request: Request, user: dict = Depends(get_current_user)) -> dict:
+        route = request.scope['route'].path
+        etag = await collection_etag(request, user, collections)
+        if_none_match = request.headers.get('if-none-match')
+        if etag_matches(if_none_match, etag):
+            conditional_requests.inc((route, 'hit'))
+            raise HTTPException(
+                status_code=304,
+                headers={'ETag': etag, 'Cache-Control': CONDITIONAL_GET_CACHE_CONTROL}
+            )
+        conditional_requests.inc((route, 'miss' if if_none_match else 'unconditional'))
+        # Added to the 200 response by add_conditional_get_headers
+        request.state.etag = etag
+        return user
+    return dependency
+
 async def send_email(to_email: str, subject: str, body: str):
     """Send email notification"""
     if not SMTP_USER or not SMTP_PASSWORD:
         logging.warning(f"Email not sent to {to_email}: SMTP credentials not configured")
         return
     
+    # Imported on first use to keep it off the startup path
+    import aiosmtplib
+    
     try:
         message = MIMEMultipart()
         message['From'] = SMTP_USER
@@ -357,9 +741,77 @@ def generate_invite_code(length: int = 8) -> str:
     characters = string.ascii_uppercase + string.digits
     return ''.join(secrets.choice(characters) for _ in range(length))
 
+async def refill_invite_code_pool():
+    """Top the pre-generated invite code pool back up to INVITE_CODE_POOL_SIZE"""
+    missing = INVITE_CODE_POOL_SIZE - await db.invite_code_pool.estimated_document_count()
+    if missing <= 0:
+        return
+    
+    codes = {generate_invite_code() for _ in range(missing)}
+    taken = await db.workspaces.distinct('invite_code', {'invite_code': {'$in': list(codes)}})
+    now = datetime.now(timezone.utc).isoformat()
+    docs = [{'code': code, 'created_at': now} for code in codes - set(taken)]
+    if not docs:
+        return
+    try:
+        await db.invite_code_pool.insert_many(docs, ordered=False)
+    except BulkWriteError:
+        # Codes already pooled by a concurrent refill are skipped by the unique index
+        pass
+
+# Held so the running refill is not garbage collected mid-run, and so only one runs at a time
+_invite_code_refill_task = None
+
+def log_task_failure(task: asyncio.Task):
+    """Done callback that logs the exception of a fire-and-forget task"""
+    if not task.cancelled() and task.exception() is not None:
+        logging.error(f"Background task {task.get_name()} failed: {str(task.exception())}")
+
+def schedule_invite_code_refill():
+    """Start a background refill of the invite code pool unless one is already running"""
+    global _invite_code_refill_task
+    if _invite_code_refill_task is None or _invite_code_refill_task.done():
+        _invite_code_refill_task = asyncio.create_task(refill_invite_code_pool(), name='invite-code-refill')
+        _invite_code_refill_task.add_done_callback(log_task_failure)
+
+async def take_invite_code() -> str:
+    """Take a code from the pre-generated pool, falling back to a fresh random one"""
+    if INVITE_CODE_POOL_SIZE > 0:
+        pooled = await db.invite_code_pool.find_one_and_delete({})
+        if await db.invite_code_pool.estimated_document_count() < INVITE_CODE_POOL_SIZE // 2:
+            schedule_invite_code_refill()
+        if pooled:
+            return pooled['code']
+    return generate_invite_code()
+
+async def write_with_unique_invite_code(write) -> str:
+    """Run write(code) with fresh invite codes until one is accepted by the unique index"""
+    for _ in range(INVITE_CODE_MAX_ATTEMPTS):
+        code = await take_invite_code()
+        try:
+            await write(code)
+            return code
+        except DuplicateKeyError:
+            continue
+    raise HTTPException(status_code=500, detail="Could not allocate a unique invite code")
+
+def normalize_invite_expiry(expires_at: Optional[str]) -> Optional[str]:
+    """Convert an invite expiry to a UTC ISO string so it compares correctly in queries"""
+    if not expires_at:
+        return None
+    try:
+        parsed = datetime.fromisoformat(expires_at.replace('Z', '+00:00'))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invite expiry must be an ISO format date")
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc).isoformat()
+
 # Routes
 @api_router.post("/auth/signup", response_model=UserResponse)
-async def signup(user_data: UserCreate):
+async def signup(user_data: UserCreate, request: Request):
+    await enforce_auth_rate_limit(request, user_data.email)
+    
     # Check if user exists
     existing = await db.users.find_one({'email': user_data.email})
     if existing:
@@ -380,27 +832,239 @@ async def signup(user_data: UserCreate):
     
     await db.users.insert_one(user_dict)
     
-    # Create token
+    # Create tokens
     token = create_token(user_id, user_data.email, user_data.role, user_data.department)
+    refresh_token = await create_refresh_token(user_id)
     
     # Return user without password
     user_dict.pop('password')
-    return {'user': user_dict, 'token': token}
+    return {'user': user_dict, 'token': token, 'refresh_token': refresh_token}
 
 @api_router.post("/auth/login", response_model=UserResponse)
-async def login(credentials: UserLogin):
+async def login(credentials: UserLogin, request: Request):
+    await enforce_auth_rate_limit(request, credentials.email)
+    
     # Find user
     user = await db.users.find_one({'email': credentials.email})
     if not user or not verify_password(credentials.password, user['password']):
         raise HTTPException(status_code=401, detail="Invalid email or password")
     
-    # Create token
+    # Upgrade hashes made with a different bcrypt cost than the current policy
+    if needs_rehash(user['password']):
+        new_hash = await asyncio.to_thread(hash_password, credentials.password)
+        await db.users.update_one(
+            {'id': user['id'], 'password': user['password']},
+            {'$set': {'password': new_hash}}
+        )
+    
+    # Create tokens
     token = create_token(user['id'], user['email'], user['role'], user.get('department'))
+    refresh_token = await create_refresh_token(user['id'])
     
     # Return user without password
     user.pop('password')
     user.pop('_id')
-    return {'user': user, 'token': token}
+    return {'user': user, 'token': token, 'refresh_token': refresh_token}
+
+@api_router.post("/auth/refresh", response_model=TokenResponse)
+async def refresh_access_token(refresh_data: RefreshRequest):
+    """Exchange a refresh token for a new access token (no password check)"""
+    token_hash = hash_refresh_token(refresh_data.refresh_token)
+    now = datetime.now(timezone.utc)
+    
+    # Rotate: each refresh token can be used exactly once
+    stored = await db.refresh_tokens.find_one_and_update(
+        {'token_hash': token_hash, 'revoked': False, 'expires_at': {'$gt': now}},
+        {'$set': {'revoked': True, 'rotated_at': now.isoformat()}}
+    )
+    if not stored:
+        reused = await db.refresh_tokens.find_one({'token_hash': token_hash, 'revoked': True})
+        if not reused or not reused.get('rotated_at'):
+            raise HTTPException(status_code=401, detail="Invalid refresh token")
+        grace_cutoff = (now - timedelta(seconds=REFRESH_REUSE_GRACE_SECONDS)).isoformat()
+        family_alive = await db.refresh_tokens.find_one(
+            {'family_id': reused['family_id'], 'revoked': False, 'expires_at': {'$gt': now}},
+            {'_id': 1}
+        )
+        if reused['rotated_at'] < grace_cutoff or not family_alive:
+            # A rotated token was presented again; assume it leaked and end the session
+            await db.refresh_tokens.update_many({'family_id': reused['family_id']}, {'$set': {'revoked': True}})
+            raise HTTPException(status_code=401, detail="Invalid refresh token")
+        # Just rotated by a concurrent refresh: issue another token in the same family
+        stored = reused
+    
+    user = await db.users.find_one({'id': stored['user_id']}, {'_id': 0, 'password': 0})
+    if not user:
+        raise HTTPException(status_code=401, detail="User not found")
+    
+    token = create_token(user['id'], user['email'], user['role'], user.get('department'))
+    refresh_token = await create_refresh_token(user['id'], stored['family_id'])
+    return {'token': token, 'refresh_token': refresh_token}
+
+@api_router.post("/auth/logout")
+async def logout(
+    refresh_data: Optional[RefreshRequest] = None,
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security)
+):
+    """Revoke the session's refresh tokens and, if still valid, the access token.
+
+    The refresh token alone is enough, so a client whose access token has
+    already expired can still log out.
+    """
+    payload = None
+    if credentials:
+        try:
+            payload = decode_token(credentials.credentials)
+        except HTTPException:
+            if not refresh_data:
+                raise
+    if payload and payload.get('jti'):
+        await revoke_access_token(payload)
+    
+    if refresh_data:
+        stored = await db.refresh_tokens.find_one(
+            {'token_hash': hash_refresh_token(refresh_data.refresh_token)},
+            {'_id': 0, 'user_id': 1, 'family_id': 1}
+        )
+        if stored and (payload is None or stored['user_id'] == payload['user_id']):
+            await db.refresh_tokens.update_many({'family_id': stored['family_id']}, {'$set': {'revoked': True}})
+        elif payload is None:
+            raise HTTPException(status_code=401, detail="Invalid refresh token")
+    elif payload is None:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    return {'message': 'Logged out successfully'}
+
+_password_hash_pool = None
+
+def get_password_hash_pool() -> ProcessPoolExecutor:
+    """Process pool used to run bcrypt for bulk provisioning in parallel.
+    
+    Children come from a forkserver (spawn where that is unavailable), never a
+    plain fork of this worker: its Motor, sampler and monitor threads could be
+    holding locks that a forked child would inherit in a locked state.
+    """
+    global _password_hash_pool
+    if _password_hash_pool is None:
+        start_method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+        _password_hash_pool = ProcessPoolExecutor(
+            max_workers=PASSWORD_HASH_WORKERS, mp_context=multiprocessing.get_context(start_method)
+        )
+    return _password_hash_pool
+
+async def hash_passwords_in_parallel(passwords: List[str]) -> List[str]:
+    loop = asyncio.get_running_loop()
+    pool = get_password_hash_pool()
+    return await asyncio.gather(*(loop.run_in_executor(pool, hash_password, password) for password in passwords))
+
+def parse_provisioning_row(line: str, header: Optional[List[str]]) -> dict:
+    """Turn one CSV (with header) or NDJSON roster line into a user dict"""
+    if header is None:
+        row = json.loads(line)
+        if not isinstance(row, dict):
+            raise ValueError("Row must be a JSON object")
+        return row
+    values = next(csv.reader([line]), [])
+    return {key: value.strip() for key, value in zip(header, values) if value.strip()}
+
+async def provision_user_batch(batch: List[tuple], report: List[dict]):
+    """Create one batch of validated (row number, UserCreate, generated password) users"""
+    emails = [user_data.email for _, user_data, _ in batch]
+    existing = set(await db.users.distinct('email', {'email': {'$in': emails}}))
+    
+    pending = []
+    for row_number, user_data, generated_password in batch:
+        if user_data.email in existing:
+            report.append({'row': row_number, 'email': user_data.email, 'status': 'exists'})
+        else:
+            pending.append((row_number, user_data, generated_password))
+    if not pending:
+        return
+    
+    hashed = await hash_passwords_in_parallel([user_data.password for _, user_data, _ in pending])
+    created_at = datetime.now(timezone.utc).isoformat()
+    docs = [
+        {
+            'id': str(uuid.uuid4()),
+            'email': user_data.email,
+            'name': user_data.name,
+            'role': user_data.role,
+            'department': user_data.department,
+            'section': user_data.section,
+            'password': password_hash,
+            'created_at': created_at
+        }
+        for (_, user_data, _), password_hash in zip(pending, hashed)
+    ]
+    
+    failed = set()
+    try:
+        await db.users.insert_many(docs, ordered=False)
+    except BulkWriteError as e:
+        # Emails registered concurrently since the existence check
+        failed = {error['index'] for error in e.details['writeErrors'] if error['code'] == 11000}
+        if len(failed) != len(e.details['writeErrors']):
+            raise
+    
+    for idx, (row_number, user_data, generated_password) in enumerate(pending):
+        if idx in failed:
+            report.append({'row': row_number, 'email': user_data.email, 'status': 'exists'})
+            continue
+        row_report = {'row': row_number, 'email': user_data.email, 'status': 'created', 'user_id': docs[idx]['id']}
+        if generated_password:
+            row_report['temporary_password'] = user_data.password
+        report.append(row_report)
+
+@api_router.post("/auth/provision")
+async def provision_users(request: Request, user: dict = Depends(get_admin_user)):
+    """Create many users from a CSV (with header) or NDJSON roster (admin only).
+
+    Rows need email and name; role defaults to student, and rows without a
+    password get a generated temporary one, returned in the report.
+    """
+    is_ndjson = 'ndjson' in request.headers.get('content-type', '') or 'jsonl' in request.headers.get('content-type', '')
+    header = None
+    report = []
+    seen_emails = set()
+    batch = []
+    row_number = 0
+    
+    async for line in iter_request_lines(request):
+        if not is_ndjson and header is None:
+            header = [column.strip().lower() for column in next(csv.reader([line]), [])]
+            continue
+        row_number += 1
+        try:
+            row = parse_provisioning_row(line, header)
+            row.setdefault('role', 'student')
+            generated_password = not row.get('password')
+            if generated_password:
+                row['password'] = secrets.token_urlsafe(9)
+            user_data = UserCreate(**row)
+            if user_data.role not in USER_ROLES:
+                raise ValueError(f"Role must be one of {', '.join(USER_ROLES)}")
+        except (ValueError, ValidationError) as e:
+            report.append({'row': row_number, 'status': 'invalid', 'detail': str(e)})
+            continue
+        
+        if user_data.email in seen_emails:
+            report.append({'row': row_number, 'email': user_data.email, 'status': 'duplicate'})
+            continue
+        seen_emails.add(user_data.email)
+        batch.append((row_number, user_data, generated_password))
+        if len(batch) >= PROVISION_BATCH_SIZE:
+            await provision_user_batch(batch, report)
+            batch = []
+    if batch:
+        await provision_user_batch(batch, report)
+    
+    report.sort(key=lambda row_report: row_report['row'])
+    created_count = sum(1 for row_report in report if row_report['status'] == 'created')
+    return {
+        'message': f'Provisioned {created_count} users',
+        'total_rows': row_number,
+        'created_count': created_count,
+        'rows': report
+    }
 
 @api_router.get("/auth/me", response_model=User)
 async def get_me(user: dict = Depends(get_current_user)):
@@ -434,13 +1098,14 @@ async def upload_material(
     }
     
     await db.materials.insert_one(material)
+    await bump_collection_versions('materials')
     material.pop('_id', None)
     return material
 
 @api_router.get("/materials", response_model=List[Material])
-async def get_materials(user: dict = Depends(get_current_user)):
-    materials = await db.materials.find({}, {'_id': 0}).to_list(1000)
-    return materials
+async def get_materials(user: dict = Depends(conditional_get_user('materials'))):
+    materials = await db.materials.find({}, model_projection(Material)).to_list(1000)
+    return list_response(materials, Material)
 
 @api_router.delete("/materials/{material_id}")
 async def delete_material(material_id: str, user: dict = Depends(get_admin_user)):
@@ -454,6 +1119,7 @@ async def delete_material(material_id: str, user: dict = Depends(get_admin_user)
         file_path.unlink()
     
     await db.materials.delete_one({'id': material_id})
+    await bump_collection_versions('materials')
     return {'message': 'Material deleted successfully'}
 
 @api_router.post("/tasks", response_model=Task)
@@ -517,15 +1183,7 @@ async def complete_task(task_id: str, user: dict = Depends(get_current_user)):
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
     
-    # Check if already completed
-    existing = await db.task_completions.find_one({
-        'task_id': task_id,
-        'student_id': user['id']
-    })
-    if existing:
-        raise HTTPException(status_code=400, detail="Task already completed")
-    
-    # Create completion record
+    # Create completion record; the unique (task_id, student_id) index rejects repeats
     completion = {
         'id': str(uuid.uuid4()),
         'task_id': task_id,
@@ -534,7 +1192,10 @@ async def complete_task(task_id: str, user: dict = Depends(get_current_user)):
         'completed_at': datetime.now(timezone.utc).isoformat()
     }
     
-    await db.task_completions.insert_one(completion)
+    try:
+        await db.task_completions.insert_one(completion)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Task already completed")
     return {'message': 'Task marked as completed'}
 
 @api_router.delete("/tasks/{task_id}/complete")
@@ -590,18 +1251,24 @@ async def create_workspace(workspace_data: WorkspaceCreate, user: dict = Depends
         'name': workspace_data.name,
         'description': workspace_data.description,
         'subject': workspace_data.subject,
-        'invite_code': generate_invite_code(),
+        'invite_expires_at': normalize_invite_expiry(workspace_data.invite_expires_at),
+        'invite_max_uses': workspace_data.invite_max_uses,
+        'invite_uses': 0,
         'created_by': user['id'],
         'created_at': datetime.now(timezone.utc).isoformat()
     }
     
-    await db.workspaces.insert_one(workspace)
-    workspace.pop('_id', None)
+    async def insert_workspace(code: str):
+        workspace.pop('_id', None)
+        await db.workspaces.insert_one({**workspace, 'invite_code': code})
+    
+    workspace['invite_code'] = await write_with_unique_invite_code(insert_workspace)
+    await bump_collection_versions('workspaces')
     workspace['member_count'] = 0
     return workspace
 
 @api_router.get("/workspaces", response_model=List[Workspace])
-async def get_workspaces(user: dict = Depends(get_current_user)):
+async def get_workspaces(user: dict = Depends(conditional_get_user('workspaces', 'workspace_members'))):
     """Get workspaces - admin sees all they created, students see joined ones"""
     if user['role'] == 'admin':
         workspaces = await db.workspaces.find({'created_by': user['id']}, {'_id': 0}).to_list(1000)
@@ -643,29 +1310,193 @@ async def join_workspace(join_data: WorkspaceJoin, user: dict = Depends(get_curr
     if user['role'] != 'student':
         raise HTTPException(status_code=403, detail="Only students can join workspaces")
     
-    workspace = await db.workspaces.find_one({'invite_code': join_data.invite_code})
+    # Look up the code and claim a use in one indexed query
+    now = datetime.now(timezone.utc).isoformat()
+    workspace = await db.workspaces.find_one_and_update(
+        {
+            'invite_code': join_data.invite_code,
+            '$and': [
+                {'$or': [{'invite_expires_at': None}, {'invite_expires_at': {'$gt': now}}]},
+                {'$or': [
+                    {'invite_max_uses': None},
+                    {'$expr': {'$lt': [{'$ifNull': ['$invite_uses', 0]}, '$invite_max_uses']}}
+                ]}
+            ]
+        },
+        {'$inc': {'invite_uses': 1}},
+        projection={'_id': 0, 'id': 1, 'name': 1}
+    )
     if not workspace:
-        raise HTTPException(status_code=404, detail="Invalid invite code")
-    
-    # Check if already a member
-    existing = await db.workspace_members.find_one({
-        'workspace_id': workspace['id'],
-        'student_id': user['id']
-    })
-    if existing:
-        raise HTTPException(status_code=400, detail="Already a member of this workspace")
-    
-    # Add member
+        existing = await db.workspaces.find_one({'invite_code': join_data.invite_code}, {'_id': 1, 'invite_expires_at': 1})
+        if not existing:
+            raise HTTPException(status_code=404, detail="Invalid invite code")
+        if existing.get('invite_expires_at') and existing['invite_expires_at'] <= now:
+            raise HTTPException(status_code=400, detail="Invite code has expired")
+        raise HTTPException(status_code=400, detail="Invite code has reached its maximum number of uses")
+    
+    # Add member; the unique (workspace_id, student_id) index rejects repeats
     member = {
         'workspace_id': workspace['id'],
         'student_id': user['id'],
         'student_name': user['name'],
-        'joined_at': datetime.now(timezone.utc).isoformat()
+        'joined_at': now
     }
-    await db.workspace_members.insert_one(member)
+    try:
+        await db.workspace_members.insert_one(member)
+    except DuplicateKeyError:
+        await db.workspaces.update_one({'id': workspace['id']}, {'$inc': {'invite_uses': -1}})
+        raise HTTPException(status_code=400, detail="Already a member of this workspace")
+    await bump_collection_versions('workspaces', 'workspace_members')
     
     return {'message': 'Successfully joined workspace', 'workspace_name': workspace['name']}
 
+@api_router.post("/workspaces/{workspace_id}/invite-code", response_model=Workspace)
+async def rotate_invite_code(
+    workspace_id: str,
+    settings: InviteCodeSettings,
+    user: dict = Depends(get_admin_user)
+):
+    """Replace a workspace's invite code, resetting its expiry and use limit (admin only)"""
+    workspace = await db.workspaces.find_one({'id': workspace_id})
+    if not workspace:
+        raise HTTPException(status_code=404, detail="Workspace not found")
+    
+    if workspace['created_by'] != user['id']:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    
+    invite_settings = {
+        'invite_expires_at': normalize_invite_expiry(settings.invite_expires_at),
+        'invite_max_uses': settings.invite_max_uses,
+        'invite_uses': 0
+    }
+    
+    async def update_workspace(code: str):
+        await db.workspaces.update_one({'id': workspace_id}, {'$set': {**invite_settings, 'invite_code': code}})
+    
+    await write_with_unique_invite_code(update_workspace)
+    await bump_collection_versions('workspaces')
+    
+    workspace = await db.workspaces.find_one({'id': workspace_id}, {'_id': 0})
+    workspace['member_count'] = await db.workspace_members.count_documents({'workspace_id': workspace_id})
+    return workspace
+
+async def iter_request_lines(request: Request):
+    """Yield decoded, non-empty lines from a streamed request body"""
+    pending = b''
+    async for chunk in request.stream():
+        pending += chunk
+        lines = pending.split(b'\n')
+        pending = lines.pop()
+        for line in lines:
+            line = line.decode('utf-8-sig').strip()
+            if line:
+                yield line
+    line = pending.decode('utf-8-sig').strip()
+    if line:
+        yield line
+
+def parse_roster_line(line: str, is_ndjson: bool) -> Optional[str]:
+    """Extract the email from one CSV or NDJSON roster row"""
+    if is_ndjson:
+        try:
+            row = json.loads(line)
+        except ValueError:
+            return None
+        email = row.get('email') if isinstance(row, dict) else None
+        return email.strip() if isinstance(email, str) else None
+    columns = next(csv.reader([line]), [])
+    return columns[0].strip() if columns else None
+
+@api_router.post("/workspaces/{workspace_id}/members/import")
+async def import_workspace_members(
+    workspace_id: str,
+    request: Request,
+    user: dict = Depends(get_admin_user)
+):
+    """Add students to a workspace from a CSV or NDJSON roster of emails (admin only).
+
+    CSV rosters use the first column (a header row named 'email' is skipped);
+    NDJSON rosters use each object's 'email' field.
+    """
+    workspace = await db.workspaces.find_one({'id': workspace_id})
+    if not workspace:
+        raise HTTPException(status_code=404, detail="Workspace not found")
+    
+    if workspace['created_by'] != user['id']:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    
+    is_ndjson = 'ndjson' in request.headers.get('content-type', '') or 'jsonl' in request.headers.get('content-type', '')
+    joined_at = datetime.now(timezone.utc).isoformat()
+    seen_emails = set()
+    duplicate_emails = []
+    unknown_emails = []
+    invalid_rows = 0
+    total_rows = 0
+    operations = []
+    operation_emails = []
+    
+    async def resolve_batch(batch: List[str]):
+        students = await db.users.find(
+            {'email': {'$in': batch}, 'role': 'student'},
+            {'_id': 0, 'id': 1, 'name': 1, 'email': 1}
+        ).to_list(None)
+        by_email = {student['email']: student for student in students}
+        for email in batch:
+            student = by_email.get(email)
+            if not student:
+                unknown_emails.append(email)
+                continue
+            operations.append(InsertOne({
+                'workspace_id': workspace_id,
+                'student_id': student['id'],
+                'student_name': student['name'],
+                'joined_at': joined_at
+            }))
+            operation_emails.append(email)
+    
+    batch = []
+    async for line in iter_request_lines(request):
+        email = parse_roster_line(line, is_ndjson)
+        if total_rows == 0 and not is_ndjson and email and email.lower() == 'email':
+            continue
+        total_rows += 1
+        if not email or '@' not in email:
+            invalid_rows += 1
+            continue
+        if email in seen_emails:
+            duplicate_emails.append(email)
+            continue
+        seen_emails.add(email)
+        batch.append(email)
+        if len(batch) >= ROSTER_IMPORT_BATCH_SIZE:
+            await resolve_batch(batch)
+            batch = []
+    if batch:
+        await resolve_batch(batch)
+    
+    # One unordered write; existing memberships are rejected by the unique index
+    imported_count = len(operations)
+    if operations:
+        try:
+            result = await db.workspace_members.bulk_write(operations, ordered=False)
+            imported_count = result.inserted_count
+        except BulkWriteError as e:
+            imported_count = e.details['nInserted']
+            for error in e.details['writeErrors']:
+                if error['code'] != 11000:
+                    raise
+                duplicate_emails.append(operation_emails[error['index']])
+        await bump_collection_versions('workspace_members')
+    
+    return {
+        'message': f'Imported {imported_count} members',
+        'total_rows': total_rows,
+        'imported_count': imported_count,
+        'duplicate_emails': duplicate_emails,
+        'unknown_emails': unknown_emails,
+        'invalid_rows': invalid_rows
+    }
+
 @api_router.get("/workspaces/{workspace_id}/members", response_model=List[WorkspaceMember])
 async def get_workspace_members(workspace_id: str, user: dict = Depends(get_admin_user)):
     """Get all members of a workspace (admin only)"""
@@ -679,6 +1510,56 @@ async def get_workspace_members(workspace_id: str, user: dict = Depends(get_admi
     members = await db.workspace_members.find({'workspace_id': workspace_id}, {'_id': 0}).to_list(1000)
     return members
 
+# Status codes used in the workspace progress matrix, indexed by code
+PROGRESS_STATUS_CODES = ['not_submitted', 'pending', 'approved', 'rejected']
+
+@api_router.get("/workspaces/{workspace_id}/progress")
+async def get_workspace_progress(workspace_id: str, user: dict = Depends(get_admin_user)):
+    """Get a student-by-task submission status matrix for a workspace (admin only).
+
+    Rows follow student_ids, columns follow task_ids, and each cell is an
+    index into status_codes.
+    """
+    workspace = await db.workspaces.find_one({'id': workspace_id}, {'_id': 0, 'created_by': 1})
+    if not workspace:
+        raise HTTPException(status_code=404, detail="Workspace not found")
+    if workspace['created_by'] != user['id']:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    
+    # Three queries on workspace_id indexes; submissions are streamed, never held in one document
+    tasks, members = await asyncio.gather(
+        db.workspace_tasks.find(
+            {'workspace_id': workspace_id}, {'_id': 0, 'id': 1, 'title': 1}
+        ).sort('deadline', 1).to_list(None),
+        db.workspace_members.find(
+            {'workspace_id': workspace_id}, {'_id': 0, 'student_id': 1, 'student_name': 1}
+        ).sort('student_name', 1).to_list(None)
+    )
+    
+    task_columns = {task['id']: idx for idx, task in enumerate(tasks)}
+    student_rows = {member['student_id']: idx for idx, member in enumerate(members)}
+    status_codes = {name: code for code, name in enumerate(PROGRESS_STATUS_CODES)}
+    
+    matrix = [[0] * len(task_columns) for _ in student_rows]
+    submissions = db.submissions.find(
+        {'workspace_id': workspace_id}, {'_id': 0, 'task_id': 1, 'student_id': 1, 'status': 1}
+    )
+    async for submission in submissions:
+        row = student_rows.get(submission['student_id'])
+        column = task_columns.get(submission['task_id'])
+        if row is not None and column is not None:
+            matrix[row][column] = status_codes.get(submission['status'], 0)
+    
+    return {
+        'workspace_id': workspace_id,
+        'status_codes': PROGRESS_STATUS_CODES,
+        'task_ids': [task['id'] for task in tasks],
+        'task_titles': [task['title'] for task in tasks],
+        'student_ids': [member['student_id'] for member in members],
+        'student_names': [member['student_name'] for member in members],
+        'matrix': matrix
+    }
+
 # ================== ENHANCED TASK ENDPOINTS ==================
 
 @api_router.post("/workspaces/{workspace_id}/tasks", response_model=TaskWorkspace)
@@ -766,12 +1647,6 @@ async def submit_task(
     if not member:
         raise HTTPException(status_code=403, detail="Not a member of this workspace")
     
-    # Check if already submitted
-    existing = await db.submissions.find_one({
-        'task_id': task_id,
-        'student_id': user['id']
-    })
-    
     file_path = None
     submission_type = None
     
@@ -800,49 +1675,54 @@ async def submit_task(
     else:
         raise HTTPException(status_code=400, detail="Either file or link must be provided")
     
-    if existing:
+    submitted_at = datetime.now(timezone.utc).isoformat()
+    submission = {
+        'id': str(uuid.uuid4()),
+        'task_id': task_id,
+        'workspace_id': task['workspace_id'],
+        'student_id': user['id'],
+        'student_name': user['name'],
+        'submission_type': submission_type,
+        'file_path': file_path,
+        'link': link,
+        'status': 'pending',
+        'submitted_at': submitted_at,
+        'reviewed_at': None,
+        'reviewed_by': None,
+        'review_comment': None
+    }
+    
+    try:
+        # Create new submission; the unique (task_id, student_id) index rejects repeats
+        await db.submissions.insert_one(submission)
+    except DuplicateKeyError:
         # Update existing submission
         update_data = {
             'submission_type': submission_type,
             'file_path': file_path,
             'link': link,
             'status': 'pending',
-            'submitted_at': datetime.now(timezone.utc).isoformat(),
-            'reviewed_at': None,
-            'reviewed_by': None,
-            'review_comment': None
-        }
-        await db.submissions.update_one({'id': existing['id']}, {'$set': update_data})
-        existing.update(update_data)
-        return existing
-    else:
-        # Create new submission
-        submission = {
-            'id': str(uuid.uuid4()),
-            'task_id': task_id,
-            'workspace_id': task['workspace_id'],
-            'student_id': user['id'],
-            'student_name': user['name'],
-            'submission_type': submission_type,
-            'file_path': file_path,
-            'link': link,
-            'status': 'pending',
-            'submitted_at': datetime.now(timezone.utc).isoformat(),
+            'submitted_at': submitted_at,
             'reviewed_at': None,
             'reviewed_by': None,
             'review_comment': None
         }
-        await db.submissions.insert_one(submission)
-        submission.pop('_id', None)
-        
-        # Calculate points for leaderboard
-        await calculate_points_for_submission(submission['id'], task_id, user['id'])
-        
-        return submission
+        return await db.submissions.find_one_and_update(
+            {'task_id': task_id, 'student_id': user['id']},
+            {'$set': update_data},
+            projection={'_id': 0},
+            return_document=ReturnDocument.AFTER
+        )
+    
+    submission.pop('_id', None)
+    
+    # Calculate points for leaderboard
+    await calculate_points_for_submission(submission['id'], task_id, user['id'])
+    
+    return submission
 
-@api_router.get("/tasks/{task_id}/submissions", response_model=TaskSubmissionReport)
-async def get_task_submissions(task_id: str, user: dict = Depends(get_admin_user)):
-    """Get all submissions for a task (admin only)"""
+async def get_authorized_task(task_id: str, user: dict) -> dict:
+    """Fetch a workspace task, ensuring the admin owns its workspace"""
     task = await db.workspace_tasks.find_one({'id': task_id}, {'_id': 0})
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
@@ -852,23 +1732,118 @@ async def get_task_submissions(task_id: str, user: dict = Depends(get_admin_user
     if workspace['created_by'] != user['id']:
         raise HTTPException(status_code=403, detail="Not authorized")
     
-    submissions = await db.submissions.find({'task_id': task_id}, {'_id': 0}).to_list(1000)
-    total_students = await db.workspace_members.count_documents({'workspace_id': task['workspace_id']})
+    return task
+
+@api_router.get("/tasks/{task_id}/submissions", response_model=TaskSubmissionReport)
+async def get_task_submissions(
+    task_id: str,
+    summary: bool = False,
+    status_filter: Optional[str] = Query(None, alias='status'),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(1000, ge=1, le=1000),
+    user: dict = Depends(get_admin_user)
+):
+    """Get submissions for a task (admin only).
+
+    Status counts always cover the whole task; the listing is paginated and
+    can be filtered by status. With summary=true only the counts are returned.
+    """
+    task = await get_authorized_task(task_id, user)
+    
+    # Status counts come from one $match/$group covered by the (task_id, status, ...) index;
+    # the page is read in index order from (task_id, status, submitted_at) or (task_id, submitted_at)
+    status_groups, total_students = await asyncio.gather(
+        db.submissions.aggregate([
+            {'$match': {'task_id': task_id}},
+            {'$group': {'_id': '$status', 'count': {'$sum': 1}}}
+        ]).to_list(None),
+        db.workspace_members.count_documents({'workspace_id': task['workspace_id']})
+    )
+    status_counts = {group['_id']: group['count'] for group in status_groups}
+    submitted_count = sum(status_counts.values())
     
-    approved_count = sum(1 for s in submissions if s['status'] == 'approved')
-    rejected_count = sum(1 for s in submissions if s['status'] == 'rejected')
-    pending_count = sum(1 for s in submissions if s['status'] == 'pending')
+    submissions = []
+    if not summary:
+        query = {'task_id': task_id}
+        if status_filter:
+            query['status'] = status_filter
+        submissions = await db.submissions.find(query, {'_id': 0}).sort('submitted_at', 1).skip(skip).limit(limit).to_list(limit)
     
     return {
         'task': task,
         'submissions': submissions,
         'total_students': total_students,
-        'submitted_count': len(submissions),
-        'approved_count': approved_count,
-        'rejected_count': rejected_count,
-        'pending_count': pending_count
+        'submitted_count': submitted_count,
+        'approved_count': status_counts.get('approved', 0),
+        'rejected_count': status_counts.get('rejected', 0),
+        'pending_count': status_counts.get('pending', 0),
+        'skip': skip,
+        'limit': 0 if summary else limit
     }
 
+class _ZipStreamBuffer(io.RawIOBase):
+    """Write-only sink that hands zip output back to the response in chunks"""
+    def __init__(self):
+        self._chunks = []
+    
+    def writable(self):
+        return True
+    
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+    
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+def archive_entry_name(submission: dict) -> str:
+    """Build a unique, filesystem-safe name for a submission inside the archive"""
+    student_name = re.sub(r'[^A-Za-z0-9._-]+', '_', submission['student_name']).strip('_') or 'student'
+    file_extension = Path(submission['file_path']).suffix
+    return f"{student_name}_{submission['student_id'][:8]}{file_extension}"
+
+def iter_submission_archive(entries: List[tuple]):
+    """Yield a ZIP of (archive name, path) entries without holding files in memory"""
+    buffer = _ZipStreamBuffer()
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_STORED) as archive:
+        for arcname, file_path in entries:
+            if not file_path.is_file():
+                continue
+            zinfo = zipfile.ZipInfo.from_file(file_path, arcname)
+            with open(file_path, 'rb') as source, archive.open(zinfo, 'w', force_zip64=True) as target:
+                while True:
+                    chunk = source.read(ARCHIVE_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    target.write(chunk)
+                    yield buffer.drain()
+            yield buffer.drain()
+    yield buffer.drain()
+
+@api_router.get("/tasks/{task_id}/submissions/archive")
+async def download_submissions_archive(task_id: str, user: dict = Depends(get_admin_user)):
+    """Download every submitted file for a task as a single ZIP (admin only)"""
+    await get_authorized_task(task_id, user)
+    
+    submissions = await db.submissions.find(
+        {'task_id': task_id, 'file_path': {'$ne': None}},
+        {'_id': 0, 'student_id': 1, 'student_name': 1, 'file_path': 1}
+    ).to_list(None)
+    
+    entries = [
+        (archive_entry_name(s), UPLOADS_DIR / Path(s['file_path']).name)
+        for s in submissions
+    ]
+    
+    # A sync iterator is consumed in Starlette's threadpool, keeping file reads off the event loop
+    return StreamingResponse(
+        iter_submission_archive(entries),
+        media_type='application/zip',
+        headers={'Content-Disposition': f'attachment; filename="task-{task_id}-submissions.zip"'}
+    )
+
 @api_router.post("/submissions/{submission_id}/review")
 async def review_submission(
     submission_id: str,
@@ -900,14 +1875,65 @@ async def review_submission(
     
     return {'message': f'Submission {review_data.status}', 'submission_id': submission_id}
 
+@api_router.post("/tasks/{task_id}/submissions/review")
+async def review_submissions_batch(
+    task_id: str,
+    reviews: List[SubmissionBatchReviewItem],
+    user: dict = Depends(get_admin_user)
+):
+    """Approve or reject many submissions of a task at once (admin only)"""
+    await get_authorized_task(task_id, user)
+    
+    requested_ids = [review.submission_id for review in reviews]
+    existing = await db.submissions.find(
+        {'id': {'$in': requested_ids}, 'task_id': task_id},
+        {'_id': 0, 'id': 1}
+    ).to_list(None)
+    existing_ids = {s['id'] for s in existing}
+    
+    reviewed_at = datetime.now(timezone.utc).isoformat()
+    operations = []
+    results = []
+    seen_ids = set()
+    for review in reviews:
+        result = {'submission_id': review.submission_id, 'status': review.status, 'success': False}
+        if review.status not in ['approved', 'rejected']:
+            result['detail'] = "Status must be 'approved' or 'rejected'"
+        elif review.submission_id not in existing_ids:
+            result['detail'] = "Submission not found"
+        elif review.submission_id in seen_ids:
+            result['detail'] = "Duplicate submission in request"
+        else:
+            seen_ids.add(review.submission_id)
+            operations.append(UpdateOne(
+                {'id': review.submission_id},
+                {'$set': {
+                    'status': review.status,
+                    'reviewed_at': reviewed_at,
+                    'reviewed_by': user['id'],
+                    'review_comment': review.comment
+                }}
+            ))
+            result['success'] = True
+        results.append(result)
+    
+    if operations:
+        await db.submissions.bulk_write(operations, ordered=False)
+    
+    return {
+        'message': f'{len(operations)} submissions reviewed',
+        'reviewed_count': len(operations),
+        'results': results
+    }
+
 @api_router.get("/my-submissions", response_model=List[Submission])
 async def get_my_submissions(user: dict = Depends(get_current_user)):
     """Get all submissions by the current student"""
     if user['role'] != 'student':
         raise HTTPException(status_code=403, detail="Only students can view their submissions")
     
-    submissions = await db.submissions.find({'student_id': user['id']}, {'_id': 0}).to_list(1000)
-    return submissions
+    submissions = await db.submissions.find({'student_id': user['id']}, model_projection(Submission)).to_list(1000)
+    return list_response(submissions, Submission)
 
 
 # ========================================
@@ -941,13 +1967,14 @@ async def create_department_update(
     }
     
     await db.department_updates.insert_one(update)
+    await bump_collection_versions('department_updates')
     update.pop('_id', None)
     return update
 
 @api_router.get("/department-updates", response_model=List[DepartmentUpdateWithInterest])
 async def get_department_updates(
     category: Optional[str] = None,
-    user: dict = Depends(get_current_user)
+    user: dict = Depends(conditional_get_user('department_updates'))
 ):
     """Get department updates filtered by user's department and section"""
     if not user.get('department'):
@@ -959,7 +1986,7 @@ async def get_department_updates(
     if category:
         query['category'] = category
     
-    updates = await db.department_updates.find(query, {'_id': 0}).sort('created_at', -1).to_list(1000)
+    updates = await db.department_updates.find(query, model_projection(DepartmentUpdate)).sort('created_at', -1).to_list(1000)
     
     # Filter by section if user has a section
     if user.get('section'):
@@ -970,19 +1997,16 @@ async def get_department_updates(
                 filtered_updates.append(update)
         updates = filtered_updates
     
-    # Add interest/attendance info for current user
-    result = []
+    # Add interest/attendance info for current user (response_model validates the dicts once)
     for update in updates:
-        update_with_interest = DepartmentUpdateWithInterest(
-            **update,
-            is_interested=user['id'] in update.get('interested_users', []),
-            is_attending=user['id'] in update.get('attending_users', []),
-            interested_count=len(update.get('interested_users', [])),
-            attending_count=len(update.get('attending_users', []))
-        )
-        result.append(update_with_interest)
+        interested_users = update.get('interested_users', [])
+        attending_users = update.get('attending_users', [])
+        update['is_interested'] = user['id'] in interested_users
+        update['is_attending'] = user['id'] in attending_users
+        update['interested_count'] = len(interested_users)
+        update['attending_count'] = len(attending_users)
     
-    return result
+    return list_response(updates, DepartmentUpdateWithInterest)
 
 @api_router.post("/department-updates/{update_id}/interest")
 async def mark_interest(
@@ -1006,12 +2030,14 @@ async def mark_interest(
             {'id': update_id},
             {'$pull': {field: user['id']}}
         )
+        await bump_collection_versions('department_updates')
         return {'message': f'Unmarked as {action}', 'marked': False}
     else:
         await db.department_updates.update_one(
             {'id': update_id},
             {'$addToSet': {field: user['id']}}
         )
+        await bump_collection_versions('department_updates')
         return {'message': f'Marked as {action}', 'marked': True}
 
 @api_router.get("/department-updates/calendar")
@@ -1052,6 +2078,7 @@ async def delete_department_update(
         raise HTTPException(status_code=403, detail="Can only delete updates from your department")
     
     await db.department_updates.delete_one({'id': update_id})
+    await bump_collection_versions('department_updates')
     return {'message': 'Update deleted successfully'}
 
 # ========================================
@@ -1071,6 +2098,95 @@ def get_current_semester() -> str:
         # June-July transition period, use previous semester
         return f"{now.year}-1"
 
+def semester_of(timestamp: str) -> str:
+    """Semester an ISO timestamp falls in (same rule as get_current_semester and semester_expression)"""
+    month = int(timestamp[5:7])
+    return f"{timestamp[:4]}-{'2' if month >= 8 else '1'}"
+
+LEADERBOARD_COUNTERS = ['total_points', 'tasks_completed', 'tasks_on_time', 'tasks_late', 'tasks_missed', 'events_attended']
+
+def completion_rate_expression() -> dict:
+    """Aggregation expression for task_completion_rate from an entry's counters"""
+    return {'$cond': [
+        {'$gt': [{'$add': ['$tasks_completed', '$tasks_missed']}, 0]},
+        {'$round': [{'$multiply': [
+            {'$divide': ['$tasks_completed', {'$add': ['$tasks_completed', '$tasks_missed']}]},
+            100
+        ]}, 2]},
+        0.0
+    ]}
+
+async def add_leaderboard_activity(user: dict, semester: str, increments: dict, activity: dict):
+    """Add counters and an activity to a student's leaderboard entry, creating it if needed.
+    
+    A single upsert, so concurrent requests and the missed-task sweeper never
+    race an insert against the unique (user_id, semester) index. The
+    completion rate is then set only if the counters it was computed from are
+    still current; a writer that changed them in between sets its own.
+    """
+    entry = await db.leaderboard.find_one_and_update(
+        {'user_id': user['id'], 'semester': semester},
+        {
+            '$inc': increments,
+            '$set': {'last_updated': activity['timestamp']},
+            '$push': {'point_history': activity},
+            '$setOnInsert': {
+                'id': str(uuid.uuid4()),
+                'user_name': user['name'],
+                'department': user.get('department', ''),
+                'section': user.get('section'),
+                **{counter: 0 for counter in LEADERBOARD_COUNTERS if counter not in increments},
+                'task_completion_rate': 0.0,
+                'rank': 0,
+                'rank_change': 0,
+                'missed_task_ids': []
+            }
+        },
+        projection={'_id': 0, 'tasks_completed': 1, 'tasks_missed': 1},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    if 'tasks_completed' in increments:
+        total_tasks = entry['tasks_completed'] + entry['tasks_missed']
+        await db.leaderboard.update_one(
+            {
+                'user_id': user['id'],
+                'semester': semester,
+                'tasks_completed': entry['tasks_completed'],
+                'tasks_missed': entry['tasks_missed']
+            },
+            {'$set': {'task_completion_rate': round(entry['tasks_completed'] / total_tasks * 100, 2) if total_tasks else 0.0}}
+        )
+
+async def reverse_missed_penalty(task: dict, student_id: str):
+    """Take back a task's missed-task penalty once the student submits it late.
+    
+    The penalty lives in the task deadline's semester; the update only matches
+    an entry that was charged for this task, so it is applied at most once.
+    Archived entries no longer track missed_task_ids and are left to the rebuild.
+    """
+    points = POINTS_CONFIG['task_missed']
+    activity = {
+        'activity_type': 'task_missed_reversed',
+        'points': -points,
+        'description': f"Late submission for '{task['title']}' replaced the missed-task penalty",
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'related_id': task['id']
+    }
+    await db.leaderboard.update_one(
+        {'user_id': student_id, 'semester': semester_of(task['deadline']), 'missed_task_ids': task['id']},
+        [
+            {'$set': {
+                'total_points': {'$subtract': ['$total_points', points]},
+                'tasks_missed': {'$subtract': ['$tasks_missed', 1]},
+                'missed_task_ids': {'$filter': {'input': '$missed_task_ids', 'cond': {'$ne': ['$$this', task['id']]}}},
+                'point_history': {'$concatArrays': [{'$ifNull': ['$point_history', []]}, [{'$literal': activity}]]},
+                'last_updated': activity['timestamp']
+            }},
+            {'$set': {'task_completion_rate': completion_rate_expression()}}
+        ]
+    )
+
 async def calculate_points_for_submission(submission_id: str, task_id: str, student_id: str):
     """Calculate and update points when a task is submitted"""
     submission = await db.submissions.find_one({'id': submission_id})
@@ -1092,6 +2208,7 @@ async def calculate_points_for_submission(submission_id: str, task_id: str, stud
         points = POINTS_CONFIG['task_late']
         activity_type = 'task_late'
         description = f"Completed task '{task['title']}' late"
+        await reverse_missed_penalty(task, student_id)
     
     # Create activity record
     activity = {
@@ -1104,77 +2221,25 @@ async def calculate_points_for_submission(submission_id: str, task_id: str, stud
     
     # Update or create leaderboard entry
     semester = get_current_semester()
-    entry = await db.leaderboard.find_one({
-        'user_id': student_id,
-        'semester': semester
-    })
-    
-    if entry:
-        # Update existing entry
-        new_total = entry['total_points'] + points
-        new_tasks_completed = entry['tasks_completed'] + 1
-        
-        if activity_type == 'task_on_time':
-            new_tasks_on_time = entry.get('tasks_on_time', 0) + 1
-            new_tasks_late = entry.get('tasks_late', 0)
-        else:
-            new_tasks_on_time = entry.get('tasks_on_time', 0)
-            new_tasks_late = entry.get('tasks_late', 0) + 1
-        
-        # Calculate completion rate
-        total_tasks = new_tasks_completed + entry.get('tasks_missed', 0)
-        completion_rate = (new_tasks_completed / total_tasks * 100) if total_tasks > 0 else 0
-        
-        await db.leaderboard.update_one(
-            {'user_id': student_id, 'semester': semester},
-            {
-                '$set': {
-                    'total_points': new_total,
-                    'tasks_completed': new_tasks_completed,
-                    'tasks_on_time': new_tasks_on_time,
-                    'tasks_late': new_tasks_late,
-                    'task_completion_rate': round(completion_rate, 2),
-                    'last_updated': datetime.now(timezone.utc).isoformat()
-                },
-                '$push': {'point_history': activity}
-            }
-        )
-    else:
-        # Create new entry
-        completion_rate = 100.0 if activity_type == 'task_on_time' else 0.0
-        
-        new_entry = {
-            'id': str(uuid.uuid4()),
-            'user_id': student_id,
-            'user_name': user['name'],
-            'department': user.get('department', ''),
-            'section': user.get('section'),
-            'semester': semester,
-            'total_points': points,
-            'tasks_completed': 1,
-            'tasks_on_time': 1 if activity_type == 'task_on_time' else 0,
-            'tasks_late': 1 if activity_type == 'task_late' else 0,
-            'tasks_missed': 0,
-            'events_attended': 0,
-            'task_completion_rate': completion_rate,
-            'rank': 0,
-            'rank_change': 0,
-            'last_updated': datetime.now(timezone.utc).isoformat(),
-            'point_history': [activity]
-        }
-        
-        await db.leaderboard.insert_one(new_entry)
+    await add_leaderboard_activity(user, semester, {
+        'total_points': points,
+        'tasks_completed': 1,
+        'tasks_on_time': 1 if activity_type == 'task_on_time' else 0,
+        'tasks_late': 1 if activity_type == 'task_late' else 0
+    }, activity)
     
     # Recalculate ranks for the department
     await recalculate_department_ranks(user.get('department', ''), semester)
 
-async def recalculate_department_ranks(department: str, semester: str):
-    """Recalculate ranks for all users in a department"""
+async def recalculate_department_ranks(department: str, semester: str, collection=None):
+    """Recalculate ranks for all users in a department (every points change ends here)"""
+    collection = db.leaderboard if collection is None else collection
     if not department:
+        await bump_collection_versions(collection.name)
         return
     
     # Get all entries for this department and semester, sorted by points
-    entries = await db.leaderboard.find(
+    entries = await collection.find(
         {'department': department, 'semester': semester},
         {'_id': 0}
     ).sort('total_points', -1).to_list(1000)
@@ -1185,7 +2250,7 @@ async def recalculate_department_ranks(department: str, semester: str):
         new_rank = idx
         rank_change = old_rank - new_rank if old_rank > 0 else 0
         
-        await db.leaderboard.update_one(
+        await collection.update_one(
             {'user_id': entry['user_id'], 'semester': semester},
             {
                 '$set': {
@@ -1194,6 +2259,206 @@ async def recalculate_department_ranks(department: str, semester: str):
                 }
             }
         )
+    await bump_collection_versions(collection.name)
+
+async def find_members_without_submission(task_ids: List[str]) -> List[dict]:
+    """Anti-join expired tasks against their workspace members and submissions"""
+    return await db.workspace_tasks.aggregate([
+        {'$match': {'id': {'$in': task_ids}}},
+        {'$lookup': {
+            'from': 'workspace_members',
+            'localField': 'workspace_id',
+            'foreignField': 'workspace_id',
+            'as': 'member'
+        }},
+        {'$unwind': '$member'},
+        {'$lookup': {
+            'from': 'submissions',
+            'let': {'task_id': '$id', 'student_id': '$member.student_id'},
+            'pipeline': [
+                {'$match': {'$expr': {'$and': [
+                    {'$eq': ['$task_id', '$$task_id']},
+                    {'$eq': ['$student_id', '$$student_id']}
+                ]}}},
+                {'$limit': 1},
+                {'$project': {'_id': 1}}
+            ],
+            'as': 'submission'
+        }},
+        {'$match': {'submission': {'$size': 0}}},
+        {'$lookup': {
+            'from': 'users',
+            'localField': 'member.student_id',
+            'foreignField': 'id',
+            'as': 'student'
+        }},
+        {'$unwind': '$student'},
+        {'$project': {
+            '_id': 0,
+            'task_id': '$id',
+            'task_title': '$title',
+            'deadline': 1,
+            'student_id': '$member.student_id',
+            'student_name': '$student.name',
+            'department': {'$ifNull': ['$student.department', '']},
+            'section': '$student.section'
+        }}
+    ]).to_list(None)
+
+def missed_task_operations(missed: List[dict]) -> List[UpdateOne]:
+    """Build idempotent leaderboard writes for (student, task) pairs with no submission.
+
+    Penalties are charged to the semester of the task deadline, as the
+    rebuild counts them. Each student's entry is created first if needed; the
+    penalty itself only matches entries that have not already been charged for
+    that task, so a re-run after a partial failure never double counts.
+    """
+    now = datetime.now(timezone.utc).isoformat()
+    points = POINTS_CONFIG['task_missed']
+    operations = []
+    created = set()
+    for row in missed:
+        semester = semester_of(row['deadline'])
+        if (row['student_id'], semester) not in created:
+            created.add((row['student_id'], semester))
+            operations.append(UpdateOne(
+                {'user_id': row['student_id'], 'semester': semester},
+                {'$setOnInsert': {
+                    'id': str(uuid.uuid4()),
+                    'user_name': row['student_name'],
+                    'department': row['department'],
+                    'section': row.get('section'),
+                    'total_points': 0,
+                    'tasks_completed': 0,
+                    'tasks_on_time': 0,
+                    'tasks_late': 0,
+                    'tasks_missed': 0,
+                    'events_attended': 0,
+                    'task_completion_rate': 0.0,
+                    'rank': 0,
+                    'rank_change': 0,
+                    'last_updated': now,
+                    'point_history': [],
+                    'missed_task_ids': []
+                }},
+                upsert=True
+            ))
+        
+        activity = {
+            'activity_type': 'task_missed',
+            'points': points,
+            'description': f"Missed task '{row['task_title']}'",
+            'timestamp': now,
+            'related_id': row['task_id']
+        }
+        operations.append(UpdateOne(
+            {'user_id': row['student_id'], 'semester': semester, 'missed_task_ids': {'$ne': row['task_id']}},
+            [
+                {'$set': {
+                    'total_points': {'$add': ['$total_points', points]},
+                    'tasks_missed': {'$add': [{'$ifNull': ['$tasks_missed', 0]}, 1]},
+                    'missed_task_ids': {'$concatArrays': [{'$ifNull': ['$missed_task_ids', []]}, [row['task_id']]]},
+                    'point_history': {'$concatArrays': [{'$ifNull': ['$point_history', []]}, [{'$literal': activity}]]},
+                    'last_updated': now
+                }},
+                {'$set': {
+                    'task_completion_rate': {'$round': [{'$multiply': [
+                        {'$divide': ['$tasks_completed', {'$add': ['$tasks_completed', '$tasks_missed']}]},
+                        100
+                    ]}, 2]}
+                }}
+            ]
+        ))
+    return operations
+
+async def backfill_missed_task_sweep():
+    """Mark tasks that expired before the sweeper was first deployed as swept, without penalties.
+    
+    The cutoff is recorded once in app_settings, so tasks that expire later
+    are penalized normally and restarts do not move it.
+    """
+    setting = await db.app_settings.find_one_and_update(
+        {'_id': 'missed_task_sweep_since'},
+        {'$setOnInsert': {'value': datetime.now(timezone.utc).isoformat()}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    result = await db.workspace_tasks.update_many(
+        {'missed_swept_at': None, 'deadline': {'$lte': setting['value']}},
+        {'$set': {'missed_swept_at': setting['value'], 'missed_penalty_skipped': True}}
+    )
+    if result.modified_count:
+        logging.info(f"Marked {result.modified_count} tasks expired before {setting['value']} as swept without penalties")
+
+async def sweep_missed_tasks() -> dict:
+    """Apply missed-task penalties for workspace tasks whose deadline has passed.
+
+    Only tasks not yet swept are read, via the (missed_swept_at, deadline)
+    index, so each tick touches newly expired tasks only. Tasks whose
+    semester is already archived are marked swept without a penalty.
+    """
+    await backfill_missed_task_sweep()
+    now = datetime.now(timezone.utc).isoformat()
+    swept_tasks = 0
+    penalties = 0
+    departments = set()
+    archived_semesters = {}
+    
+    while True:
+        tasks = await db.workspace_tasks.find(
+            {'missed_swept_at': None, 'deadline': {'$lte': now}},
+            {'_id': 0, 'id': 1, 'deadline': 1}
+        ).sort('deadline', 1).limit(MISSED_TASK_SWEEP_BATCH_SIZE).to_list(MISSED_TASK_SWEEP_BATCH_SIZE)
+        if not tasks:
+            break
+        
+        task_ids = []
+        skipped_ids = []
+        for task in tasks:
+            semester = semester_of(task['deadline'])
+            if semester not in archived_semesters:
+                archived_semesters[semester] = (await leaderboard_collection_for(semester)).name == 'leaderboard_archive'
+            (skipped_ids if archived_semesters[semester] else task_ids).append(task['id'])
+        
+        missed = await find_members_without_submission(task_ids) if task_ids else []
+        if missed:
+            result = await db.leaderboard.bulk_write(missed_task_operations(missed), ordered=True)
+            penalties += result.modified_count
+            departments.update((row['department'], semester_of(row['deadline'])) for row in missed)
+        
+        await db.workspace_tasks.update_many(
+            {'id': {'$in': task_ids}},
+            {'$set': {'missed_swept_at': now}}
+        )
+        if skipped_ids:
+            await db.workspace_tasks.update_many(
+                {'id': {'$in': skipped_ids}},
+                {'$set': {'missed_swept_at': now, 'missed_penalty_skipped': True}}
+            )
+        swept_tasks += len(tasks)
+    
+    for department, semester in departments:
+        await recalculate_department_ranks(department, semester)
+    
+    if swept_tasks:
+        logging.info(f"Missed-task sweep processed {swept_tasks} tasks, applied {penalties} penalties")
+    return {'swept_tasks': swept_tasks, 'penalties_applied': penalties}
+
+async def run_missed_task_sweeper_periodically():
+    """Background loop that runs sweep_missed_tasks every MISSED_TASK_SWEEP_INTERVAL_MINUTES"""
+    interval = MISSED_TASK_SWEEP_INTERVAL_MINUTES * 60
+    while True:
+        try:
+            if await acquire_job_lease('missed_task_sweep', interval):
+                await sweep_missed_tasks()
+        except Exception as e:
+            logging.error(f"Missed-task sweep failed: {str(e)}")
+        await asyncio.sleep(interval)
+
+@api_router.post("/leaderboard/sweep-missed-tasks")
+async def trigger_missed_task_sweep(user: dict = Depends(get_admin_user)):
+    """Run the missed-task penalty sweep immediately (admin only)"""
+    return await sweep_missed_tasks()
 
 @api_router.post("/leaderboard/mark-attendance/{update_id}")
 async def mark_event_attendance(
@@ -1207,12 +2472,21 @@ async def mark_event_attendance(
         raise HTTPException(status_code=404, detail="Update not found")
     
     semester = get_current_semester()
+    attendance_records = []
     
     for student_id in student_ids:
         student = await db.users.find_one({'id': student_id})
         if not student:
             continue
         
+        attendance_records.append({
+            'update_id': update_id,
+            'student_id': student_id,
+            'semester': semester,
+            'marked_by': user['id'],
+            'marked_at': datetime.now(timezone.utc).isoformat()
+        })
+        
         # Add points for event participation
         activity = {
             'activity_type': 'event_participation',
@@ -1223,54 +2497,381 @@ async def mark_event_attendance(
         }
         
         # Update leaderboard
-        entry = await db.leaderboard.find_one({'user_id': student_id, 'semester': semester})
-        
-        if entry:
-            await db.leaderboard.update_one(
-                {'user_id': student_id, 'semester': semester},
-                {
-                    '$set': {
-                        'total_points': entry['total_points'] + POINTS_CONFIG['event_participation'],
-                        'events_attended': entry['events_attended'] + 1,
-                        'last_updated': datetime.now(timezone.utc).isoformat()
-                    },
-                    '$push': {'point_history': activity}
-                }
-            )
-        else:
-            new_entry = {
-                'id': str(uuid.uuid4()),
-                'user_id': student_id,
-                'user_name': student['name'],
-                'department': student.get('department', ''),
-                'section': student.get('section'),
-                'semester': semester,
-                'total_points': POINTS_CONFIG['event_participation'],
-                'tasks_completed': 0,
-                'tasks_on_time': 0,
-                'tasks_late': 0,
-                'tasks_missed': 0,
-                'events_attended': 1,
-                'task_completion_rate': 0.0,
-                'rank': 0,
-                'rank_change': 0,
-                'last_updated': datetime.now(timezone.utc).isoformat(),
-                'point_history': [activity]
-            }
-            await db.leaderboard.insert_one(new_entry)
+        await add_leaderboard_activity(student, semester, {
+            'total_points': POINTS_CONFIG['event_participation'],
+            'events_attended': 1
+        }, activity)
+    
+    # Keep the raw attendance so the leaderboard can be rebuilt from source
+    if attendance_records:
+        await db.event_attendance.insert_many(attendance_records)
     
     # Recalculate ranks
     await recalculate_department_ranks(user.get('department', ''), semester)
     
     return {'message': f'Attendance marked for {len(student_ids)} students'}
 
+def compress_activity_history(point_history: List[dict]) -> Binary:
+    """Pack a point history into a zlib-compressed JSON blob for the archive"""
+    return Binary(zlib.compress(json.dumps(point_history, separators=(',', ':')).encode('utf-8')))
+
+def decompress_activity_history(blob: Optional[bytes]) -> List[dict]:
+    """Inverse of compress_activity_history"""
+    if not blob:
+        return []
+    return json.loads(zlib.decompress(blob).decode('utf-8'))
+
+async def archive_semester(semester: str) -> int:
+    """Freeze one semester's leaderboard rows into leaderboard_archive and drop them from the hot collection.
+
+    Rows are upserted by (user_id, semester), so an interrupted rollover can
+    simply be re-run; hot rows are only deleted once all of them are archived.
+    """
+    await recalculate_department_ranks_for_semester(semester)
+    
+    archived_at = datetime.now(timezone.utc).isoformat()
+    archived_count = 0
+    operations = []
+    cursor = db.leaderboard.find({'semester': semester}, {'_id': 0, 'missed_task_ids': 0})
+    async for entry in cursor:
+        entry['activity_history'] = compress_activity_history(entry.pop('point_history', []))
+        entry['archived_at'] = archived_at
+        operations.append(ReplaceOne(
+            {'user_id': entry['user_id'], 'semester': semester},
+            entry,
+            upsert=True
+        ))
+        if len(operations) >= SEMESTER_ROLLOVER_BATCH_SIZE:
+            await db.leaderboard_archive.bulk_write(operations, ordered=False)
+            archived_count += len(operations)
+            operations = []
+    if operations:
+        await db.leaderboard_archive.bulk_write(operations, ordered=False)
+        archived_count += len(operations)
+    
+    await db.leaderboard.delete_many({'semester': semester})
+    await bump_collection_versions('leaderboard', 'leaderboard_archive')
+    return archived_count
+
+async def recalculate_department_ranks_for_semester(semester: str):
+    """Settle final ranks for every department before a semester is frozen"""
+    departments = await db.leaderboard.distinct('department', {'semester': semester})
+    for department in departments:
+        await recalculate_department_ranks(department, semester)
+
+async def rollover_semesters() -> dict:
+    """Archive every semester other than the current one out of the hot leaderboard"""
+    current_semester = get_current_semester()
+    stale_semesters = await db.leaderboard.distinct('semester', {'semester': {'$ne': current_semester}})
+    
+    archived = {}
+    for semester in sorted(stale_semesters):
+        archived[semester] = await archive_semester(semester)
+        logging.info(f"Archived {archived[semester]} leaderboard entries for semester {semester}")
+    return {'current_semester': current_semester, 'archived': archived}
+
+async def run_semester_rollover_periodically():
+    """Background loop that runs rollover_semesters every SEMESTER_ROLLOVER_INTERVAL_HOURS"""
+    interval = SEMESTER_ROLLOVER_INTERVAL_HOURS * 3600
+    while True:
+        try:
+            if await acquire_job_lease('semester_rollover', interval):
+                await rollover_semesters()
+        except Exception as e:
+            logging.error(f"Semester rollover failed: {str(e)}")
+        await asyncio.sleep(interval)
+
+async def leaderboard_collection_for(semester: str):
+    """Return the collection holding a semester's leaderboard (hot or archive)"""
+    if semester != get_current_semester():
+        archived = await db.leaderboard_archive.find_one({'semester': semester}, {'_id': 1})
+        if archived:
+            return db.leaderboard_archive
+    return db.leaderboard
+
+@api_router.post("/leaderboard/rollover")
+async def trigger_semester_rollover(user: dict = Depends(get_admin_user)):
+    """Archive past semesters immediately (admin only)"""
+    return await rollover_semesters()
+
+# Counter fields recomputed by the leaderboard rebuild
+REBUILT_LEADERBOARD_FIELDS = [
+    'total_points', 'tasks_completed', 'tasks_on_time', 'tasks_late',
+    'tasks_missed', 'events_attended', 'task_completion_rate'
+]
+
+def semester_expression(date_field: str) -> dict:
+    """Aggregation equivalent of get_current_semester for an ISO date field"""
+    month = {'$toInt': {'$substrBytes': [date_field, 5, 2]}}
+    return {'$concat': [
+        {'$substrBytes': [date_field, 0, 4]},
+        '-',
+        {'$cond': [{'$gte': [month, 8]}, '2', '1']}
+    ]}
+
+def leaderboard_source_pipeline() -> List[dict]:
+    """Aggregation (run on submissions) that recomputes every (user, semester) entry into leaderboard_rebuild"""
+    completed_tasks = {'$add': ['$tasks_on_time', '$tasks_late']}
+    return [
+        # On-time and late submissions
+        {'$lookup': {
+            'from': 'workspace_tasks',
+            'localField': 'task_id',
+            'foreignField': 'id',
+            'as': 'task'
+        }},
+        {'$unwind': '$task'},
+        {'$project': {
+            '_id': 0,
+            'user_id': '$student_id',
+            'semester': semester_expression('$submitted_at'),
+            'on_time': {'$cond': [{'$lte': ['$submitted_at', '$task.deadline']}, 1, 0]},
+            'late': {'$cond': [{'$gt': ['$submitted_at', '$task.deadline']}, 1, 0]},
+            'missed': {'$literal': 0},
+            'missed_task_id': {'$literal': None},
+            'events': {'$literal': 0}
+        }},
+        # Tasks the sweeper charged to members who never submitted. Expired tasks it
+        # has not reached yet are left to it (rebuild_leaderboard sweeps first), so
+        # the rebuild and the sweeper never both count the same miss
+        {'$unionWith': {'coll': 'workspace_tasks', 'pipeline': [
+            {'$match': {'missed_swept_at': {'$ne': None}, 'missed_penalty_skipped': {'$ne': True}}},
+            {'$lookup': {
+                'from': 'workspace_members',
+                'localField': 'workspace_id',
+                'foreignField': 'workspace_id',
+                'as': 'member'
+            }},
+            {'$unwind': '$member'},
+            {'$lookup': {
+                'from': 'submissions',
+                'let': {'task_id': '$id', 'student_id': '$member.student_id'},
+                'pipeline': [
+                    {'$match': {'$expr': {'$and': [
+                        {'$eq': ['$task_id', '$$task_id']},
+                        {'$eq': ['$student_id', '$$student_id']}
+                    ]}}},
+                    {'$limit': 1},
+                    {'$project': {'_id': 1}}
+                ],
+                'as': 'submission'
+            }},
+            {'$match': {'submission': {'$size': 0}}},
+            {'$project': {
+                '_id': 0,
+                'user_id': '$member.student_id',
+                'semester': semester_expression('$deadline'),
+                'on_time': {'$literal': 0},
+                'late': {'$literal': 0},
+                'missed': {'$literal': 1},
+                'missed_task_id': '$id',
+                'events': {'$literal': 0}
+            }}
+        ]}},
+        # Event attendance
+        {'$unionWith': {'coll': 'event_attendance', 'pipeline': [
+            {'$project': {
+                '_id': 0,
+                'user_id': '$student_id',
+                'semester': 1,
+                'on_time': {'$literal': 0},
+                'late': {'$literal': 0},
+                'missed': {'$literal': 0},
+                'missed_task_id': {'$literal': None},
+                'events': {'$literal': 1}
+            }}
+        ]}},
+        {'$group': {
+            '_id': {'user_id': '$user_id', 'semester': '$semester'},
+            'tasks_on_time': {'$sum': '$on_time'},
+            'tasks_late': {'$sum': '$late'},
+            'tasks_missed': {'$sum': '$missed'},
+            'missed_task_ids': {'$push': '$missed_task_id'},
+            'events_attended': {'$sum': '$events'}
+        }},
+        {'$lookup': {
+            'from': 'users',
+            'localField': '_id.user_id',
+            'foreignField': 'id',
+            'as': 'user'
+        }},
+        {'$unwind': '$user'},
+        {'$project': {
+            '_id': 0,
+            'user_id': '$_id.user_id',
+            'semester': '$_id.semester',
+            'user_name': '$user.name',
+            'department': {'$ifNull': ['$user.department', '']},
+            'section': '$user.section',
+            'tasks_on_time': 1,
+            'tasks_late': 1,
+            'tasks_missed': 1,
+            'missed_task_ids': {'$filter': {'input': '$missed_task_ids', 'cond': {'$ne': ['$$this', None]}}},
+            'events_attended': 1,
+            'tasks_completed': completed_tasks,
+            'total_points': {'$add': [
+                {'$multiply': ['$tasks_on_time', POINTS_CONFIG['task_on_time']]},
+                {'$multiply': ['$tasks_late', POINTS_CONFIG['task_late']]},
+                {'$multiply': ['$tasks_missed', POINTS_CONFIG['task_missed']]},
+                {'$multiply': ['$events_attended', POINTS_CONFIG['event_participation']]}
+            ]},
+            'task_completion_rate': {'$cond': [
+                {'$gt': [{'$add': [completed_tasks, '$tasks_missed']}, 0]},
+                {'$round': [{'$multiply': [
+                    {'$divide': [completed_tasks, {'$add': [completed_tasks, '$tasks_missed']}]},
+                    100
+                ]}, 2]},
+                0.0
+            ]}
+        }},
+        {'$merge': {
+            'into': 'leaderboard_rebuild',
+            'on': ['user_id', 'semester'],
+            'whenMatched': 'replace',
+            'whenNotMatched': 'insert'
+        }}
+    ]
+
+async def diff_rebuilt_leaderboard(target, semester_match: dict, sample_size: int) -> dict:
+    """Stream rebuilt entries whose counters differ from those stored in target"""
+    current_fields = {field: 1 for field in REBUILT_LEADERBOARD_FIELDS}
+    mismatch = {'$or': [
+        {'$ne': [f'${field}', {'$arrayElemAt': [f'$current.{field}', 0]}]}
+        for field in REBUILT_LEADERBOARD_FIELDS
+    ]}
+    cursor = db.leaderboard_rebuild.aggregate([
+        {'$match': semester_match},
+        {'$lookup': {
+            'from': target.name,
+            'let': {'user_id': '$user_id', 'semester': '$semester'},
+            'pipeline': [
+                {'$match': {'$expr': {'$and': [
+                    {'$eq': ['$user_id', '$$user_id']},
+                    {'$eq': ['$semester', '$$semester']}
+                ]}}},
+                {'$project': {'_id': 0, **current_fields}}
+            ],
+            'as': 'current'
+        }},
+        {'$match': {'$expr': {'$or': [{'$eq': [{'$size': '$current'}, 0]}, mismatch]}}},
+        {'$project': {'_id': 0, 'user_id': 1, 'semester': 1, 'current': 1, **current_fields}}
+    ], allowDiskUse=True)
+    
+    changed_count = 0
+    missing_count = 0
+    samples = []
+    async for row in cursor:
+        current = row.pop('current')
+        if not current:
+            missing_count += 1
+        else:
+            changed_count += 1
+        if len(samples) < sample_size:
+            samples.append({
+                'user_id': row['user_id'],
+                'semester': row['semester'],
+                'current': current[0] if current else None,
+                'rebuilt': {field: row.get(field) for field in REBUILT_LEADERBOARD_FIELDS}
+            })
+    return {'changed_count': changed_count, 'missing_count': missing_count, 'samples': samples}
+
+async def apply_rebuilt_leaderboard(target, semester_match: dict):
+    """Merge rebuilt counters into target, keeping ids and history of existing rows, then re-rank.
+    
+    New rows take the shape of target: hot rows start an empty point_history,
+    archive rows get archived_at (their history lives in activity_history).
+    Every (semester, department) the rebuild touched is re-ranked in target.
+    Only the hot leaderboard keeps missed_task_ids, which the sweeper and
+    reverse_missed_penalty match on.
+    """
+    now = datetime.now(timezone.utc).isoformat()
+    merged_fields = list(REBUILT_LEADERBOARD_FIELDS)
+    new_row_fields = {
+        'id': {'$toString': '$_id'},
+        'rank': {'$literal': 0},
+        'rank_change': {'$literal': 0},
+        'last_updated': now
+    }
+    if target.name == 'leaderboard_archive':
+        new_row_fields['archived_at'] = now
+        dropped_fields = {'_id': 0, 'missed_task_ids': 0}
+    else:
+        new_row_fields['point_history'] = {'$literal': []}
+        merged_fields.append('missed_task_ids')
+        dropped_fields = {'_id': 0}
+    await db.leaderboard_rebuild.aggregate([
+        {'$match': semester_match},
+        {'$set': new_row_fields},
+        {'$project': dropped_fields},
+        {'$merge': {
+            'into': target.name,
+            'on': ['user_id', 'semester'],
+            'whenMatched': [{'$set': {
+                **{field: f'$$new.{field}' for field in merged_fields},
+                'last_updated': now
+            }}],
+            'whenNotMatched': 'insert'
+        }}
+    ], allowDiskUse=True).to_list(None)
+    
+    touched = await db.leaderboard_rebuild.aggregate([
+        {'$match': semester_match},
+        {'$group': {'_id': {'semester': '$semester', 'department': '$department'}}}
+    ]).to_list(None)
+    for group in touched:
+        await recalculate_department_ranks(group['_id']['department'], group['_id']['semester'], target)
+    await bump_collection_versions(target.name)
+
+async def rebuild_leaderboard(dry_run: bool = True, sample_size: int = 20) -> dict:
+    """Recompute every leaderboard entry from submissions, task deadlines and event attendance.
+
+    The recomputation is a single server-side aggregation merged into the
+    leaderboard_rebuild staging collection, so memory use in the API process
+    is bounded by the diff sample size. Unless dry_run is set, the rebuilt
+    counters are then merged into the hot leaderboard (current semester) and
+    the archive (past semesters), and every semester it touched is re-ranked.
+    Missed tasks are counted once the sweeper has charged them, so a real run
+    sweeps first; a dry run compares against what is charged so far.
+    """
+    # Charge expired tasks before rolling over, so their semester is still hot;
+    # past semesters must then live only in the archive before counters are merged into it
+    if not dry_run:
+        await sweep_missed_tasks()
+        await rollover_semesters()
+    current_semester = get_current_semester()
+    
+    await db.leaderboard_rebuild.drop()
+    await db.leaderboard_rebuild.create_index([('user_id', 1), ('semester', 1)], unique=True)
+    await db.submissions.aggregate(leaderboard_source_pipeline(), allowDiskUse=True).to_list(None)
+    
+    targets = [
+        (db.leaderboard, {'semester': current_semester}),
+        (db.leaderboard_archive, {'semester': {'$ne': current_semester}})
+    ]
+    report = {'dry_run': dry_run, 'rebuilt_count': await db.leaderboard_rebuild.count_documents({})}
+    for target, semester_match in targets:
+        report[target.name] = await diff_rebuilt_leaderboard(target, semester_match, sample_size)
+        if not dry_run:
+            await apply_rebuilt_leaderboard(target, semester_match)
+    
+    logging.info(
+        f"Leaderboard rebuild {'(dry run) ' if dry_run else ''}recomputed {report['rebuilt_count']} entries, "
+        f"{report['leaderboard']['changed_count']} current entries differ"
+    )
+    return report
+
+@api_router.post("/leaderboard/rebuild")
+async def trigger_leaderboard_rebuild(dry_run: bool = True, user: dict = Depends(get_admin_user)):
+    """Recompute the leaderboard from source data and report differences (admin only)"""
+    return await rebuild_leaderboard(dry_run=dry_run)
+
 @api_router.get("/leaderboard", response_model=List[LeaderboardEntry])
 async def get_leaderboard(
     department: Optional[str] = None,
     section: Optional[str] = None,
     semester: Optional[str] = None,
     limit: int = 10,
-    user: dict = Depends(get_current_user)
+    user: dict = Depends(conditional_get_user('leaderboard', 'leaderboard_archive'))
 ):
     """Get leaderboard filtered by department, section, semester"""
     # Use current semester if not specified
@@ -1289,9 +2890,13 @@ async def get_leaderboard(
         query['section'] = section
     
     # Get leaderboard entries sorted by rank
-    entries = await db.leaderboard.find(query, {'_id': 0}).sort('rank', 1).limit(limit).to_list(limit)
+    collection = await leaderboard_collection_for(semester)
+    entries = await collection.find(
+        query,
+        model_projection(LeaderboardEntry)
+    ).sort('rank', 1).limit(limit).to_list(limit)
     
-    return entries
+    return list_response(entries, LeaderboardEntry)
 
 @api_router.get("/leaderboard/my-stats", response_model=LeaderboardStats)
 async def get_my_leaderboard_stats(
@@ -1302,7 +2907,8 @@ async def get_my_leaderboard_stats(
     if not semester:
         semester = get_current_semester()
     
-    entry = await db.leaderboard.find_one(
+    collection = await leaderboard_collection_for(semester)
+    entry = await collection.find_one(
         {'user_id': user['id'], 'semester': semester},
         {'_id': 0}
     )
@@ -1321,7 +2927,10 @@ async def get_my_leaderboard_stats(
         )
     
     # Get recent activities (last 10)
-    recent_activities = entry.get('point_history', [])[-10:]
+    if 'activity_history' in entry:
+        recent_activities = decompress_activity_history(entry['activity_history'])[-10:]
+    else:
+        recent_activities = entry.get('point_history', [])[-10:]
     
     return LeaderboardStats(
         user_id=entry['user_id'],
@@ -1351,14 +2960,349 @@ async def get_top_performers(
     if department:
         query['department'] = department
     
-    top_10 = await db.leaderboard.find(query, {'_id': 0}).sort('rank', 1).limit(10).to_list(10)
+    collection = await leaderboard_collection_for(semester)
+    top_10 = await collection.find(
+        query,
+        {'_id': 0, 'point_history': 0, 'activity_history': 0}
+    ).sort('rank', 1).limit(10).to_list(10)
     
     return top_10
 
 
+# ========================================
+# UPLOAD MAINTENANCE
+# ========================================
+
+def scan_upload_batches(batch_size: int, cutoff: float):
+    """Yield batches of (filename, size) for uploads last modified before the cutoff"""
+    batch = []
+    with os.scandir(UPLOADS_DIR) as entries:
+        for entry in entries:
+            if not entry.is_file(follow_symlinks=False):
+                continue
+            stat = entry.stat(follow_symlinks=False)
+            if stat.st_mtime > cutoff:
+                continue
+            batch.append((entry.name, stat.st_size))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+async def find_referenced_uploads(file_paths: List[str]) -> set:
+    """Return the subset of upload paths still referenced by a material or submission"""
+    referenced = set()
+    for collection in (db.materials, db.submissions):
+        docs = await collection.find(
+            {'file_path': {'$in': file_paths}},
+            {'_id': 0, 'file_path': 1}
+        ).to_list(None)
+        referenced.update(doc['file_path'] for doc in docs)
+    return referenced
+
+def remove_upload_files(filenames: List[str]) -> List[str]:
+    """Delete uploads by name, returning the ones actually removed"""
+    removed = []
+    for filename in filenames:
+        try:
+            (UPLOADS_DIR / filename).unlink()
+            removed.append(filename)
+        except FileNotFoundError:
+            continue
+    return removed
+
+async def collect_orphaned_uploads(
+    dry_run: bool = True,
+    grace_period_hours: float = UPLOAD_GC_GRACE_HOURS,
+    batch_size: int = UPLOAD_GC_BATCH_SIZE
+) -> dict:
+    """Delete uploaded files no longer referenced by materials or submissions.
+
+    Files newer than the grace period are left alone so uploads whose DB
+    record is still being written are never collected.
+    """
+    cutoff = time.time() - grace_period_hours * 3600
+    batches = scan_upload_batches(batch_size, cutoff)
+    scanned_count = 0
+    orphaned = []
+    bytes_reclaimed = 0
+    
+    while True:
+        # Directory reads happen in a worker thread, one batch at a time
+        batch = await asyncio.to_thread(next, batches, None)
+        if batch is None:
+            break
+        scanned_count += len(batch)
+        
+        referenced = await find_referenced_uploads([f"/uploads/{name}" for name, _ in batch])
+        candidates = {name: size for name, size in batch if f"/uploads/{name}" not in referenced}
+        if not candidates:
+            continue
+        
+        if dry_run:
+            removed = list(candidates)
+        else:
+            removed = await asyncio.to_thread(remove_upload_files, list(candidates))
+        orphaned.extend(removed)
+        bytes_reclaimed += sum(candidates[name] for name in removed)
+    
+    logging.info(
+        f"Upload GC {'(dry run) ' if dry_run else ''}scanned {scanned_count} files, "
+        f"{len(orphaned)} orphaned, {bytes_reclaimed} bytes reclaimed"
+    )
+    return {
+        'dry_run': dry_run,
+        'scanned_count': scanned_count,
+        'orphaned_count': len(orphaned),
+        'bytes_reclaimed': bytes_reclaimed,
+        'orphaned_files': orphaned
+    }
+
+async def run_upload_gc_periodically():
+    """Background loop that collects orphaned uploads every UPLOAD_GC_INTERVAL_HOURS"""
+    interval = UPLOAD_GC_INTERVAL_HOURS * 3600
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            if await acquire_job_lease('upload_gc', interval):
+                await collect_orphaned_uploads(dry_run=False)
+        except Exception as e:
+            logging.error(f"Upload GC failed: {str(e)}")
+
+@api_router.post("/admin/uploads/gc")
+async def garbage_collect_uploads(
+    dry_run: bool = True,
+    grace_period_hours: float = UPLOAD_GC_GRACE_HOURS,
+    user: dict = Depends(get_admin_user)
+):
+    """Find (and optionally delete) orphaned upload files (admin only)"""
+    if grace_period_hours < 0:
+        raise HTTPException(status_code=400, detail="Grace period must not be negative")
+    return await collect_orphaned_uploads(dry_run=dry_run, grace_period_hours=grace_period_hours)
+
+# ========================================
+# SLOW QUERY LOG
+# ========================================
+
+async def ensure_slow_query_log():
+    """Create the capped slow_queries collection if it does not exist yet"""
+    try:
+        await db.create_collection('slow_queries', capped=True, size=SLOW_QUERY_LOG_SIZE_MB * 1024 * 1024)
+    except CollectionInvalid:
+        pass
+
+async def explain_slow_query(database: str, command: dict) -> dict:
+    """Run a queryPlanner explain for a recorded command and summarize its winning plan"""
+    try:
+        result = await client[database].command({'explain': command, 'verbosity': 'queryPlanner'})
+    except OperationFailure as e:
+        return {'error': str(e)}
+    stages = winning_plan_stages(result)
+    return {'stages': stages, 'collscan': 'COLLSCAN' in stages}
+
+async def flush_slow_queries() -> int:
+    """Explain the sampled slow commands recorded so far and write them all to slow_queries"""
+    entries = slow_query_recorder.drain()
+    if not entries:
+        return 0
+    
+    for entry in entries:
+        explain_command = entry.pop('explain_command')
+        entry['explain'] = await explain_slow_query(entry['database'], explain_command) if explain_command else None
+        entry['collscan'] = entry['explain'].get('collscan') if entry['explain'] else None
+        # Stored as JSON text: operator keys like $match are not valid field names on every server version
+        entry['command'] = json.dumps(entry['command'], default=str)
+        if entry['collscan']:
+            logging.warning(
+                f"COLLSCAN on {entry['collection']} ({entry['command_name']}, {entry['duration_ms']}ms) "
+                f"from {entry['method'] or ''} {entry['route']}"
+            )
+    
+    await db.slow_queries.insert_many(entries)
+    return len(entries)
+
+async def run_slow_query_flush_periodically():
+    """Background loop that persists recorded slow queries every SLOW_QUERY_FLUSH_SECONDS"""
+    while True:
+        await asyncio.sleep(SLOW_QUERY_FLUSH_SECONDS)
+        try:
+            await flush_slow_queries()
+        except Exception as e:
+            logging.error(f"Slow query flush failed: {str(e)}")
+
+@api_router.get("/admin/slow-queries")
+async def get_slow_queries(
+    limit: int = Query(100, ge=1, le=1000),
+    route: Optional[str] = None,
+    collection: Optional[str] = None,
+    collscan_only: bool = False,
+    user: dict = Depends(get_admin_user)
+):
+    """Most recent slow Mongo commands, newest first (admin only)"""
+    await flush_slow_queries()
+    query = {}
+    if route:
+        query['route'] = route
+    if collection:
+        query['collection'] = collection
+    if collscan_only:
+        query['collscan'] = True
+    
+    return await db.slow_queries.find(query, {'_id': 0}).sort('$natural', -1).limit(limit).to_list(limit)
+
+# ========================================
+# PROFILING
+# ========================================
+
+profile_lock = asyncio.Lock()
+# Per-request profiles by id, oldest evicted first
+request_profiles = OrderedDict()
+
+def profile_download(sampler: StackSampler, name: str) -> PlainTextResponse:
+    """Collapsed stacks as a file flamegraph.pl / speedscope can open"""
+    return PlainTextResponse(
+        sampler.collapsed(),
+        headers={
+            'Content-Disposition': f'attachment; filename="{name}.folded"',
+            'X-Profile-Samples': str(sampler.sample_count)
+        }
+    )
+
+def ensure_profiling_enabled():
+    if not PROFILING_ENABLED:
+        raise HTTPException(status_code=404, detail="Profiling is disabled")
+
+@api_router.post("/admin/profile")
+async def profile_process(
+    seconds: float = Query(10, gt=0, le=PROFILE_MAX_SECONDS),
+    interval_ms: float = Query(PROFILE_SAMPLE_INTERVAL_MS, ge=1, le=1000),
+    user: dict = Depends(get_admin_user)
+):
+    """Sample the event loop's stacks for a number of seconds and download them (admin only)"""
+    ensure_profiling_enabled()
+    if profile_lock.locked():
+        raise HTTPException(status_code=409, detail="A profile is already running")
+    
+    async with profile_lock:
+        sampler = StackSampler(threading.get_ident(), interval_ms / 1000).start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            sampler.stop()
+    
+    logging.info(f"Profile by {user['email']}: {sampler.sample_count} samples over {sampler.duration:.1f}s")
+    return profile_download(sampler, f"profile-{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S')}")
+
+@api_router.get("/admin/profiles/{profile_id}")
+async def get_request_profile(profile_id: str, user: dict = Depends(get_admin_user)):
+    """Download the profile of a request sent with the X-Profile header (admin only)"""
+    ensure_profiling_enabled()
+    sampler = request_profiles.get(profile_id)
+    if not sampler:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return profile_download(sampler, f"request-{profile_id}")
+
+
+# ========================================
+# HEALTH CHECKS
+# ========================================
+
+@api_router.get("/health/live")
+async def liveness():
+    """Liveness probe: the process is up and serving requests"""
+    return {'status': 'alive'}
+
+@api_router.get("/health/ready")
+async def readiness():
+    """Readiness probe: startup has finished and Mongo answers a ping"""
+    if not getattr(app.state, 'ready', False):
+        raise HTTPException(status_code=503, detail="Starting up")
+    try:
+        await asyncio.wait_for(client.admin.command('ping'), READINESS_PING_TIMEOUT_SECONDS)
+    except (PyMongoError, asyncio.TimeoutError) as e:
+        logging.error(f"Readiness check failed: {str(e)}")
+        raise HTTPException(status_code=503, detail="Database unavailable")
+    # Missing unique indexes need an operator (dedupe_unique_keys.py), not a restart, so they are reported only
+    return {'status': 'ready', 'cold_start': app.state.cold_start, 'missing_unique_indexes': missing_unique_indexes}
+
 # Include router
 app.include_router(api_router)
 
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Time each request and count the Mongo commands it issues"""
+    stats = RequestStats(request.method, request.scope)
+    token = current_request_stats.set(stats)
+    start = time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        current_request_stats.reset(token)
+    elapsed = time.perf_counter() - start
+    
+    # Label by route template so ids in paths don't explode cardinality
+    route_path = stats.route
+    request_latency.observe((request.method, route_path, str(response.status_code)), elapsed)
+    request_mongo_commands.observe((request.method, route_path), stats.mongo_commands)
+    
+    response.headers['Server-Timing'] = (
+        f'app;dur={elapsed * 1000:.1f}, '
+        f'mongo;dur={stats.mongo_seconds * 1000:.1f};desc="{stats.mongo_commands} commands"'
+    )
+    return response
+
+def is_admin_request(request: Request) -> bool:
+    authorization = request.headers.get('authorization', '')
+    if not authorization.lower().startswith('bearer '):
+        return False
+    try:
+        return decode_token(authorization[7:]).get('role') == 'admin'
+    except HTTPException:
+        return False
+
+@app.middleware("http")
+async def profile_flagged_requests(request: Request, call_next):
+    """Profile a single request when an admin sends the X-Profile header
+    
+    The sampler sees the whole event loop, so concurrent requests show up in
+    the same profile; use it on a quiet instance for targeted traces.
+    """
+    if not PROFILING_ENABLED or not request.headers.get(PROFILE_HEADER) or not is_admin_request(request):
+        return await call_next(request)
+    
+    sampler = StackSampler(threading.get_ident(), PROFILE_SAMPLE_INTERVAL_MS / 1000).start()
+    try:
+        response = await call_next(request)
+    finally:
+        sampler.stop()
+    
+    profile_id = uuid.uuid4().hex
+    request_profiles[profile_id] = sampler
+    while len(request_profiles) > REQUEST_PROFILES_KEPT:
+        request_profiles.popitem(last=False)
+    response.headers['X-Profile-Id'] = profile_id
+    return response
+
+@app.middleware("http")
+async def add_conditional_get_headers(request: Request, call_next):
+    """Attach the ETag computed by conditional_get_user to successful responses"""
+    response = await call_next(request)
+    etag = getattr(request.state, 'etag', None)
+    if etag and response.status_code == 200:
+        response.headers['ETag'] = etag
+        response.headers['Cache-Control'] = CONDITIONAL_GET_CACHE_CONTROL
+    return response
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics(credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security)):
+    """Prometheus metrics for this process (scrapers authenticate with METRICS_TOKEN)"""
+    if not METRICS_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not credentials or not secrets.compare_digest(credentials.credentials, METRICS_TOKEN):
+        raise HTTPException(status_code=401, detail="Invalid metrics token", headers={'WWW-Authenticate': 'Bearer'})
+    return PlainTextResponse(render_prometheus(), media_type='text/plain; version=0.0.4')
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
@@ -1374,6 +3318,185 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    client.close()
\ No newline at end of file
+# Unique indexes that could not be built, reported by readiness and /metrics
+missing_unique_indexes: List[str] = []
+
+# Unique indexes and which document dedupe_unique_keys.py keeps when existing
+# rows share a key: stages that sort the survivor first, or None to only report
+UNIQUE_KEY_DEDUPE_RULES = [
+    # Keep the reviewed submission (points may have been awarded for it), then the latest
+    ('submissions', [('task_id', 1), ('student_id', 1)], [
+        {'$addFields': {'_keep_rank': {'$switch': {
+            'branches': [
+                {'case': {'$eq': ['$status', 'approved']}, 'then': 0},
+                {'case': {'$eq': ['$status', 'rejected']}, 'then': 1}
+            ],
+            'default': 2
+        }}}},
+        {'$sort': {'_keep_rank': 1, 'submitted_at': -1, '_id': -1}}
+    ], ['id', 'status', 'submitted_at', 'reviewed_at']),
+    ('workspace_members', [('workspace_id', 1), ('student_id', 1)],
+     [{'$sort': {'joined_at': 1, '_id': 1}}], ['id', 'joined_at']),
+    ('task_completions', [('task_id', 1), ('student_id', 1)],
+     [{'$sort': {'completed_at': 1, '_id': 1}}], ['id', 'completed_at']),
+    # Accounts own other data, so duplicates are only reported and must be merged by hand
+    ('users', [('email', 1)], None, ['id', 'role', 'created_at'])
+]
+
+async def dedupe_unique_keys(dry_run: bool = True, sample_size: int = 20) -> dict:
+    """Report documents that share a unique key and, unless dry_run, delete all but one of each group.
+    
+    Run through dedupe_unique_keys.py before building the unique indexes on
+    a database written by versions without them; startup never deletes data.
+    """
+    report = {'dry_run': dry_run, 'collections': {}}
+    for collection_name, keys, keep_first, fields in UNIQUE_KEY_DEDUPE_RULES:
+        collection = db[collection_name]
+        groups = collection.aggregate([
+            *(keep_first or []),
+            {'$group': {
+                '_id': {field: f'${field}' for field, _ in keys},
+                'documents': {'$push': {'_id': '$_id', **{field: {'$ifNull': [f'${field}', None]} for field in fields}}},
+                'count': {'$sum': 1}
+            }},
+            {'$match': {'count': {'$gt': 1}}}
+        ], allowDiskUse=True)
+        
+        summary = {'duplicate_keys': 0, 'extra_documents': 0, 'removed': 0, 'samples': []}
+        async for group in groups:
+            extra = group['documents'][1:]
+            summary['duplicate_keys'] += 1
+            summary['extra_documents'] += len(extra)
+            if len(summary['samples']) < sample_size:
+                documents = [{k: v for k, v in doc.items() if k != '_id'} for doc in group['documents']]
+                if keep_first:
+                    summary['samples'].append({'key': group['_id'], 'keep': documents[0], 'remove': documents[1:]})
+                else:
+                    summary['samples'].append({'key': group['_id'], 'documents': documents})
+            if keep_first and not dry_run:
+                result = await collection.delete_many({'_id': {'$in': [doc['_id'] for doc in extra]}})
+                summary['removed'] += result.deleted_count
+        if not keep_first:
+            summary['action'] = 'report only, merge these by hand'
+        report['collections'][collection_name] = summary
+    return report
+
+async def convert_index_to_unique(collection, keys):
+    """Make an existing non-unique index unique in place (MongoDB 6.0+), so it is never dropped"""
+    for option in ('prepareUnique', 'unique'):
+        await db.command('collMod', collection.name, index={'keyPattern': dict(keys), option: True})
+
+async def create_unique_index(collection, keys):
+    """Create a unique index that write paths rely on to reject repeats.
+    
+    Existing duplicates are never removed here; an index that cannot be built
+    is logged and recorded in missing_unique_indexes until dedupe_unique_keys.py
+    has been run.
+    """
+    try:
+        await collection.create_index(keys, unique=True)
+        return
+    except OperationFailure as e:
+        error = e
+        if e.code == 85:  # IndexOptionsConflict: a non-unique index with the same keys exists
+            try:
+                await convert_index_to_unique(collection, keys)
+                return
+            except OperationFailure as conversion_error:
+                error = conversion_error
+    logging.error(
+        f"Could not create unique index {keys} on {collection.name}: {str(error)}. "
+        f"Run dedupe_unique_keys.py to review and remove duplicates"
+    )
+    missing_unique_indexes.append(f"{collection.name}({', '.join(field for field, _ in keys)})")
+    missing_unique_indexes_gauge.set(len(missing_unique_indexes))
+
+async def ensure_indexes():
+    """Create the indexes queries and background jobs rely on"""
+    missing_unique_indexes.clear()
+    missing_unique_indexes_gauge.set(0)
+    await db.materials.create_index('file_path')
+    await db.submissions.create_index('file_path')
+    await db.submissions.create_index([('task_id', 1), ('status', 1), ('submitted_at', 1)])
+    await db.submissions.create_index([('task_id', 1), ('submitted_at', 1)])
+    await db.submissions.create_index('workspace_id')
+    await db.workspace_tasks.create_index('workspace_id')
+    await db.workspace_members.create_index('workspace_id')
+    await create_unique_index(db.submissions, [('task_id', 1), ('student_id', 1)])
+    await create_unique_index(db.workspace_members, [('workspace_id', 1), ('student_id', 1)])
+    await create_unique_index(db.task_completions, [('task_id', 1), ('student_id', 1)])
+    await create_unique_index(db.workspaces, [('invite_code', 1)])
+    await create_unique_index(db.users, [('email', 1)])
+    await db.users.create_index('id')
+    await create_unique_index(db.refresh_tokens, [('token_hash', 1)])
+    await db.refresh_tokens.create_index('family_id')
+    await db.refresh_tokens.create_index('expires_at', expireAfterSeconds=0)
+    await create_unique_index(db.revoked_tokens, [('jti', 1)])
+    await db.revoked_tokens.create_index('expires_at', expireAfterSeconds=0)
+    for limiter in (ip_rate_limiter, email_rate_limiter):
+        if isinstance(limiter, MongoRateLimiter):
+            await limiter.ensure_indexes()
+    await create_unique_index(db.invite_code_pool, [('code', 1)])
+    await db.workspace_tasks.create_index([('missed_swept_at', 1), ('deadline', 1)])
+    await create_unique_index(db.leaderboard, [('user_id', 1), ('semester', 1)])
+    await db.leaderboard.create_index([('semester', 1), ('department', 1), ('rank', 1)])
+    await create_unique_index(db.leaderboard_archive, [('user_id', 1), ('semester', 1)])
+    await db.leaderboard_archive.create_index([('semester', 1), ('department', 1), ('rank', 1)])
+    await db.event_attendance.create_index([('update_id', 1), ('student_id', 1)])
+
+async def start_app():
+    """Connect, warm the pool, check indexes and start background jobs before taking traffic"""
+    startup_started_at = time.perf_counter()
+    UPLOADS_DIR.mkdir(parents=True, exist_ok=True)
+    if client is None:
+        connect_to_mongo()
+    await warm_mongo_pool()
+    await ensure_indexes()
+    if INVITE_CODE_POOL_SIZE > 0:
+        await refill_invite_code_pool()
+    await sync_revoked_access_tokens()
+    app.state.background_tasks = [asyncio.create_task(run_revocation_sync_periodically())]
+    if EVENT_LOOP_LAG_INTERVAL_SECONDS > 0:
+        lag_monitor = EventLoopLagMonitor(
+            EVENT_LOOP_LAG_INTERVAL_SECONDS,
+            block_threshold=EVENT_LOOP_BLOCK_THRESHOLD_MS / 1000 if EVENT_LOOP_DEBUG else None
+        )
+        app.state.background_tasks.append(asyncio.create_task(lag_monitor.run()))
+    if slow_query_recorder.enabled:
+        await ensure_slow_query_log()
+        app.state.background_tasks.append(asyncio.create_task(run_slow_query_flush_periodically()))
+    if UPLOAD_GC_INTERVAL_HOURS > 0:
+        app.state.background_tasks.append(asyncio.create_task(run_upload_gc_periodically()))
+    if MISSED_TASK_SWEEP_INTERVAL_MINUTES > 0:
+        app.state.background_tasks.append(asyncio.create_task(run_missed_task_sweeper_periodically()))
+    if SEMESTER_ROLLOVER_INTERVAL_HOURS > 0:
+        app.state.background_tasks.append(asyncio.create_task(run_semester_rollover_periodically()))
+    
+    ready_at = time.perf_counter()
+    app.state.cold_start = {
+        'import_seconds': round(IMPORT_SECONDS, 3),
+        'startup_seconds': round(ready_at - startup_started_at, 3),
+        'total_seconds': round(ready_at - IMPORT_STARTED_AT, 3)
+    }
+    cold_start_seconds.set(ready_at - IMPORT_STARTED_AT)
+    app.state.ready = True
+    logging.info(
+        f"Worker {os.getpid()} ready in {app.state.cold_start['total_seconds']}s "
+        f"(import {app.state.cold_start['import_seconds']}s, startup {app.state.cold_start['startup_seconds']}s)"
+    )
+
+async def stop_app():
+    app.state.ready = False
+    for task in getattr(app.state, 'background_tasks', []):
+        task.cancel()
+    if _invite_code_refill_task is not None:
+        _invite_code_refill_task.cancel()
+    if _password_hash_pool is not None:
+        _password_hash_pool.shutdown(wait=False)
+    try:
+        await release_job_leases()
+    except PyMongoError as e:
+        logging.warning(f"Could not release job leases: {str(e)}")
+    client.close()
+
+IMPORT_SECONDS = time.perf_counter() - IMPORT_STARTED_AT
@@ -5,6 +5,7 @@ import os
 from datetime import datetime, timedelta
 from pathlib import Path
 import io
+from concurrent.futures import ThreadPoolExecutor
 
 class DigitalWorkspaceTester:
     def __init__(self, base_url="https://taskrover-2.preview.emergentagent.com"):
@@ -675,6 +676,50 @@ class DigitalWorkspaceTester:
             self.log_test("Resubmission After Rejection", False, f"Status: {status}, Response: {response}")
             return False
 
+    def test_concurrent_duplicate_requests(self, parallel=8):
+        """Test that parallel duplicate joins and submissions leave exactly one record"""
+        timestamp = datetime.now().strftime('%H%M%S%f')
+        student_data = {
+            "email": f"racer_{timestamp}@digitalworkspace.edu",
+            "password": "RacerPass123!",
+            "name": "Concurrent Student",
+            "role": "student"
+        }
+        success, response, status = self.make_request('POST', 'auth/signup', student_data, expected_status=200)
+        if not success:
+            self.log_test("Concurrent Duplicate Requests", False, f"Signup failed: {status}")
+            return False
+        token = response['token']
+        
+        with ThreadPoolExecutor(max_workers=parallel) as executor:
+            join_statuses = list(executor.map(
+                lambda _: self.make_request('POST', 'workspaces/join', {"invite_code": self.workspace_invite_code}, token=token)[2],
+                range(parallel)
+            ))
+            # Submissions are form data, so post directly as in test_submit_task_with_link
+            submit_statuses = list(executor.map(
+                lambda i: requests.post(
+                    f"{self.api_url}/tasks/{self.created_task_id}/submit",
+                    data={'link': f'https://github.com/racer/solution-{i}'},
+                    headers={'Authorization': f'Bearer {token}'}
+                ).status_code,
+                range(parallel)
+            ))
+        
+        _, report, _ = self.make_request('GET', f'tasks/{self.created_task_id}/submissions', token=self.admin_token)
+        own_submissions = [s for s in report.get('submissions', []) if s['student_name'] == student_data['name']]
+        
+        if (join_statuses.count(200) == 1 and join_statuses.count(400) == parallel - 1
+                and submit_statuses.count(200) == parallel and len(own_submissions) == 1):
+            self.log_test("Concurrent Duplicate Requests", True)
+            return True
+        else:
+            self.log_test(
+                "Concurrent Duplicate Requests", False,
+                f"Joins: {join_statuses}, Submits: {submit_statuses}, Submissions: {len(own_submissions)}"
+            )
+            return False
+
     def cleanup(self):
         """Clean up created resources"""
         if self.created_material_id and self.admin_token:
@@ -738,6 +783,7 @@ class DigitalWorkspaceTester:
         # Workflow tests
         print("\n🔄 Workflow Tests")
         self.test_resubmission_after_rejection()
+        self.test_concurrent_duplicate_requests()
         # Note: File size limit test disabled as it may cause memory issues in container
         # self.test_file_size_limit()
         
@@ -21,6 +21,52 @@ axios.interceptors.request.use((config) => {
   return config;
 });
 
+// Access tokens are short-lived; on a 401 exchange the refresh token once and retry
+let refreshRequest = null;
+
+axios.interceptors.response.use(
+  (response) => response,
+  async (error) => {
+    const original = error.config;
+    const refreshToken = localStorage.getItem('refresh_token');
+    if (
+      error.response?.status !== 401 ||
+      !refreshToken ||
+      original._retried ||
+      /\/auth\/(login|signup|refresh|logout)$/.test(original.url || '')
+    ) {
+      return Promise.reject(error);
+    }
+
+    original._retried = true;
+    // Another request already refreshed the session; just retry with the new token
+    if (original.headers?.Authorization !== `Bearer ${localStorage.getItem('token')}`) {
+      return axios(original);
+    }
+
+    try {
+      // Share one in-flight refresh: refresh tokens are single use
+      if (!refreshRequest) {
+        refreshRequest = axios
+          .post(`${API}/auth/refresh`, { refresh_token: refreshToken })
+          .then((response) => {
+            localStorage.setItem('token', response.data.token);
+            localStorage.setItem('refresh_token', response.data.refresh_token);
+          })
+          .finally(() => {
+            refreshRequest = null;
+          });
+      }
+      await refreshRequest;
+    } catch (refreshError) {
+      localStorage.removeItem('token');
+      localStorage.removeItem('refresh_token');
+      return Promise.reject(error);
+    }
+    return axios(original);
+  }
+);
+
 function App() {
   const [user, setUser] = useState(null);
   const [loading, setLoading] = useState(true);
@@ -41,19 +87,31 @@ function App() {
       setUser(response.data);
     } catch (error) {
       localStorage.removeItem('token');
+      localStorage.removeItem('refresh_token');
     } finally {
       setLoading(false);
     }
   };
 
-  const handleLogin = (userData, token) => {
+  const handleLogin = (userData, token, refreshToken) => {
     localStorage.setItem('token', token);
+    if (refreshToken) {
+      localStorage.setItem('refresh_token', refreshToken);
+    }
     setUser(userData);
     toast.success('Welcome back!');
   };
 
-  const handleLogout = () => {
+  const handleLogout = async () => {
+    const refreshToken = localStorage.getItem('refresh_token');
+    try {
+      // The refresh token alone authenticates logout, so an expired access token still revokes the session
+      await axios.post(`${API}/auth/logout`, refreshToken ? { refresh_token: refreshToken } : undefined);
+    } catch (error) {
+      // The session is dropped locally even if the server-side revoke fails
+    }
     localStorage.removeItem('token');
+    localStorage.removeItem('refresh_token');
     setUser(null);
     toast.success('Logged out successfully');
   };
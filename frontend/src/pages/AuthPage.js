@@ -30,7 +30,7 @@ const AuthPage = ({ onLogin }) => {
 
     try {
       const response = await axios.post(`${API}/auth/login`, loginData);
-      onLogin(response.data.user, response.data.token);
+      onLogin(response.data.user, response.data.token, response.data.refresh_token);
     } catch (error) {
       toast.error(error.response?.data?.detail || 'Login failed');
     } finally {
@@ -44,7 +44,7 @@ const AuthPage = ({ onLogin }) => {
 
     try {
       const response = await axios.post(`${API}/auth/signup`, signupData);
-      onLogin(response.data.user, response.data.token);
+      onLogin(response.data.user, response.data.token, response.data.refresh_token);
     } catch (error) {
       toast.error(error.response?.data?.detail || 'Signup failed');
     } finally {
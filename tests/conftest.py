@@ -0,0 +1,131 @@
+"""Shared fixtures: the app served in-process on a mongomock database, or on a real mongod"""
+import asyncio
+import os
+import sys
+import uuid
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'backend'))
+
+# Read when server is first imported: cheap hashes and no auth throttling unless a test asks for it
+os.environ.setdefault('BCRYPT_ROUNDS', '4')
+os.environ.setdefault('AUTH_RATE_LIMIT_IP_BURST', '1000000000')
+os.environ.setdefault('AUTH_RATE_LIMIT_EMAIL_BURST', '1000000000')
+
+MONGO_URL = os.environ.get('BENCH_MONGO_URL', 'mongodb://localhost:27017')
+PASSWORD = 'TestPass123!'
+FUTURE_DEADLINE = '2099-01-01T00:00:00+00:00'
+
+
+def teach_mongomock_round():
+    """mongomock has no $round, which the leaderboard's pipeline updates use"""
+    import mongomock.aggregate as aggregate
+
+    if '$round' in aggregate.arithmetic_operators:
+        return
+    handle_arithmetic_operator = aggregate._Parser._handle_arithmetic_operator
+
+    def handle(parser, operator, values):
+        if operator == '$round':
+            return round(parser.parse(values[0]), values[1] if len(values) > 1 else 0)
+        return handle_arithmetic_operator(parser, operator, values)
+
+    aggregate.arithmetic_operators.add('$round')
+    aggregate._Parser._handle_arithmetic_operator = handle
+
+
+def mongo_reachable() -> bool:
+    from pymongo import MongoClient
+    try:
+        MongoClient(MONGO_URL, serverSelectionTimeoutMS=1000).admin.command('ping')
+        return True
+    except Exception:
+        return False
+
+
+@pytest.fixture
+def server(monkeypatch, tmp_path):
+    """The server module on a fresh mongomock database (no lifespan, so no background loops)"""
+    import server
+    from mongomock_motor import AsyncMongoMockClient
+
+    teach_mongomock_round()
+    monkeypatch.setenv('DB_NAME', 'test')
+    monkeypatch.setattr(server, 'UPLOADS_DIR', tmp_path / 'uploads')
+    server.UPLOADS_DIR.mkdir()
+    server.connect_to_mongo(AsyncMongoMockClient())
+    asyncio.run(server.ensure_indexes())
+    return server
+
+
+@pytest.fixture
+def mongod_server(monkeypatch, tmp_path):
+    """The server module on a throwaway database in a real mongod, for queries mongomock cannot run.
+
+    Motor binds to the event loop it first runs on, so tests drive the app and
+    ensure_indexes from a single asyncio.run, through httpx.ASGITransport.
+    """
+    if not mongo_reachable():
+        pytest.skip(f'no mongod at {MONGO_URL}')
+    import server
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    db_name = f'test_{uuid.uuid4().hex[:12]}'
+    monkeypatch.setenv('DB_NAME', db_name)
+    monkeypatch.setattr(server, 'UPLOADS_DIR', tmp_path / 'uploads')
+    server.UPLOADS_DIR.mkdir()
+    server.connect_to_mongo(AsyncIOMotorClient(MONGO_URL))
+    yield server
+    from pymongo import MongoClient
+    MongoClient(MONGO_URL).drop_database(db_name)
+
+
+@pytest.fixture
+def client(server):
+    return TestClient(server.app)
+
+
+def bearer(user: dict) -> dict:
+    return {'Authorization': f"Bearer {user['token']}"}
+
+
+def signup(client, email: str, role: str = 'student', department: str = 'Computer Science') -> dict:
+    """Register a user and return the signup response plus the password used"""
+    response = client.post('/api/auth/signup', json={
+        'email': email,
+        'password': PASSWORD,
+        'name': email.split('@')[0].title(),
+        'role': role,
+        'department': department,
+        'section': 'A'
+    })
+    assert response.status_code == 200, response.text
+    return {**response.json(), 'password': PASSWORD}
+
+
+def create_classroom(client, students: int = 3) -> dict:
+    """An admin with one workspace, one open task and students who joined it"""
+    admin = signup(client, 'admin@example.com', role='admin')
+    workspace = client.post('/api/workspaces', json={'name': 'Algorithms', 'description': 'CS301'}, headers=bearer(admin)).json()
+    task = client.post(f"/api/workspaces/{workspace['id']}/tasks", json={
+        'workspace_id': workspace['id'],
+        'title': 'Problem set 1',
+        'description': 'Chapters 1-3',
+        'deadline': FUTURE_DEADLINE,
+        'submission_type': 'any'
+    }, headers=bearer(admin)).json()
+    members = []
+    for i in range(students):
+        student = signup(client, f'student{i}@example.com')
+        response = client.post('/api/workspaces/join', json={'invite_code': workspace['invite_code']}, headers=bearer(student))
+        assert response.status_code == 200, response.text
+        members.append(student)
+    return {'admin': admin, 'workspace': workspace, 'task': task, 'students': members}
+
+
+@pytest.fixture
+def classroom(client) -> dict:
+    return create_classroom(client)
@@ -0,0 +1,96 @@
+"""Access/refresh token lifecycle: rotation, reuse detection, the grace window and logout"""
+import asyncio
+
+from tests.conftest import bearer, signup
+
+
+def refresh(client, refresh_token: str):
+    return client.post('/api/auth/refresh', json={'refresh_token': refresh_token})
+
+
+def test_refresh_rotates_the_refresh_token(client):
+    user = signup(client, 'ada@example.com')
+
+    response = refresh(client, user['refresh_token'])
+
+    assert response.status_code == 200
+    rotated = response.json()
+    assert rotated['refresh_token'] != user['refresh_token']
+    assert client.get('/api/auth/me', headers=bearer(rotated)).json()['email'] == 'ada@example.com'
+    assert refresh(client, rotated['refresh_token']).status_code == 200
+
+
+def test_reuse_within_grace_window_issues_a_token_in_the_same_family(client):
+    user = signup(client, 'ada@example.com')
+    first = refresh(client, user['refresh_token']).json()
+
+    # A concurrent refresh (e.g. a second tab) presenting the token just rotated
+    second = refresh(client, user['refresh_token'])
+
+    assert second.status_code == 200
+    assert refresh(client, first['refresh_token']).status_code == 200
+    assert refresh(client, second.json()['refresh_token']).status_code == 200
+
+
+def test_reuse_after_grace_window_revokes_the_family(server, client, monkeypatch):
+    monkeypatch.setattr(server, 'REFRESH_REUSE_GRACE_SECONDS', 0)
+    user = signup(client, 'ada@example.com')
+    rotated = refresh(client, user['refresh_token']).json()
+
+    reused = refresh(client, user['refresh_token'])
+
+    assert reused.status_code == 401
+    # The legitimate holder's newer token dies with the family
+    assert refresh(client, rotated['refresh_token']).status_code == 401
+
+
+def test_reuse_of_revoked_family_is_rejected_even_within_grace_window(client):
+    user = signup(client, 'ada@example.com')
+    rotated = refresh(client, user['refresh_token']).json()
+    client.post('/api/auth/logout', json={'refresh_token': rotated['refresh_token']}, headers=bearer(rotated))
+
+    assert refresh(client, user['refresh_token']).status_code == 401
+
+
+def test_unknown_refresh_token_is_rejected(client):
+    assert refresh(client, 'not-a-token').status_code == 401
+
+
+def test_logout_revokes_access_and_refresh_tokens(server, client):
+    user = signup(client, 'ada@example.com')
+
+    response = client.post('/api/auth/logout', json={'refresh_token': user['refresh_token']}, headers=bearer(user))
+
+    assert response.status_code == 200
+    assert client.get('/api/auth/me', headers=bearer(user)).status_code == 401
+    assert refresh(client, user['refresh_token']).status_code == 401
+
+    # Other workers learn about the revoked access token from Mongo
+    server.revoked_access_tokens.clear()
+    asyncio.run(server.sync_revoked_access_tokens())
+    assert client.get('/api/auth/me', headers=bearer(user)).status_code == 401
+
+
+def test_logout_with_expired_access_token_still_revokes_refresh_token(server, client, monkeypatch):
+    monkeypatch.setattr(server, 'ACCESS_TOKEN_EXPIRATION_MINUTES', -1)
+    user = signup(client, 'ada@example.com')
+    assert client.get('/api/auth/me', headers=bearer(user)).status_code == 401
+
+    response = client.post('/api/auth/logout', json={'refresh_token': user['refresh_token']}, headers=bearer(user))
+
+    assert response.status_code == 200
+    assert refresh(client, user['refresh_token']).status_code == 401
+
+
+def test_logout_does_not_revoke_another_users_refresh_token(client):
+    ada = signup(client, 'ada@example.com')
+    grace = signup(client, 'grace@example.com')
+
+    client.post('/api/auth/logout', json={'refresh_token': grace['refresh_token']}, headers=bearer(ada))
+
+    assert refresh(client, grace['refresh_token']).status_code == 200
+
+
+def test_logout_without_credentials_is_rejected(client):
+    assert client.post('/api/auth/logout').status_code == 401
+    assert client.post('/api/auth/logout', json={'refresh_token': 'not-a-token'}).status_code == 401
@@ -0,0 +1,60 @@
+"""Batch review: many submissions approved or rejected in one request, with per-item results"""
+from tests.conftest import bearer, signup
+
+
+def submit(client, task_id: str, student: dict) -> dict:
+    response = client.post(f'/api/tasks/{task_id}/submit', data={'link': 'https://example.com/work'}, headers=bearer(student))
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_batch_review_updates_each_valid_item(client, classroom):
+    admin, task = classroom['admin'], classroom['task']
+    first, second, third = (submit(client, task['id'], student) for student in classroom['students'])
+
+    response = client.post(f"/api/tasks/{task['id']}/submissions/review", json=[
+        {'submission_id': first['id'], 'status': 'approved', 'comment': 'Good'},
+        {'submission_id': second['id'], 'status': 'rejected', 'comment': 'Incomplete'},
+        {'submission_id': third['id'], 'status': 'pending'},
+        {'submission_id': first['id'], 'status': 'rejected'},
+        {'submission_id': 'missing', 'status': 'approved'}
+    ], headers=bearer(admin))
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body['reviewed_count'] == 2
+    assert [(result['success'], result.get('detail')) for result in body['results']] == [
+        (True, None),
+        (True, None),
+        (False, "Status must be 'approved' or 'rejected'"),
+        (False, 'Duplicate submission in request'),
+        (False, 'Submission not found')
+    ]
+    report = client.get(f"/api/tasks/{task['id']}/submissions", headers=bearer(admin)).json()
+    statuses = {submission['id']: submission['status'] for submission in report['submissions']}
+    assert statuses == {first['id']: 'approved', second['id']: 'rejected', third['id']: 'pending'}
+    assert (report['approved_count'], report['rejected_count'], report['pending_count']) == (1, 1, 1)
+
+
+def test_submissions_of_other_tasks_are_not_found(client, classroom):
+    admin, workspace, student = classroom['admin'], classroom['workspace'], classroom['students'][0]
+    other_task = client.post(f"/api/workspaces/{workspace['id']}/tasks", json={
+        'workspace_id': workspace['id'], 'title': 'Problem set 2', 'description': 'Chapter 4',
+        'deadline': classroom['task']['deadline'], 'submission_type': 'any'
+    }, headers=bearer(admin)).json()
+    submission = submit(client, other_task['id'], student)
+
+    response = client.post(f"/api/tasks/{classroom['task']['id']}/submissions/review", json=[
+        {'submission_id': submission['id'], 'status': 'approved'}
+    ], headers=bearer(admin))
+
+    assert response.json()['results'][0]['detail'] == 'Submission not found'
+
+
+def test_only_the_workspace_owner_can_batch_review(client, classroom):
+    other_admin = signup(client, 'other-admin@example.com', role='admin')
+    student = classroom['students'][0]
+    path = f"/api/tasks/{classroom['task']['id']}/submissions/review"
+
+    assert client.post(path, json=[], headers=bearer(other_admin)).status_code == 403
+    assert client.post(path, json=[], headers=bearer(student)).status_code == 403
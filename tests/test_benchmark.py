@@ -0,0 +1,28 @@
+"""Smoke test for the load test's no-database mode (benchmark.py --mock)"""
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'backend'))
+
+import benchmark  # noqa: E402
+
+
+@pytest.mark.parametrize('scenario', list(benchmark.SCENARIOS))
+def test_mock_mode_runs_scenario(scenario, tmp_path):
+    output = tmp_path / 'bench.json'
+    args = benchmark.parse_args([
+        '--mock', '--students', '100', '--workspaces', '2', '--members-per-workspace', '20',
+        '--tasks-per-workspace', '2', '--duration', '0.5', '--warmup', '0', '--concurrency', '2',
+        '--scenarios', scenario, '--output', str(output)
+    ])
+
+    assert asyncio.run(benchmark.main(args)) == 0
+
+    report = json.loads(output.read_text())
+    assert report['meta']['mongo'] == 'mongomock'
+    assert report['scenarios'][scenario]['requests'] > 0
+    assert report['scenarios'][scenario]['errors'] == 0
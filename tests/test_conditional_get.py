@@ -0,0 +1,69 @@
+"""Conditional GET: ETags from collection change counters and 304 for unchanged data"""
+from tests.conftest import bearer, signup
+
+
+def get(client, path: str, user: dict, etag: str = None):
+    headers = {**bearer(user), **({'If-None-Match': etag} if etag else {})}
+    return client.get(path, headers=headers)
+
+
+def test_unchanged_list_answers_304(client, classroom):
+    student = classroom['students'][0]
+    first = get(client, '/api/workspaces', student)
+
+    second = get(client, '/api/workspaces', student, first.headers['ETag'])
+
+    assert first.status_code == 200
+    assert first.headers['ETag'].startswith('W/"')
+    assert first.headers['Cache-Control'] == 'private, no-cache'
+    assert second.status_code == 304
+    assert second.content == b''
+    assert second.headers['ETag'] == first.headers['ETag']
+
+
+def test_write_to_a_read_collection_changes_the_etag(client, classroom):
+    admin = classroom['admin']
+    etag = get(client, '/api/workspaces', admin).headers['ETag']
+
+    client.post('/api/workspaces', json={'name': 'Databases', 'description': 'CS302'}, headers=bearer(admin))
+    response = get(client, '/api/workspaces', admin, etag)
+
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    assert len(response.json()) == 2
+
+
+def test_etag_is_per_user_and_query(client, classroom):
+    ada, grace = classroom['students'][:2]
+    etag = get(client, '/api/workspaces', ada).headers['ETag']
+
+    assert get(client, '/api/workspaces', grace, etag).status_code == 200
+    assert get(client, '/api/leaderboard', ada, etag).status_code == 200
+    leaderboard_etag = get(client, '/api/leaderboard', ada).headers['ETag']
+    assert get(client, '/api/leaderboard?department=Physics', ada, leaderboard_etag).status_code == 200
+
+
+def test_if_none_match_accepts_lists_strong_form_and_wildcard(client, classroom):
+    student = classroom['students'][0]
+    etag = get(client, '/api/workspaces', student).headers['ETag']
+    strong = etag.removeprefix('W/')
+
+    assert get(client, '/api/workspaces', student, f'W/"stale", {strong}').status_code == 304
+    assert get(client, '/api/workspaces', student, '*').status_code == 304
+    assert get(client, '/api/workspaces', student, 'W/"stale"').status_code == 200
+
+
+def test_interest_changes_department_update_etag(client):
+    department_admin = signup(client, 'hod@example.com', role='department_admin')
+    student = signup(client, 'ada@example.com')
+    update = client.post('/api/department-updates', json={
+        'title': 'Hackathon', 'description': 'Saturday', 'category': 'Club', 'event_date': '2099-01-01'
+    }, headers=bearer(department_admin)).json()
+    etag = get(client, '/api/department-updates', student).headers['ETag']
+
+    marked = client.post(f"/api/department-updates/{update['id']}/interest?action=interested", headers=bearer(student))
+    assert marked.json()['marked'] is True
+
+    response = get(client, '/api/department-updates', student, etag)
+    assert response.status_code == 200
+    assert response.json()[0]['is_interested'] is True
@@ -0,0 +1,90 @@
+"""Multi-worker mode: the gunicorn settings and a real boot with two workers"""
+import os
+import runpy
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parents[1] / 'backend'
+MONGO_URL = os.environ.get('BENCH_MONGO_URL', 'mongodb://localhost:27017')
+
+
+def load_config(monkeypatch, **env) -> dict:
+    for name, value in env.items():
+        monkeypatch.setenv(name, value)
+    return runpy.run_path(str(BACKEND_DIR / 'gunicorn.conf.py'))
+
+
+def test_config_runs_uvicorn_workers_without_preload(monkeypatch):
+    config = load_config(monkeypatch, WEB_CONCURRENCY='3', BIND='127.0.0.1:9001')
+
+    assert config['workers'] == 3
+    assert config['worker_class'] == 'uvicorn.workers.UvicornWorker'
+    # Each worker must import the app (and open its own Mongo client) after the fork
+    assert config['preload_app'] is False
+    assert config['bind'] == '127.0.0.1:9001'
+    assert 'WEB_CONCURRENCY=3' in config['raw_env']
+
+
+def mongo_reachable() -> bool:
+    from pymongo import MongoClient
+    try:
+        MongoClient(MONGO_URL, serverSelectionTimeoutMS=1000).admin.command('ping')
+        return True
+    except Exception:
+        return False
+
+
+def worker_pids(master_pid: int) -> list:
+    children = Path(f'/proc/{master_pid}/task/{master_pid}/children')
+    return children.read_text().split() if children.exists() else []
+
+
+def test_two_workers_boot_and_serve(tmp_path):
+    pytest.importorskip('uvicorn')
+    if not mongo_reachable():
+        pytest.skip(f'no mongod at {MONGO_URL}')
+
+    port = 18000 + os.getpid() % 1000
+    db_name = f'test_gunicorn_{os.getpid()}'
+    env = {
+        **os.environ,
+        'MONGO_URL': MONGO_URL,
+        'DB_NAME': db_name,
+        'WEB_CONCURRENCY': '2',
+        'BIND': f'127.0.0.1:{port}',
+        'METRICS_TOKEN': 'test-metrics-token',
+        'UPLOADS_DIR': str(tmp_path / 'uploads')
+    }
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'server:app'],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        ready = []
+        deadline = time.monotonic() + 60
+        with httpx.Client(base_url=f'http://127.0.0.1:{port}') as client:
+            while time.monotonic() < deadline and len(ready) < 10:
+                try:
+                    response = client.get('/api/health/ready')
+                    if response.status_code == 200:
+                        ready.append(response.json())
+                except httpx.TransportError:
+                    pass
+                time.sleep(0.2)
+
+            assert len(ready) == 10, 'workers did not become ready'
+            assert len(worker_pids(server.pid)) == 2
+            assert client.get('/api/health/live').json() == {'status': 'alive'}
+            assert client.get('/metrics').status_code == 401
+            metrics = client.get('/metrics', headers={'Authorization': 'Bearer test-metrics-token'})
+            assert 'app_cold_start_seconds' in metrics.text
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+        from pymongo import MongoClient
+        MongoClient(MONGO_URL).drop_database(db_name)
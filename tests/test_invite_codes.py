@@ -0,0 +1,73 @@
+"""Invite codes: expiry, use limits and rotation"""
+from datetime import datetime, timedelta, timezone
+
+from tests.conftest import bearer, signup
+
+
+def create_workspace(client, admin: dict, **invite_settings) -> dict:
+    response = client.post('/api/workspaces', json={'name': 'Algorithms', 'description': 'CS301', **invite_settings}, headers=bearer(admin))
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def join(client, student: dict, invite_code: str):
+    return client.post('/api/workspaces/join', json={'invite_code': invite_code}, headers=bearer(student))
+
+
+def test_code_stops_working_after_max_uses(client):
+    admin = signup(client, 'admin@example.com', role='admin')
+    ada, grace, alan = (signup(client, f'{name}@example.com') for name in ('ada', 'grace', 'alan'))
+    workspace = create_workspace(client, admin, invite_max_uses=2)
+
+    assert join(client, ada, workspace['invite_code']).status_code == 200
+    # A repeat join by a member is refused without using up the code
+    assert join(client, ada, workspace['invite_code']).status_code == 400
+    assert join(client, grace, workspace['invite_code']).status_code == 200
+    response = join(client, alan, workspace['invite_code'])
+
+    assert response.status_code == 400
+    assert response.json()['detail'] == 'Invite code has reached its maximum number of uses'
+
+
+def test_expired_code_is_rejected(client):
+    admin = signup(client, 'admin@example.com', role='admin')
+    student = signup(client, 'ada@example.com')
+    yesterday = (datetime.now(timezone.utc) - timedelta(days=1)).isoformat()
+    workspace = create_workspace(client, admin, invite_expires_at=yesterday)
+
+    response = join(client, student, workspace['invite_code'])
+
+    assert response.status_code == 400
+    assert response.json()['detail'] == 'Invite code has expired'
+
+
+def test_expiry_is_compared_in_utc(client):
+    admin = signup(client, 'admin@example.com', role='admin')
+    student = signup(client, 'ada@example.com')
+    # An hour from now at -05:00; compared as a raw string it would look already expired
+    later = (datetime.now(timezone.utc) + timedelta(hours=1)).astimezone(timezone(timedelta(hours=-5)))
+    workspace = create_workspace(client, admin, invite_expires_at=later.isoformat())
+
+    assert workspace['invite_expires_at'].endswith('+00:00')
+    assert join(client, student, workspace['invite_code']).status_code == 200
+
+
+def test_rotation_issues_a_fresh_code_and_resets_limits(client):
+    admin = signup(client, 'admin@example.com', role='admin')
+    ada, grace = signup(client, 'ada@example.com'), signup(client, 'grace@example.com')
+    workspace = create_workspace(client, admin, invite_max_uses=1)
+    join(client, ada, workspace['invite_code'])
+
+    rotated = client.post(f"/api/workspaces/{workspace['id']}/invite-code", json={'invite_max_uses': 5}, headers=bearer(admin)).json()
+
+    assert rotated['invite_code'] != workspace['invite_code']
+    assert (rotated['invite_uses'], rotated['invite_max_uses'], rotated['member_count']) == (0, 5, 1)
+    assert join(client, grace, workspace['invite_code']).status_code == 404
+    assert join(client, grace, rotated['invite_code']).status_code == 200
+
+
+def test_invalid_settings_are_rejected(client):
+    admin = signup(client, 'admin@example.com', role='admin')
+
+    assert client.post('/api/workspaces', json={'name': 'A', 'description': 'B', 'invite_max_uses': 0}, headers=bearer(admin)).status_code == 422
+    assert client.post('/api/workspaces', json={'name': 'A', 'description': 'B', 'invite_expires_at': 'soon'}, headers=bearer(admin)).status_code == 400
@@ -0,0 +1,105 @@
+"""Missed-task sweeper: penalties once per (task, student), reversed by a late submission.
+
+The sweeper's anti-join uses $lookup with let, which mongomock cannot run,
+so these tests need a mongod (BENCH_MONGO_URL, default localhost).
+"""
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import httpx
+
+from tests.conftest import FUTURE_DEADLINE, PASSWORD, bearer
+
+
+async def signup(client, email: str, role: str = 'student') -> dict:
+    response = await client.post('/api/auth/signup', json={
+        'email': email, 'password': PASSWORD, 'name': email.split('@')[0].title(),
+        'role': role, 'department': 'Computer Science', 'section': 'A'
+    })
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+async def expired_classroom(server, client) -> dict:
+    """Three students in a workspace whose only task expired an hour ago; student0 handed it in on time"""
+    await server.ensure_indexes()
+    # Tasks that expired before the sweeper's first run are exempt; move that cutoff out of the way
+    await server.db.app_settings.insert_one({'_id': 'missed_task_sweep_since', 'value': '2000-01-01T00:00:00+00:00'})
+
+    admin = await signup(client, 'admin@example.com', role='admin')
+    workspace = (await client.post('/api/workspaces', json={'name': 'Algorithms', 'description': 'CS301'}, headers=bearer(admin))).json()
+    task = (await client.post(f"/api/workspaces/{workspace['id']}/tasks", json={
+        'workspace_id': workspace['id'], 'title': 'Problem set 1', 'description': 'Chapters 1-3',
+        'deadline': FUTURE_DEADLINE, 'submission_type': 'any'
+    }, headers=bearer(admin))).json()
+    students = []
+    for i in range(3):
+        student = await signup(client, f'student{i}@example.com')
+        await client.post('/api/workspaces/join', json={'invite_code': workspace['invite_code']}, headers=bearer(student))
+        students.append(student)
+    await client.post(f"/api/tasks/{task['id']}/submit", data={'link': 'https://example.com/ps1'}, headers=bearer(students[0]))
+
+    deadline = (datetime.now(timezone.utc) - timedelta(hours=1)).isoformat()
+    await server.db.workspace_tasks.update_one({'id': task['id']}, {'$set': {'deadline': deadline}})
+    return {'admin': admin, 'task': task, 'students': students}
+
+
+async def entry_of(server, student: dict) -> dict:
+    return await server.db.leaderboard.find_one({'user_id': student['user']['id']}, {'_id': 0, 'point_history': 0})
+
+
+def run(server, scenario):
+    async def main():
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+            await scenario(client)
+    asyncio.run(main())
+
+
+def test_sweep_penalizes_each_missing_student_once(mongod_server):
+    server = mongod_server
+
+    async def scenario(client):
+        classroom = await expired_classroom(server, client)
+        admin, task, students = classroom['admin'], classroom['task'], classroom['students']
+
+        first = (await client.post('/api/leaderboard/sweep-missed-tasks', headers=bearer(admin))).json()
+        second = (await client.post('/api/leaderboard/sweep-missed-tasks', headers=bearer(admin))).json()
+
+        assert first == {'swept_tasks': 1, 'penalties_applied': 2}
+        assert second == {'swept_tasks': 0, 'penalties_applied': 0}
+        # Sweeping an already swept task again changes nothing either
+        await server.db.workspace_tasks.update_one({'id': task['id']}, {'$set': {'missed_swept_at': None}})
+        assert (await server.sweep_missed_tasks())['penalties_applied'] == 0
+
+        on_time = await entry_of(server, students[0])
+        assert (on_time['total_points'], on_time['tasks_missed']) == (10, 0)
+        for student in students[1:]:
+            entry = await entry_of(server, student)
+            assert entry['total_points'] == server.POINTS_CONFIG['task_missed']
+            assert entry['tasks_missed'] == 1
+            assert entry['missed_task_ids'] == [task['id']]
+
+    run(server, scenario)
+
+
+def test_late_submission_replaces_the_penalty(mongod_server):
+    server = mongod_server
+
+    async def scenario(client):
+        classroom = await expired_classroom(server, client)
+        admin, task, late = classroom['admin'], classroom['task'], classroom['students'][1]
+        await client.post('/api/leaderboard/sweep-missed-tasks', headers=bearer(admin))
+
+        response = await client.post(f"/api/tasks/{task['id']}/submit", data={'link': 'https://example.com/late'}, headers=bearer(late))
+        assert response.status_code == 200
+        # Reversal only matches an entry still charged for the task
+        await server.reverse_missed_penalty(await server.db.workspace_tasks.find_one({'id': task['id']}), late['user']['id'])
+
+        entry = await entry_of(server, late)
+        assert entry['total_points'] == server.POINTS_CONFIG['task_late']
+        assert (entry['tasks_missed'], entry['tasks_late'], entry['tasks_completed']) == (0, 1, 1)
+        assert entry['missed_task_ids'] == []
+        assert entry['task_completion_rate'] == 100.0
+
+    run(server, scenario)
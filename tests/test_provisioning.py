@@ -0,0 +1,66 @@
+"""Bulk provisioning: users created from a roster, passwords hashed in a process pool"""
+import json
+
+import pytest
+
+from tests.conftest import bearer, signup
+
+
+@pytest.fixture
+def admin(server, client, monkeypatch):
+    monkeypatch.setattr(server, 'PROVISION_BATCH_SIZE', 2)
+    return signup(client, 'admin@example.com', role='admin')
+
+
+def provision(client, admin: dict, body: str, content_type: str = 'text/csv'):
+    return client.post('/api/auth/provision', content=body.encode(), headers={**bearer(admin), 'Content-Type': content_type})
+
+
+def login(client, email: str, password: str):
+    return client.post('/api/auth/login', json={'email': email, 'password': password})
+
+
+def test_csv_roster_creates_users_and_reports_every_row(client, admin):
+    signup(client, 'taken@example.com')
+    roster = '\n'.join([
+        'Email,Name,Role,Password,Department',
+        'ada@example.com,Ada,student,AdaPass123!,Computer Science',
+        'grace@example.com,Grace,,,Computer Science',
+        'taken@example.com,Taken,student,TakenPass123!,',
+        'ada@example.com,Ada again,student,AdaPass123!,',
+        'alan@example.com,Alan,wizard,AlanPass123!,',
+        'not-an-email,Nobody,student,NobodyPass123!,'
+    ])
+
+    response = provision(client, admin, roster)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert (body['total_rows'], body['created_count']) == (6, 2)
+    rows = body['rows']
+    assert [(row['row'], row['status']) for row in rows] == [
+        (1, 'created'), (2, 'created'), (3, 'exists'), (4, 'duplicate'), (5, 'invalid'), (6, 'invalid')
+    ]
+    assert 'temporary_password' not in rows[0]
+    assert login(client, 'ada@example.com', 'AdaPass123!').json()['user']['department'] == 'Computer Science'
+    grace = login(client, 'grace@example.com', rows[1]['temporary_password']).json()['user']
+    assert (grace['id'], grace['role']) == (rows[1]['user_id'], 'student')
+
+
+def test_ndjson_roster(client, admin):
+    roster = '\n'.join(json.dumps(row) for row in [
+        {'email': 'hod@example.com', 'name': 'Hod', 'role': 'department_admin', 'password': 'HodPass123!', 'department': 'Physics'},
+        {'email': 'ada@example.com', 'name': 'Ada'},
+        ['not', 'an', 'object']
+    ])
+
+    body = provision(client, admin, roster, 'application/x-ndjson').json()
+
+    assert [row['status'] for row in body['rows']] == ['created', 'created', 'invalid']
+    assert login(client, 'hod@example.com', 'HodPass123!').json()['user']['role'] == 'department_admin'
+
+
+def test_only_admins_can_provision(client):
+    student = signup(client, 'ada@example.com')
+
+    assert provision(client, student, 'email,name\ngrace@example.com,Grace').status_code == 403
@@ -0,0 +1,72 @@
+"""Auth rate limiting: 429 with Retry-After, per-IP and per-(email, IP) buckets"""
+import pytest
+
+from tests.conftest import PASSWORD, signup
+
+
+@pytest.fixture(params=['memory', 'mongo'])
+def limited(request, server, monkeypatch):
+    """Tight budgets: 3 attempts per IP and 2 per email from an IP, refilling slowly"""
+    monkeypatch.setattr(server, 'AUTH_RATE_LIMIT_BACKEND', request.param)
+    monkeypatch.setattr(server, 'AUTH_RATE_LIMIT_IP_BURST', 3)
+    monkeypatch.setattr(server, 'AUTH_RATE_LIMIT_IP_PER_MINUTE', 1)
+    monkeypatch.setattr(server, 'AUTH_RATE_LIMIT_EMAIL_BURST', 2)
+    monkeypatch.setattr(server, 'AUTH_RATE_LIMIT_EMAIL_PER_MINUTE', 1)
+    monkeypatch.setattr(server, 'TRUSTED_PROXY_HOPS', 1)
+    return server
+
+
+def login(client, email: str, password: str = PASSWORD, ip: str = '203.0.113.1'):
+    return client.post('/api/auth/login', json={'email': email, 'password': password}, headers={'X-Forwarded-For': ip})
+
+
+def test_email_budget_answers_429_with_retry_after(client, limited):
+    signup(client, 'ada@example.com')
+    limited.create_rate_limiters()
+
+    assert login(client, 'ada@example.com', 'wrong').status_code == 401
+    assert login(client, 'ada@example.com', 'wrong').status_code == 401
+    response = login(client, 'ada@example.com')
+
+    # Rejected before the password is checked, even when it is right
+    assert response.status_code == 429
+    assert 1 <= int(response.headers['Retry-After']) <= 60
+
+
+def test_failures_from_another_address_do_not_lock_the_owner_out(client, limited):
+    signup(client, 'ada@example.com')
+    limited.create_rate_limiters()
+
+    for _ in range(3):
+        login(client, 'ada@example.com', 'wrong', ip='198.51.100.7')
+
+    assert login(client, 'ada@example.com', ip='203.0.113.1').status_code == 200
+
+
+def test_ip_budget_covers_every_email(client, limited):
+    for name in ('ada', 'grace', 'alan', 'edsger'):
+        signup(client, f'{name}@example.com')
+    limited.create_rate_limiters()
+
+    codes = [login(client, f'{name}@example.com').status_code for name in ('ada', 'grace', 'alan', 'edsger')]
+
+    assert codes == [200, 200, 200, 429]
+
+
+def test_spoofed_forwarded_for_entries_share_the_proxy_reported_bucket(client, limited):
+    signup(client, 'ada@example.com')
+    limited.create_rate_limiters()
+
+    # Only the entry appended by the trusted proxy counts; whatever the client prepends is ignored
+    codes = [login(client, 'ada@example.com', ip=f'10.0.0.{i}, 203.0.113.1').status_code for i in range(4)]
+
+    assert codes == [200, 200, 429, 429]
+
+
+def test_signup_is_limited_per_email(client, limited):
+    limited.create_rate_limiters()
+    payload = {'email': 'ada@example.com', 'password': PASSWORD, 'name': 'Ada', 'role': 'student'}
+
+    codes = [client.post('/api/auth/signup', json=payload, headers={'X-Forwarded-For': '203.0.113.1'}).status_code for _ in range(3)]
+
+    assert codes == [200, 400, 429]
@@ -0,0 +1,82 @@
+"""Roster import: CSV or NDJSON lists of emails added as workspace members"""
+import json
+
+import pytest
+
+from tests.conftest import bearer, signup
+
+
+@pytest.fixture
+def roster_workspace(server, client, monkeypatch):
+    # Tiny batches so a short roster spans several lookups
+    monkeypatch.setattr(server, 'ROSTER_IMPORT_BATCH_SIZE', 2)
+    admin = signup(client, 'admin@example.com', role='admin')
+    for name in ('ada', 'grace', 'alan', 'edsger'):
+        signup(client, f'{name}@example.com')
+    workspace = client.post('/api/workspaces', json={'name': 'Algorithms', 'description': 'CS301'}, headers=bearer(admin)).json()
+    return {'admin': admin, 'workspace': workspace}
+
+
+def import_roster(client, roster_workspace: dict, body: str, content_type: str = 'text/csv'):
+    return client.post(
+        f"/api/workspaces/{roster_workspace['workspace']['id']}/members/import",
+        content=body.encode(),
+        headers={**bearer(roster_workspace['admin']), 'Content-Type': content_type}
+    )
+
+
+def member_names(client, roster_workspace: dict) -> set:
+    members = client.get(f"/api/workspaces/{roster_workspace['workspace']['id']}/members", headers=bearer(roster_workspace['admin'])).json()
+    return {member['student_name'] for member in members}
+
+
+def test_csv_roster_reports_each_kind_of_row(client, roster_workspace):
+    existing = signup(client, 'existing@example.com')
+    client.post('/api/workspaces/join', json={'invite_code': roster_workspace['workspace']['invite_code']}, headers=bearer(existing))
+    roster = '\n'.join([
+        'email,name',
+        'ada@example.com,Ada',
+        'grace@example.com,Grace',
+        'ada@example.com,Ada again',
+        'nobody@example.com,Nobody',
+        'admin@example.com,Admin',
+        'not-an-email',
+        '',
+        'existing@example.com,Existing',
+        'alan@example.com'
+    ])
+
+    response = import_roster(client, roster_workspace, roster)
+
+    assert response.status_code == 200
+    assert response.json() == {
+        'message': 'Imported 3 members',
+        'total_rows': 8,
+        'imported_count': 3,
+        'duplicate_emails': ['ada@example.com', 'existing@example.com'],
+        'unknown_emails': ['nobody@example.com', 'admin@example.com'],
+        'invalid_rows': 1
+    }
+    assert member_names(client, roster_workspace) == {'Existing', 'Ada', 'Grace', 'Alan'}
+
+
+def test_ndjson_roster_and_reimport(client, roster_workspace):
+    roster = '\n'.join(json.dumps(row) for row in [{'email': 'ada@example.com'}, {'email': 'edsger@example.com'}, {'name': 'no email'}, ['ada']])
+
+    first = import_roster(client, roster_workspace, roster, 'application/x-ndjson').json()
+    second = import_roster(client, roster_workspace, roster, 'application/x-ndjson').json()
+
+    assert (first['imported_count'], first['invalid_rows']) == (2, 2)
+    assert (second['imported_count'], second['duplicate_emails']) == (0, ['ada@example.com', 'edsger@example.com'])
+    assert member_names(client, roster_workspace) == {'Ada', 'Edsger'}
+
+
+def test_only_the_workspace_owner_can_import(client, roster_workspace):
+    other_admin = signup(client, 'other-admin@example.com', role='admin')
+    response = client.post(
+        f"/api/workspaces/{roster_workspace['workspace']['id']}/members/import",
+        content=b'ada@example.com', headers={**bearer(other_admin), 'Content-Type': 'text/csv'}
+    )
+
+    assert response.status_code == 403
+    assert member_names(client, roster_workspace) == set()
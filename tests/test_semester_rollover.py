@@ -0,0 +1,64 @@
+"""Semester rollover: past semesters move from the hot leaderboard to the archive"""
+import asyncio
+
+import pytest
+
+from tests.conftest import bearer, signup
+
+PAST_SEMESTER = '2020-1'
+
+
+def activity(points: int, description: str) -> dict:
+    return {
+        'activity_type': 'event_participation', 'points': points, 'description': description,
+        'timestamp': '2020-03-01T10:00:00+00:00', 'related_id': description
+    }
+
+
+@pytest.fixture
+def semesters(server, client):
+    """Two students with entries in a past semester and one in the current semester"""
+    admin = signup(client, 'admin@example.com', role='admin')
+    ada, grace = signup(client, 'ada@example.com'), signup(client, 'grace@example.com')
+
+    async def record():
+        for student, events in ((ada, 2), (grace, 1)):
+            for i in range(events):
+                await server.add_leaderboard_activity(
+                    student['user'], PAST_SEMESTER, {'total_points': 20, 'events_attended': 1}, activity(20, f'Event {i}')
+                )
+        await server.add_leaderboard_activity(
+            ada['user'], server.get_current_semester(), {'total_points': 20, 'events_attended': 1}, activity(20, 'Now')
+        )
+    asyncio.run(record())
+    return {'admin': admin, 'ada': ada, 'grace': grace}
+
+
+def test_rollover_archives_past_semesters_once(server, client, semesters):
+    first = client.post('/api/leaderboard/rollover', headers=bearer(semesters['admin'])).json()
+    second = client.post('/api/leaderboard/rollover', headers=bearer(semesters['admin'])).json()
+
+    assert first == {'current_semester': server.get_current_semester(), 'archived': {PAST_SEMESTER: 2}}
+    assert second['archived'] == {}
+
+    async def read():
+        hot = await server.db.leaderboard.distinct('semester')
+        archived = await server.db.leaderboard_archive.find({}, {'_id': 0}).sort('rank', 1).to_list(None)
+        return hot, archived
+    hot, archived = asyncio.run(read())
+    assert hot == [server.get_current_semester()]
+    assert [(entry['user_name'], entry['rank'], entry['total_points']) for entry in archived] == [('Ada', 1, 40), ('Grace', 2, 20)]
+    assert all('point_history' not in entry and 'missed_task_ids' not in entry for entry in archived)
+    assert server.decompress_activity_history(archived[0]['activity_history'])[-1]['description'] == 'Event 1'
+
+
+def test_archived_semester_is_still_readable(client, semesters):
+    client.post('/api/leaderboard/rollover', headers=bearer(semesters['admin']))
+    ada = semesters['ada']
+
+    leaderboard = client.get(f'/api/leaderboard?semester={PAST_SEMESTER}', headers=bearer(ada)).json()
+    stats = client.get(f'/api/leaderboard/my-stats?semester={PAST_SEMESTER}', headers=bearer(ada)).json()
+
+    assert [entry['user_name'] for entry in leaderboard] == ['Ada', 'Grace']
+    assert (stats['rank'], stats['total_points'], stats['events_attended']) == (1, 40, 2)
+    assert [entry['description'] for entry in stats['recent_activities']] == ['Event 0', 'Event 1']
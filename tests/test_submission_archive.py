@@ -0,0 +1,52 @@
+"""Submission archive: every submitted file of a task streamed as one ZIP"""
+import io
+import zipfile
+
+from tests.conftest import bearer, signup
+
+
+def submit_file(client, task_id: str, student: dict, name: str, content: bytes) -> dict:
+    response = client.post(f'/api/tasks/{task_id}/submit', files={'file': (name, content)}, headers=bearer(student))
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_archive_holds_each_submitted_file(server, client, classroom, monkeypatch):
+    # Small chunks so files are streamed in several pieces
+    monkeypatch.setattr(server, 'ARCHIVE_CHUNK_SIZE', 1024)
+    task, (ada, grace, alan) = classroom['task'], classroom['students']
+    report = b'%PDF-' + bytes(range(256)) * 40
+    submit_file(client, task['id'], ada, 'report.pdf', report)
+    submit_file(client, task['id'], grace, 'notes.txt', b'grace notes')
+    client.post(f"/api/tasks/{task['id']}/submit", data={'link': 'https://example.com/alan'}, headers=bearer(alan))
+
+    response = client.get(f"/api/tasks/{task['id']}/submissions/archive", headers=bearer(classroom['admin']))
+
+    assert response.status_code == 200
+    assert response.headers['content-type'] == 'application/zip'
+    assert f"task-{task['id']}-submissions.zip" in response.headers['content-disposition']
+    archive = zipfile.ZipFile(io.BytesIO(response.content))
+    assert archive.testzip() is None
+    contents = {name: archive.read(name) for name in archive.namelist()}
+    assert contents == {
+        f"Student0_{ada['user']['id'][:8]}.pdf": report,
+        f"Student1_{grace['user']['id'][:8]}.txt": b'grace notes'
+    }
+
+
+def test_files_missing_from_disk_are_skipped(server, client, classroom):
+    task, ada = classroom['task'], classroom['students'][0]
+    submission = submit_file(client, task['id'], ada, 'report.pdf', b'%PDF-')
+    (server.UPLOADS_DIR / submission['file_path'].rsplit('/', 1)[-1]).unlink()
+
+    response = client.get(f"/api/tasks/{task['id']}/submissions/archive", headers=bearer(classroom['admin']))
+
+    assert zipfile.ZipFile(io.BytesIO(response.content)).namelist() == []
+
+
+def test_only_the_workspace_owner_can_download(client, classroom):
+    other_admin = signup(client, 'other-admin@example.com', role='admin')
+    path = f"/api/tasks/{classroom['task']['id']}/submissions/archive"
+
+    assert client.get(path, headers=bearer(other_admin)).status_code == 403
+    assert client.get(path, headers=bearer(classroom['students'][0])).status_code == 403
@@ -0,0 +1,52 @@
+"""Upload GC: files no material or submission references are reported, then deleted"""
+import asyncio
+import os
+import time
+
+from tests.conftest import bearer
+
+
+def age(path, hours: float):
+    then = time.time() - hours * 3600
+    os.utime(path, (then, then))
+
+
+def test_orphans_past_grace_period_are_collected(server, client, classroom):
+    admin, task, ada = classroom['admin'], classroom['task'], classroom['students'][0]
+    submission = client.post(f"/api/tasks/{task['id']}/submit", files={'file': ('report.pdf', b'%PDF-')}, headers=bearer(ada)).json()
+    referenced = server.UPLOADS_DIR / submission['file_path'].rsplit('/', 1)[-1]
+    orphan = server.UPLOADS_DIR / 'orphan.pdf'
+    orphan.write_bytes(b'x' * 100)
+    fresh_orphan = server.UPLOADS_DIR / 'still-uploading.pdf'
+    fresh_orphan.write_bytes(b'x')
+    (server.UPLOADS_DIR / 'subdir').mkdir()
+    age(referenced, 48)
+    age(orphan, 48)
+
+    dry_run = client.post('/api/admin/uploads/gc?grace_period_hours=24', headers=bearer(admin)).json()
+
+    assert dry_run == {
+        'dry_run': True, 'scanned_count': 2, 'orphaned_count': 1, 'bytes_reclaimed': 100, 'orphaned_files': ['orphan.pdf']
+    }
+    assert orphan.exists()
+
+    collected = client.post('/api/admin/uploads/gc?grace_period_hours=24&dry_run=false', headers=bearer(admin)).json()
+
+    assert (collected['dry_run'], collected['orphaned_files']) == (False, ['orphan.pdf'])
+    assert not orphan.exists()
+    assert referenced.exists() and fresh_orphan.exists()
+
+
+def test_scan_spans_batches(server):
+    for i in range(5):
+        (server.UPLOADS_DIR / f'orphan-{i}.txt').write_text('x')
+
+    report = asyncio.run(server.collect_orphaned_uploads(dry_run=False, grace_period_hours=0, batch_size=2))
+
+    assert (report['scanned_count'], report['orphaned_count']) == (5, 5)
+    assert list(server.UPLOADS_DIR.iterdir()) == []
+
+
+def test_gc_is_admin_only_and_rejects_negative_grace(client, classroom):
+    assert client.post('/api/admin/uploads/gc', headers=bearer(classroom['students'][0])).status_code == 403
+    assert client.post('/api/admin/uploads/gc?grace_period_hours=-1', headers=bearer(classroom['admin'])).status_code == 400